@@ -0,0 +1,65 @@
+"""
+Analyze a recorded trip offline and store it as a DMS session.
+
+  python -m app.cli.analyze_video trip.mp4 --owner <ownerId> [--vehicle <vehicleId>] [--name "Trip 12"]
+         [--stride 5] [--workers 8] [--batch 8] [--started-at 2025-10-01T08:30:00]
+         [--dry-run]
+
+--dry-run prints the confirmed events as JSON lines and writes nothing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from bson import ObjectId
+from app.core.config import settings
+from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.services.video_job import analyze_video, replay, run_video_job
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Offline DMS analysis of a video file")
+    ap.add_argument("video")
+    ap.add_argument("--owner", help="owner user id (required unless --dry-run)")
+    ap.add_argument("--vehicle", help="link the session to this vehicle id")
+    ap.add_argument("--name", help="session name (default: file name)")
+    ap.add_argument("--stride", type=int, default=settings.VIDEO_JOB_STRIDE)
+    ap.add_argument("--workers", type=int, default=settings.VIDEO_JOB_WORKERS or None)
+    ap.add_argument("--batch", type=int, default=8)
+    ap.add_argument("--started-at", type=datetime.fromisoformat,
+                    help="recording start (UTC, ISO); default: now")
+    ap.add_argument("--dry-run", action="store_true")
+    return ap.parse_args()
+
+
+async def main():
+    args = parse_args()
+    t0 = time.perf_counter()
+
+    if args.dry_run:
+        result = analyze_video(args.video, stride=args.stride, workers=args.workers, batch=args.batch)
+        for e in replay(result["detections"], ObjectId(), args.started_at or datetime.utcnow()):
+            print(json.dumps({"type": e["type"], "confidence": e["confidence"],
+                              "createdAt": e["createdAt"].isoformat()}))
+        summary = {"frames": result["frames"], "analyzed": len(result["detections"])}
+    else:
+        if not args.owner:
+            raise SystemExit("--owner is required (or use --dry-run)")
+        await connect_to_mongo()
+        try:
+            summary = await run_video_job(
+                args.video, ObjectId(args.owner), args.name or os.path.basename(args.video),
+                stride=args.stride, workers=args.workers, batch=args.batch,
+                started_at=args.started_at,
+                vehicle_id=ObjectId(args.vehicle) if args.vehicle else None)
+        finally:
+            await close_mongo_connection()
+
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({**summary, "elapsed_secs": round(elapsed, 2)}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
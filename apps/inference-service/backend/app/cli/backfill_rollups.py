@@ -0,0 +1,41 @@
+"""
+Rebuild the analytics rollups from stored events.
+
+  python -m app.cli.backfill_rollups [--owner <ownerId>]
+
+Recomputes the rollups in scope from the stored events, owner by owner:
+each owner's rollups are overwritten once rebuilt, then the ones left
+without events are deleted. Run it while the owner(s) aren't streaming.
+"""
+import argparse
+import asyncio
+import json
+import time
+from bson import ObjectId
+import app.db.mongodb as mongodb
+from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.db.init_indexes import ensure_indexes
+from app.services.rollups import backfill
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Rebuild analytics rollups from events")
+    ap.add_argument("--owner", help="only this owner user id (default: everyone)")
+    ap.add_argument("--batch", type=int, default=5000, help="events per rollup bulk write")
+    return ap.parse_args()
+
+
+async def main():
+    args = parse_args()
+    t0 = time.perf_counter()
+    await connect_to_mongo()
+    try:
+        await ensure_indexes()
+        summary = await backfill(mongodb.db, ObjectId(args.owner) if args.owner else None, args.batch)
+    finally:
+        await close_mongo_connection()
+    print(json.dumps({**summary, "elapsed_secs": round(time.perf_counter() - t0, 2)}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Move stored events from the per-event `events` collection into the bucketed
+store (services/event_store.py).
+
+  python -m app.cli.migrate_events [--owner <ownerId>] [--drop]
+
+Session by session: rebuilds that session's migrated buckets from its legacy
+rows, then marks it `eventsMigrated` so reads stop merging the old rows.
+Safe to re-run after an interruption; sessions already marked are skipped
+unless --redo is given. --drop deletes each session's legacy rows once copied.
+"""
+import argparse
+import asyncio
+import json
+import time
+from bson import ObjectId
+import app.db.mongodb as mongodb
+from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.db.init_indexes import ensure_indexes
+from app.services.event_store import migrate_session
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Migrate events into bucketed storage")
+    ap.add_argument("--owner", help="only this owner user id (default: everyone)")
+    ap.add_argument("--batch", type=int, default=5000, help="events per bucket bulk write")
+    ap.add_argument("--redo", action="store_true", help="also re-migrate sessions already marked")
+    ap.add_argument("--drop", action="store_true", help="delete legacy rows after copying them")
+    return ap.parse_args()
+
+
+async def main():
+    args = parse_args()
+    t0 = time.perf_counter()
+    await connect_to_mongo()
+    sessions = events = 0
+    try:
+        await ensure_indexes()
+        db = mongodb.db
+        q = {} if args.owner is None else {"ownerId": ObjectId(args.owner)}
+        if not args.redo:
+            q["eventsMigrated"] = {"$ne": True}
+        ids = [s["_id"] async for s in db.sessions.find(q, {"_id": 1})]
+        for sid in ids:
+            events += await migrate_session(db, sid, args.batch, args.drop)
+            sessions += 1
+    finally:
+        await close_mongo_connection()
+    print(json.dumps({"sessions": sessions, "events": events,
+                      "elapsed_secs": round(time.perf_counter() - t0, 2)}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,173 @@
+"""
+Cache for authenticated owners (REST dependency + WebSocket handshake).
+- Decoded token claims, keyed by the raw token: a token seen recently skips
+  the JWT signature check (never cached past its own `exp`).
+- Owner documents (without passwordHash), keyed by `sub`: skips users.find_one.
+- Both are in-process TTL + LRU maps. With OWNER_CACHE_REDIS_URL set, owner
+  docs are also shared between workers through Redis (optional dependency);
+  the in-process copy then only bridges OWNER_CACHE_TTL_SECS.
+- PUT /api/owners/me calls invalidate(); other workers' in-process copies
+  age out within OWNER_CACHE_TTL_SECS.
+"""
+import logging
+import time
+from collections import OrderedDict
+import bson
+from bson import ObjectId
+import app.db.mongodb as mongodb
+from app.core.config import settings
+from app.core.security import decode_token
+
+try:  # optional: only needed for the shared tier
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+log = logging.getLogger(__name__)
+
+OWNER_PROJECTION = {"passwordHash": 0}  # never cache (or share) password hashes
+
+
+class TTLCache:
+    """
+    LRU map whose entries also expire; not thread-safe (event loop only).
+    """
+
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max(1, max_items)
+        self.ttl = ttl
+        self._data: "OrderedDict[object, tuple[float, object]]" = OrderedDict()  # oldest use first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key, value, ttl: float | None = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_items:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def items(self) -> list[tuple]:
+        """
+        Snapshot of the live (key, value) pairs.
+        """
+        now = time.monotonic()
+        return [(k, v) for k, (exp, v) in list(self._data.items()) if exp > now]
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class AuthCache:
+    def __init__(self, max_items: int, ttl: float, redis_url: str = "", shared_ttl: float = 300.0):
+        self.ttl = ttl
+        self.claims_cache = TTLCache(max_items, ttl)
+        self.owners = TTLCache(max_items, ttl)
+        self.shared_ttl = int(shared_ttl)
+        self.redis_url = redis_url
+        self._redis = None
+        self.shared_errors = 0
+        if redis_url and aioredis is None:
+            log.warning("OWNER_CACHE_REDIS_URL is set but the redis package is missing; in-process cache only")
+
+    def claims(self, token: str) -> dict:
+        """
+        decode_token() with memoization; raises JWTError like it.
+        """
+        payload = self.claims_cache.get(token)
+        if payload is None:
+            payload = decode_token(token)
+            left = payload.get("exp", time.time() + self.ttl) - time.time()
+            self.claims_cache.set(token, payload, min(self.ttl, left))
+        return payload
+
+    async def owner(self, sub: str) -> dict | None:
+        """
+        Owner document by id (in-process → shared → Mongo).
+        """
+        user = self.owners.get(sub)
+        if user is not None:
+            return user
+
+        user = await self._shared_get(sub)
+        if user is None:
+            user = await mongodb.db.users.find_one({"_id": ObjectId(sub)}, OWNER_PROJECTION)
+            if user is None:
+                return None  # not cached: a new account may use this id later
+            await self._shared_set(sub, user)
+        self.owners.set(sub, user)
+        return user
+
+    async def invalidate(self, sub: str):
+        self.owners.delete(sub)
+        r = self._client()
+        if r is not None:
+            try:
+                await r.delete(self._key(sub))
+            except Exception:
+                self.shared_errors += 1
+                log.exception("owner cache: shared invalidate failed for %s", sub)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    # ---- shared tier (Redis); failures fall back to Mongo, never fail auth ----
+
+    def _client(self):
+        if self._redis is None and self.redis_url and aioredis is not None:
+            self._redis = aioredis.from_url(self.redis_url)
+        return self._redis
+
+    @staticmethod
+    def _key(sub: str) -> str:
+        return f"owner:{sub}"
+
+    async def _shared_get(self, sub: str) -> dict | None:
+        r = self._client()
+        if r is None:
+            return None
+        try:
+            raw = await r.get(self._key(sub))
+        except Exception:
+            self.shared_errors += 1
+            return None
+        return bson.decode(raw) if raw else None
+
+    async def _shared_set(self, sub: str, user: dict):
+        r = self._client()
+        if r is None:
+            return
+        try:
+            await r.set(self._key(sub), bson.encode(user), ex=self.shared_ttl)
+        except Exception:
+            self.shared_errors += 1
+
+    def stats(self) -> dict:
+        return {
+            "claims": self.claims_cache.stats(),
+            "owners": self.owners.stats(),
+            "shared": bool(self._client()),
+            "shared_errors": self.shared_errors,
+        }
+
+
+auth_cache = AuthCache(settings.OWNER_CACHE_MAX, settings.OWNER_CACHE_TTL_SECS,
+                       settings.OWNER_CACHE_REDIS_URL, settings.OWNER_CACHE_SHARED_TTL_SECS)
@@ -19,10 +19,84 @@ class Settings(BaseSettings):
 
     UPLOAD_DIR: str = "uploads"
     BASE_URL: str = "http://localhost:8000"
+    MAX_IMAGE_BYTES: int = 8 * 1024 * 1024  # per uploaded image (413 above this)
+    THUMB_MAX_SIDE: int = 320               # background thumbnails for list views
+    IMAGE_WEBP_QUALITY: int = 80
+    IMAGE_VARIANT_WORKERS: int = 2          # concurrent thumbnail / WebP jobs
 
     # ---- DMS (seatbelt/phone stage) ----
+    DETECTOR_BACKEND: str = "ultralytics"  # "ultralytics" (YOLO_MODEL) | "onnx" (ONNX_MODEL) | "stub"
     YOLO_MODEL: str = "weights/best.pt"  # path to your trained model
+    DETECTOR_IMGSZ: int = 480  # model input size (ultralytics backend; ONNX reads it from the export)
+    ONNX_MODEL: str = "weights/best.onnx"  # `yolo export model=best.pt format=onnx imgsz=480`
+    ONNX_THREADS: int = 0  # onnxruntime intra-op threads per session (0 = runtime default)
+    STUB_INFER_MS: float = 15.0  # simulated model time per batch for the stub backend
+    WARMUP_FRAMES: int = 2  # synthetic frames per inference thread at startup before /readyz (0 = load only)
     MAX_FPS: int = 2
+    FACE_STAGE_ENABLED: bool = True  # drowsy/distracted via face landmarks (needs mediapipe)
+    FACE_EVERY_N: int = 3            # run the face stage on every Nth processed frame
+    MOTION_GATE_ENABLED: bool = True     # reuse detector output while the scene is unchanged
+    MOTION_DIFF_THRESHOLD: float = 4.0   # mean abs diff (0..255) of 32x32 gray thumbnails
+    MOTION_MAX_REUSE_SECS: float = 2.0   # never reuse an output older than this
+
+    # ---- Offline video jobs (recorded trips) ----
+    VIDEO_JOB_WORKERS: int = 0   # worker processes per job (0 = all cores)
+    VIDEO_JOB_STRIDE: int = 5    # analyze every Nth frame by default
+    VIDEO_JOB_CONCURRENCY: int = 1  # video jobs running at once per process (429 when all busy)
+    VIDEO_JOB_DIR: str = "job_uploads"  # uploaded videos while a job runs (not under /static)
+    MAX_VIDEO_BYTES: int = 2 * 1024 * 1024 * 1024  # per uploaded video (413 above this)
     LOG_LEVEL: str = "INFO"
 
+    # ---- Inference executor (keeps model calls off the event loop) ----
+    INFERENCE_WORKERS: int = 2        # worker threads, each with its own model handle
+    INFERENCE_QUEUE_DEPTH: int = 16   # max jobs in flight before new frames are rejected
+    BATCH_MAX_SIZE: int = 8           # frames per batched predict (across sessions)
+    BATCH_MAX_WAIT_MS: float = 20.0   # max time a frame waits for its batch to fill
+
+    # ---- Load-aware quality tiers (services/load_control.py) ----
+    LOAD_CONTROL_ENABLED: bool = True
+    # (imgsz (0 = DETECTOR_IMGSZ), max fps per session (0 = MAX_FPS), optional stages on), best first
+    QUALITY_TIERS: list[tuple[int, float, bool]] = [(0, 0.0, True), (416, 0.0, False), (352, 1.0, False), (288, 0.5, False)]
+    LOAD_CHECK_SECS: float = 1.0
+    LOAD_HIGH_QUEUE: float = 0.75         # inference queue fill (0..1) that counts as pressure
+    LOAD_LOW_QUEUE: float = 0.25          # ... and as calm
+    LOAD_HIGH_LATENCY_MS: float = 400.0   # per-frame latency (admitted → result, smoothed): pressure
+    LOAD_LOW_LATENCY_MS: float = 150.0    # ... calm
+    LOAD_CALM_CHECKS: int = 5             # calm checks in a row before stepping one tier back up
+
+    # ---- Model hot reload / shadow (A/B) inference ----
+    ADMIN_TOKEN: str = ""             # X-Admin-Token for /api/admin/models (empty = admin API disabled)
+    MODEL_WATCH_SECS: float = 0.0     # >0: poll the active weights file this often, reload when it changes
+    SHADOW_SAMPLE_RATE: float = 0.1   # default fraction of primary frames also run on a shadow model
+    SHADOW_QUEUE_DEPTH: int = 2       # shadow batches waiting; further samples are skipped
+
+    # ---- Multi-process inference (gateway + workers, session affinity) ----
+    INFERENCE_PROCESSES: int = 0      # >0: frames run in this many worker processes, not in the API process
+    WORKER_QUEUE_DEPTH: int = 8       # frames waiting per worker process before new ones are dropped
+    WORKER_RESTART_LIMIT: int = 5     # crashed workers replaced per window; beyond that the pool stays short (not ready)
+    WORKER_RESTART_WINDOW_SECS: float = 300.0
+
+    # ---- Per-session DMS state (debouncers) ----
+    SESSION_STATE_MAX: int = 10000       # LRU cap on sessions kept in memory
+    SESSION_STATE_IDLE_SECS: int = 900   # drop state not touched for this long
+
+    # ---- Event write-behind (confirmed alerts → Mongo) ----
+    EVENT_FLUSH_MAX: int = 500       # events per insert_many
+    EVENT_FLUSH_MS: float = 250.0    # flush at least this often when events are queued
+    EVENT_QUEUE_MAX: int = 100000    # cap while Mongo is unreachable (oldest dropped)
+    EVENT_BUCKET_SECS: int = 3600    # event_buckets: one document per session per window
+    EVENT_BUCKET_MAX: int = 1000     # events per bucket document before another one opens
+    EVENT_LEGACY_READS: bool = True  # also read the per-event `events` collection (until migrated)
+
+    # ---- Password hashing (bcrypt_sha256, off the event loop) ----
+    BCRYPT_ROUNDS: int = 12        # cost; hashes with another cost are rehashed on login
+    HASH_WORKERS: int = 2          # threads for hash / verify (bcrypt releases the GIL)
+    HASH_QUEUE_DEPTH: int = 64     # jobs in flight before register / login answer 503
+
+    # ---- Auth cache (token claims + owner docs, see core/cache.py) ----
+    OWNER_CACHE_MAX: int = 10000          # LRU cap per in-process map
+    OWNER_CACHE_TTL_SECS: float = 30.0    # in-process lifetime (bounds staleness across workers)
+    OWNER_CACHE_REDIS_URL: str = ""       # optional shared tier, e.g. redis://localhost:6379/0
+    OWNER_CACHE_SHARED_TTL_SECS: float = 300.0
+
 settings = Settings()
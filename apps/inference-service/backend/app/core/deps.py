@@ -1,16 +1,21 @@
 # app/core/deps.py
-from fastapi import Depends, HTTPException, status
+import hmac
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
-from bson import ObjectId
-from app.core.security import decode_token
+from app.core.cache import auth_cache
+from app.core.config import settings
 import app.db.mongodb as mongodb  # <-- use module, not "from ... import db"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 async def get_current_owner(token: str = Depends(oauth2_scheme)):
+    """
+    Owner document for the bearer token (without passwordHash).
+    Claims and the document come from auth_cache; Mongo only on a miss.
+    """
     try:
-        payload = decode_token(token)
+        payload = auth_cache.claims(token)
         user_id: str = payload.get("sub")
         role: str = payload.get("role")
         if user_id is None or role != "owner":
@@ -22,7 +27,14 @@ async def get_current_owner(token: str = Depends(oauth2_scheme)):
     if mongodb.db is None:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="DB not initialized")
 
-    user = await mongodb.db.users.find_one({"_id": ObjectId(user_id)})
+    user = await auth_cache.owner(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
+
+async def require_admin(x_admin_token: str = Header(default="")):
+    """
+    Operator endpoints: X-Admin-Token must match ADMIN_TOKEN (unset = always 403).
+    """
+    if not settings.ADMIN_TOKEN or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
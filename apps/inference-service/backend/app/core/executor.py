@@ -0,0 +1,107 @@
+"""
+Bounded thread-pool executor for blocking work called from the event loop.
+- Thread pool; meant for work that releases the GIL (model inference,
+  bcrypt password hashing).
+- Bounded in-flight depth: callers get Busy instead of piling up.
+- Cheap counters (queue depth, wait/run time) for monitoring.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Busy(RuntimeError):
+    """Raised when `max_queue` jobs are already waiting or running."""
+
+
+class BoundedExecutor:
+    busy = Busy  # raised by submit() when full
+
+    def __init__(self, workers: int, max_queue: int, name: str):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(self.workers, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self._lock = threading.Lock()  # guards the timing totals written by worker threads
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_secs = 0.0  # time jobs spent queued before a worker picked them up
+        self.run_secs = 0.0   # time spent inside the job itself
+
+    async def submit(self, fn, *args):
+        """
+        Run `fn(*args)` on a worker thread and await the result.
+        Raises `busy` when the queue is full (caller decides: drop or 503).
+        """
+        if self.in_flight >= self.max_queue:
+            self.rejected += 1
+            raise self.busy(f"{self.in_flight} {self.name} jobs in flight")
+
+        # in_flight is only touched on the loop thread (submit + done callback)
+        self.in_flight += 1
+        self.submitted += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        loop = asyncio.get_running_loop()
+        cf = self._pool.submit(self._timed, fn, args, time.perf_counter())
+        # Release the slot when the job really finishes on its thread, even if the
+        # awaiting coroutine was cancelled (e.g. socket closed mid-frame).
+        cf.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+        return await asyncio.wrap_future(cf, loop=loop)
+
+    async def preload(self, fn):
+        """
+        Run `fn()` once on every worker thread (e.g. to load a thread-local model)
+        so the first live frame doesn't pay for it. A barrier pins one job per thread.
+        """
+        barrier = threading.Barrier(self.workers)
+
+        def job():
+            fn()
+            barrier.wait(timeout=300)
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            asyncio.wrap_future(self._pool.submit(job), loop=loop) for _ in range(self.workers)
+        ))
+
+    def _timed(self, fn, args, queued_at: float):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            done = time.perf_counter()
+            with self._lock:
+                self.wait_secs += started - queued_at
+                self.run_secs += done - started
+
+    def _release(self, fut):
+        self.in_flight -= 1
+        if fut.cancelled() or fut.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    def stats(self) -> dict:
+        done = max(1, self.completed + self.failed)
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(1000 * self.wait_secs / done, 2),
+            "avg_run_ms": round(1000 * self.run_secs / done, 2),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -2,18 +2,31 @@ from datetime import datetime, timedelta, timezone
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.executor import BoundedExecutor
 
 # Use bcrypt_sha256 so very long passwords work (pre-hashes with SHA256)
+# min = max = default rounds: a hash with any other cost "needs update" (rehash on login)
 pwd_context = CryptContext(
     schemes=["bcrypt_sha256"],
     deprecated="auto",
+    bcrypt_sha256__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt_sha256__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt_sha256__max_rounds=settings.BCRYPT_ROUNDS,
 )
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# bcrypt takes ~100-300 ms of CPU per call: never on the event loop.
+# Bounded like the inference executor; a full queue raises Busy (→ 503).
+hash_executor = BoundedExecutor(settings.HASH_WORKERS, settings.HASH_QUEUE_DEPTH, name="password-hash")
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+async def hash_password_async(password: str) -> str:
+    return await hash_executor.submit(pwd_context.hash, password)
+
+async def verify_and_update_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    (ok, new_hash): new_hash is set when the stored hash uses outdated
+    parameters (cost / scheme) and should replace it.
+    """
+    return await hash_executor.submit(pwd_context.verify_and_update, plain, hashed)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
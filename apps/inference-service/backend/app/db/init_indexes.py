@@ -13,8 +13,16 @@ async def ensure_indexes():
 
     # Vehicles
     await db.vehicles.create_index("plateNo", unique=True)
-    await db.vehicles.create_index([("ownerId", 1)])
+    await db.vehicles.create_index([("ownerId", 1), ("_id", 1)])  # list_my_vehicles keyset
 
         # ---- DMS collections ----
-    await db.sessions.create_index([("ownerId", 1), ("startedAt", -1)])
-    await db.events.create_index([("sessionId", 1), ("createdAt", -1)])
+    # list_sessions keyset (startedAt, _id); also serves ownerId-only / startedAt queries
+    await db.sessions.create_index([("ownerId", 1), ("startedAt", -1), ("_id", -1)])
+    await db.events.create_index([("sessionId", 1), ("createdAt", -1)])  # legacy per-event rows
+    # bucketed events (services/event_store.py): one doc per session per window
+    await db.event_buckets.create_index([("sessionId", 1), ("start", 1)])
+    await db.event_buckets.create_index("u")  # op ids: retried appends skip what already landed
+    await db.jobs.create_index([("ownerId", 1), ("createdAt", -1)])
+    # analytics rollups: one doc per (owner, vehicle, granularity, bucket); upsert target
+    await db.rollups.create_index(
+        [("ownerId", 1), ("vehicleId", 1), ("granularity", 1), ("bucket", 1)], unique=True)
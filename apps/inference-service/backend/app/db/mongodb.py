@@ -1,12 +1,14 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from app.core.config import settings
+from app.services.metrics import MongoCommandMetrics
 
 client: AsyncIOMotorClient | None = None
 db: AsyncIOMotorDatabase | None = None
 
 async def connect_to_mongo():
     global client, db
-    client = AsyncIOMotorClient(settings.MONGODB_URI)
+    # every driver command is timed into dms_mongo_command_seconds
+    client = AsyncIOMotorClient(settings.MONGODB_URI, event_listeners=[MongoCommandMetrics()])
     db = client[settings.MONGODB_DB]
 
 async def close_mongo_connection():
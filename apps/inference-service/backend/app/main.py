@@ -1,4 +1,5 @@
 # app/main.py
+import asyncio
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware   # <-- add this
@@ -8,7 +9,15 @@ from app.routes import auth, owners, vehicles
 from app.core.config import settings
 from app.utils.images import ensure_dir
 # new DMS routers
-from app.routes import sessions_rest, sessions_ws, debug_yolo
+from app.routes import sessions_rest, sessions_ws, debug_yolo, jobs, metrics, analytics, health, models_admin
+from app.services.inference.executor import inference_executor
+from app.services.inference.registry import models
+from app.services.event_sink import event_sink
+from app.core.cache import auth_cache
+from app.core.security import hash_executor
+from app.services.worker_pool import worker_pool
+from app.services import model_admin
+from app.services.load_control import load_controller
 
 app = FastAPI(title="Road Safety – Owner & Vehicles API", version="1.0.0")
 
@@ -30,9 +39,32 @@ async def startup():
     ensure_dir(settings.UPLOAD_DIR)
     await connect_to_mongo()
     await ensure_indexes()
+    event_sink.start()
+    # load + warm models in the background: /healthz answers meanwhile, /readyz once warm
+    if worker_pool.enabled:
+        warmup = worker_pool.start()  # each worker loads and warms its own model
+    else:
+        warmup = models.warmup(inference_executor)  # every inference thread
+    app.state.warmup = asyncio.create_task(warmup)
+    app.state.load_control = None
+    if settings.LOAD_CONTROL_ENABLED and len(load_controller.tiers) > 1:
+        app.state.load_control = asyncio.create_task(load_controller.run())
+    app.state.model_watch = None
+    if settings.MODEL_WATCH_SECS > 0:
+        app.state.model_watch = asyncio.create_task(model_admin.watch(settings.MODEL_WATCH_SECS))
 
 @app.on_event("shutdown")
 async def shutdown():
+    app.state.warmup.cancel()
+    for task in (app.state.load_control, app.state.model_watch):
+        if task is not None:
+            task.cancel()
+    models.clear_shadow()
+    await worker_pool.stop()
+    inference_executor.shutdown()
+    hash_executor.shutdown()
+    await event_sink.stop()  # drain queued events before the client closes
+    await auth_cache.close()
     await close_mongo_connection()
 
 app.include_router(auth.router)
@@ -43,5 +75,12 @@ app.include_router(vehicles.router)
 app.include_router(sessions_rest.router)
 app.include_router(sessions_ws.router)
 app.include_router(debug_yolo.router)
+app.include_router(jobs.router)
+app.include_router(models_admin.router)
+app.include_router(analytics.router)
+
+# Observability
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 
@@ -1,13 +1,14 @@
 from datetime import datetime
 from bson import ObjectId
 
-def event_doc(session_id: ObjectId, etype: str, conf: float):
+def event_doc(session_id: ObjectId, etype: str, conf: float, created_at: datetime | None = None):
     """
     One confirmed event row (after debouncing).
+    `created_at` defaults to now; offline jobs pass the video time instead.
     """
     return {
         "sessionId": session_id,
-        "type": etype,              # "seatbelt" | "phone"
+        "type": etype,              # "seatbelt" | "phone" | "drowsy" | "distracted"
         "confidence": float(conf),  # 0..1
-        "createdAt": datetime.utcnow()
+        "createdAt": created_at or datetime.utcnow()
     }
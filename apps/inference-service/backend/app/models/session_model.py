@@ -1,17 +1,20 @@
 from datetime import datetime
 from bson import ObjectId
 
-def session_doc(owner_id: ObjectId, name: str):
+def session_doc(owner_id: ObjectId, name: str, vehicle_id: ObjectId | None = None):
     """
-    New DMS session document.
+    New DMS session document (optionally linked to one of the owner's vehicles).
     """
     return {
         "ownerId": owner_id,
+        "vehicleId": vehicle_id,
         "name": name,
         "startedAt": datetime.utcnow(),
         "endedAt": None,
         "metrics": {
-            "seatbelt": 0,  # count of seatbelt OFF events
-            "phone": 0,     # count of phone-use events
+            "seatbelt": 0,    # count of seatbelt OFF events
+            "phone": 0,       # count of phone-use events
+            "drowsy": 0,      # count of drowsiness (PERCLOS) events
+            "distracted": 0,  # count of head-pose distraction events
         }
     }
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from bson import ObjectId
+import app.db.mongodb as mongodb
+from app.core.deps import get_current_owner
+from app.schemas.analytics import RollupPoint, VehicleRisk
+from app.services import event_store
+from app.services.rollups import bucket_start
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+# Everything here reads the materialized rollups (services/rollups.py), never raw events.
+
+def _range(start: datetime | None, end: datetime | None, granularity: str) -> dict:
+    # rollup buckets are naive UTC: bring aware bounds ('...Z', '+02:00') onto the same clock
+    start, end = event_store.utc_naive(start), event_store.utc_naive(end)
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(400, "'from' must be before 'to'")
+    # a bucket is included when it starts inside [from, to)
+    return {"$gte": bucket_start(start, granularity), "$lt": end}
+
+def _totals(counts: dict) -> dict:
+    return {"counts": counts, "total": sum(counts.values())}
+
+@router.get("/series", response_model=list[RollupPoint])
+async def series(
+    current=Depends(get_current_owner),
+    granularity: Literal["hour", "day"] = "day",
+    start: datetime | None = Query(None, alias="from", description="ISO 8601 (UTC); default: 30 days before 'to'"),
+    end: datetime | None = Query(None, alias="to", description="ISO 8601 (UTC); default: now"),
+    vehicleId: str | None = Query(None, description="one vehicle; default: all sessions"),
+):
+    """
+    Violations per hour / day (UTC), oldest first. Buckets without events are omitted.
+    """
+    q = {
+        "ownerId": current["_id"],
+        "vehicleId": ObjectId(vehicleId) if vehicleId else None,
+        "granularity": granularity,
+        "bucket": _range(start, end, granularity),
+    }
+    cur = mongodb.db.rollups.find(q, {"_id": 0, "bucket": 1, "counts": 1}).sort("bucket", 1)
+    return [{"bucket": r["bucket"].isoformat(), **_totals(r.get("counts", {}))}
+            async for r in cur]
+
+async def _sum_counts(match: dict, by: str | None) -> list[dict]:
+    """
+    Sum rollup counts per type (and per `by` field) in Mongo.
+    """
+    pipeline = [
+        {"$match": match},
+        {"$project": {"key": f"${by}" if by else None, "c": {"$objectToArray": "$counts"}}},
+        {"$unwind": "$c"},
+        {"$group": {"_id": {"key": "$key", "type": "$c.k"}, "n": {"$sum": "$c.v"}}},
+        {"$group": {"_id": "$_id.key", "counts": {"$push": {"k": "$_id.type", "v": "$n"}}}},
+        {"$project": {"counts": {"$arrayToObject": "$counts"}}},
+    ]
+    return await mongodb.db.rollups.aggregate(pipeline).to_list(length=None)
+
+@router.get("/summary", response_model=dict[str, int])
+async def summary(
+    current=Depends(get_current_owner),
+    start: datetime | None = Query(None, alias="from", description="ISO 8601 (UTC); default: 30 days before 'to'"),
+    end: datetime | None = Query(None, alias="to", description="ISO 8601 (UTC); default: now"),
+):
+    """
+    Violation counts by type over the range (whole days, UTC).
+    """
+    rows = await _sum_counts({"ownerId": current["_id"], "vehicleId": None, "granularity": "day",
+                              "bucket": _range(start, end, "day")}, None)
+    return rows[0]["counts"] if rows else {}
+
+@router.get("/vehicles", response_model=list[VehicleRisk])
+async def vehicles(
+    current=Depends(get_current_owner),
+    start: datetime | None = Query(None, alias="from", description="ISO 8601 (UTC); default: 30 days before 'to'"),
+    end: datetime | None = Query(None, alias="to", description="ISO 8601 (UTC); default: now"),
+):
+    """
+    Per-vehicle violation counts over the range (whole days, UTC), most violations first.
+    Only sessions linked to a vehicle count here.
+    """
+    rows = await _sum_counts({"ownerId": current["_id"], "vehicleId": {"$ne": None}, "granularity": "day",
+                              "bucket": _range(start, end, "day")}, "vehicleId")
+    out = [{"vehicleId": str(r["_id"]), **_totals(r["counts"])} for r in rows]
+    return sorted(out, key=lambda r: r["total"], reverse=True)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
 from fastapi.security import OAuth2PasswordRequestForm
 import app.db.mongodb as mongodb  # <-- use module
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password_async, verify_and_update_async, create_access_token
+from app.core.executor import Busy
 from app.schemas.user import OwnerOut
 from app.schemas.auth import TokenOut
 from app.models.user_model import user_doc
@@ -31,13 +32,18 @@ async def register_owner(
     if image:
         imageUrl = await save_image(image, subdir="owners")
 
+    try:
+        passwordHash = await hash_password_async(password)
+    except Busy:
+        raise HTTPException(503, "Server busy, retry shortly", headers={"Retry-After": "1"})
+
     doc = user_doc(
         fullName=fullName,
         email=email,
         phone=phone,
         address=address,
         nic=nic,
-        passwordHash=hash_password(password),
+        passwordHash=passwordHash,
         imageUrl=imageUrl,
     )
     res = await mongodb.db.users.insert_one(doc)
@@ -61,8 +67,17 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     user = await mongodb.db.users.find_one({
         "$or": [{"email": username.lower()}, {"nic": username.upper()}]
     })
-    if not user or not verify_password(form_data.password, user["passwordHash"]):
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    try:
+        ok, new_hash = await verify_and_update_async(form_data.password, user["passwordHash"])
+    except Busy:
+        raise HTTPException(503, "Server busy, retry shortly", headers={"Retry-After": "1"})
+    if not ok:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        # cost / scheme changed since this hash was made: upgrade it transparently
+        await mongodb.db.users.update_one({"_id": user["_id"]}, {"$set": {"passwordHash": new_hash}})
 
     token = create_access_token({"sub": str(user["_id"]), "role": user["role"]})
     return {"access_token": token}
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import numpy as np, cv2
-from app.services.inference.yolo import SeatbeltPhoneDetector
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from app.core.deps import require_admin
+from app.services.inference.registry import models
+from app.services.inference.preprocess import decode
+from app.services.inference.executor import inference_executor, InferenceBusy
+from app.services.event_sink import event_sink
+from app.services.inference.motion_gate import gate_stats, skip_ratio
+from app.services.worker_pool import worker_pool
+from app.services.load_control import load_controller
+from app.routes import sessions_ws
 
 router = APIRouter(prefix="/api/debug", tags=["Debug"])
-detector = SeatbeltPhoneDetector()
 
 @router.post("/yolo")
 async def debug_yolo(image: UploadFile = File(...)):
@@ -12,9 +18,51 @@ async def debug_yolo(image: UploadFile = File(...)):
     Returns phone_conf and seatbelt_present.
     """
     data = await image.read()
-    arr = np.frombuffer(data, np.uint8)
-    bgr = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    if bgr is None:
+    try:
+        out = await inference_executor.submit(_decode_and_run, data)
+    except InferenceBusy:
+        raise HTTPException(503, "Inference busy, retry shortly")
+    if out is None:
         raise HTTPException(400, "Invalid image")
-    out = detector.run(bgr)
     return out
+
+@router.get("/inference")
+async def inference_stats():
+    """
+    Inference executor, WS batch scheduler, session-state, event-sink, motion-gate and load-tier counters.
+    """
+    return {
+        **inference_executor.stats(),
+        "batching": sessions_ws.batcher.stats(),
+        "session_states": sessions_ws.session_states.stats(),
+        "event_sink": event_sink.stats(),
+        "motion_gate": {**gate_stats, "skip_ratio": round(skip_ratio(), 3)},
+        "load": load_controller.stats(),
+    }
+
+@router.get("/workers")
+async def worker_stats():
+    """
+    Inference worker processes (INFERENCE_PROCESSES > 0): sessions, frames, migrations.
+    """
+    if not worker_pool.enabled:
+        return {"processes": 0}
+    return await worker_pool.stats()
+
+@router.post("/workers", dependencies=[Depends(require_admin)])
+async def resize_workers(processes: int = Query(..., ge=1, le=64)):
+    """
+    Add or remove inference worker processes; moved sessions keep their state.
+    Requires X-Admin-Token.
+    """
+    if not worker_pool.enabled:
+        raise HTTPException(409, "Worker processes are disabled (INFERENCE_PROCESSES=0)")
+    await worker_pool.resize(processes)
+    return await worker_pool.stats()
+
+def _decode_and_run(data: bytes) -> dict | None:
+    detector = models.detector()  # the WS pipeline's instance
+    bgr = decode(data, detector.imgsz)
+    if bgr is None:
+        return None
+    return detector.run(bgr)
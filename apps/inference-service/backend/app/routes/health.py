@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+import app.db.mongodb as mongodb
+from app.services.inference.registry import models
+from app.services.worker_pool import worker_pool
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up and its event loop answers.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """
+    Readiness: 200 once Mongo is connected and the models are loaded and warm
+    (in every inference thread, or in every worker process); 503 before that.
+    """
+    warm = worker_pool.ready if worker_pool.enabled else models.ready
+    checks = {"mongo": mongodb.db is not None, "models": warm}
+    body = {"ready": all(checks.values()), "checks": checks, "models": models.stats()}
+    if worker_pool.enabled:
+        body["workers"] = {"ready": len(worker_pool.ring.members()), "wanted": worker_pool.size,
+                           "gave_up": worker_pool.gave_up}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
@@ -0,0 +1,128 @@
+import asyncio, logging, os
+from datetime import datetime
+from uuid import uuid4
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from starlette.concurrency import run_in_threadpool
+from bson import ObjectId
+import app.db.mongodb as mongodb
+from app.core.deps import get_current_owner
+from app.core.config import settings
+from app.schemas.job import JobOut
+from app.services.video_job import run_video_job, job_slots
+from app.routes.sessions_rest import owned_vehicle_id
+from app.utils.images import ensure_dir, CHUNK
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+_running: set[asyncio.Task] = set()  # keep references so tasks aren't GC'd mid-run
+log = logging.getLogger(__name__)
+
+def job_out(j: dict) -> dict:
+    return {
+        "id": str(j["_id"]),
+        "kind": j["kind"],
+        "status": j["status"],
+        "createdAt": j["createdAt"].isoformat(),
+        "result": j.get("result"),
+        "error": j.get("error"),
+    }
+
+@router.post("/video", response_model=JobOut, status_code=202)
+async def submit_video_job(
+    current=Depends(get_current_owner),
+    video: UploadFile = File(...),
+    name: str | None = Form(None),
+    stride: int = Form(settings.VIDEO_JOB_STRIDE),
+    startedAt: str | None = Form(None),  # recording start, ISO (UTC); default: now
+    vehicleId: str | None = Form(None),
+):
+    """
+    Upload a recorded trip; it is analyzed in the background into a new session.
+    Poll GET /api/jobs/{id} for the result. Capped at MAX_VIDEO_BYTES (413);
+    429 while VIDEO_JOB_CONCURRENCY jobs are already running.
+    """
+    if mongodb.db is None:
+        raise HTTPException(500, "DB not initialized")
+    if video.size is not None and video.size > settings.MAX_VIDEO_BYTES:
+        raise HTTPException(413, f"Video larger than {settings.MAX_VIDEO_BYTES} bytes")
+    if stride < 1:
+        raise HTTPException(400, "stride must be >= 1")
+    try:
+        started = datetime.fromisoformat(startedAt) if startedAt else None
+    except ValueError:
+        raise HTTPException(400, "startedAt must be ISO 8601")
+    vehicle_id = await owned_vehicle_id(vehicleId, current)
+    if not job_slots.try_acquire():
+        raise HTTPException(429, "Video jobs busy, retry later", headers={"Retry-After": "30"})
+    try:
+        job, path = await _store_upload(video, current)
+    except BaseException:
+        job_slots.release()
+        raise
+
+    async def run():
+        try:
+            await run_video_job(path, current["_id"], name or video.filename or "Recorded trip",
+                                stride=stride, started_at=started, job_id=job["_id"],
+                                vehicle_id=vehicle_id)
+        except Exception:
+            # usually recorded on the job document too; not if it failed before that
+            log.exception("video job %s failed", job["_id"])
+        finally:
+            job_slots.release()
+            try:
+                os.remove(path)
+            except OSError:
+                log.warning("could not remove job upload %s", path)
+
+    task = asyncio.create_task(run())
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return job_out(job)
+
+async def _store_upload(video: UploadFile, current: dict) -> tuple[dict, str]:
+    """
+    Upload → file under VIDEO_JOB_DIR + a queued job document.
+    """
+    # Kept out of UPLOAD_DIR: that one is served publicly under /static
+    full_dir = os.path.join(settings.VIDEO_JOB_DIR, str(current["_id"]))
+    ensure_dir(full_dir)
+    ext = os.path.splitext(video.filename or "")[1].lower() or ".mp4"
+    path = os.path.join(full_dir, f"{uuid4().hex}{ext}")
+
+    def copy():
+        size = 0
+        with open(path, "wb") as out:
+            while chunk := video.file.read(CHUNK):
+                size += len(chunk)
+                if size > settings.MAX_VIDEO_BYTES:
+                    break
+                out.write(chunk)
+        if size > settings.MAX_VIDEO_BYTES:
+            os.remove(path)
+            raise HTTPException(413, f"Video larger than {settings.MAX_VIDEO_BYTES} bytes")
+    await run_in_threadpool(copy)
+
+    job = {
+        "ownerId": current["_id"],
+        "kind": "video",
+        "status": "queued",
+        "file": video.filename,
+        "createdAt": datetime.utcnow(),
+    }
+    try:
+        res = await mongodb.db.jobs.insert_one(job)
+    except BaseException:
+        os.remove(path)
+        raise
+    job["_id"] = res.inserted_id
+    return job, path
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job(job_id: str, current=Depends(get_current_owner)):
+    if mongodb.db is None:
+        raise HTTPException(500, "DB not initialized")
+
+    j = await mongodb.db.jobs.find_one({"_id": ObjectId(job_id), "ownerId": current["_id"]})
+    if not j:
+        raise HTTPException(404, "Job not found")
+    return job_out(j)
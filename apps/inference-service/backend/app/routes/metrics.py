@@ -0,0 +1,89 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services import metrics
+from app.services.metrics import CallbackMetric
+from app.services.inference.executor import inference_executor
+from app.services.inference.motion_gate import gate_stats
+from app.services.event_sink import event_sink
+from app.core.cache import auth_cache
+from app.core.security import hash_executor
+from app.services.worker_pool import worker_pool
+from app.services.inference.registry import models
+from app.services.load_control import load_controller
+from app.routes import sessions_ws
+
+router = APIRouter(tags=["Metrics"])
+
+# Read at scrape time from the components' own counters (nothing extra on the hot path)
+CallbackMetric("dms_active_sessions", "Authenticated DMS WebSocket sessions",
+               lambda: sessions_ws.active_sessions)
+CallbackMetric("dms_session_states", "Per-session debounce states held in memory",
+               lambda: len(sessions_ws.session_states))
+CallbackMetric("dms_inference_in_flight", "Inference executor jobs queued or running",
+               lambda: inference_executor.stats()["in_flight"])
+CallbackMetric("dms_inference_jobs_total", "Inference executor jobs by outcome",
+               lambda: {k: inference_executor.stats()[k] for k in ("completed", "failed", "rejected")},
+               labels=("outcome",), kind="counter")
+CallbackMetric("dms_batch_pending", "Frames waiting for the next detector batch",
+               lambda: sessions_ws.batcher.stats()["pending"])
+CallbackMetric("dms_batches_total", "Detector batches run", lambda: sessions_ws.batcher.batches,
+               kind="counter")
+CallbackMetric("dms_event_sink_pending", "Events queued for the next DB flush",
+               lambda: event_sink.stats()["pending"])
+CallbackMetric("dms_events_total", "Events by sink outcome",
+               lambda: {k: event_sink.stats()[k] for k in ("written", "dropped")},
+               labels=("outcome",), kind="counter")
+CallbackMetric("dms_motion_gate_frames_total", "Frames checked / skipped by the motion gate",
+               lambda: dict(gate_stats), labels=("result",), kind="counter")
+
+CallbackMetric("auth_cache_lookups_total", "Auth cache lookups by cache and result",
+               lambda: {(name, r): c.stats()[r]
+                        for name, c in (("claims", auth_cache.claims_cache), ("owners", auth_cache.owners))
+                        for r in ("hits", "misses")},
+               labels=("cache", "result"), kind="counter")
+
+CallbackMetric("password_hash_in_flight", "Password hash / verify jobs queued or running",
+               lambda: hash_executor.stats()["in_flight"])
+CallbackMetric("password_hash_jobs_total", "Password hash / verify jobs by outcome",
+               lambda: {k: hash_executor.stats()[k] for k in ("completed", "failed", "rejected")},
+               labels=("outcome",), kind="counter")
+CallbackMetric("password_hash_wait_seconds_avg", "Average time a hash job waited for a worker",
+               lambda: hash_executor.stats()["avg_wait_ms"] / 1000.0)
+
+CallbackMetric("dms_worker_processes", "Inference worker processes in the hash ring",
+               lambda: len(worker_pool.ring.members()))
+CallbackMetric("dms_worker_in_flight", "Frames / control messages awaiting a worker's answer",
+               lambda: worker_pool.in_flight())
+CallbackMetric("dms_worker_events_total", "Worker pool session migrations, lost workers and rejected frames",
+               lambda: {"migration": worker_pool.migrations, "lost_worker": worker_pool.lost_workers,
+                        "rejected": worker_pool.rejected},
+               labels=("event",), kind="counter")
+
+CallbackMetric("dms_quality_tier", "Current load tier (0 = full quality)", lambda: load_controller.level)
+CallbackMetric("dms_quality_tier_changes_total", "Load tier steps by direction",
+               lambda: {"down": load_controller.steps_down, "up": load_controller.steps_up},
+               labels=("direction",), kind="counter")
+CallbackMetric("dms_frame_latency_seconds_avg", "Smoothed per-frame latency, admission to result",
+               lambda: (load_controller.latency_ms or 0.0) / 1000.0)
+
+CallbackMetric("dms_model_version", "Hot reloads of the primary detector (1 = as started)",
+               lambda: models.active.get("version", 0))
+# shadow (A/B) model, in-process inference only; absent without one
+CallbackMetric("dms_shadow_frames_total", "Frames sampled for the shadow model by outcome",
+               lambda: {"compared": s["frames"], "skipped": s["skipped"], "failed": s["failed"]}
+               if (s := _shadow()) else {},
+               labels=("outcome",), kind="counter")
+CallbackMetric("dms_shadow_agreement_ratio", "Share of shadow frames where the candidate agrees with the primary",
+               lambda: s["agreement"] if (s := _shadow()) else {}, labels=("signal",))
+
+
+def _shadow() -> dict | None:
+    return models.shadow.stats() if models.shadow is not None else None
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus text exposition (format 0.0.4).
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
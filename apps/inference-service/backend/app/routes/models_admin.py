@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.core.deps import require_admin
+from app.schemas.model_admin import ModelSpec, ShadowSpec
+from app.services import model_admin
+from app.services.model_admin import ModelLoadError
+
+router = APIRouter(prefix="/api/admin/models", tags=["Model admin"], dependencies=[Depends(require_admin)])
+
+@router.get("")
+async def model_status():
+    """
+    Active model (version, weights), shadow model and its agreement stats;
+    per worker process with INFERENCE_PROCESSES > 0.
+    """
+    return await model_admin.status()
+
+@router.post("/reload")
+async def reload_model(spec: ModelSpec):
+    """
+    Load new weights in the background and swap them in between frames.
+    Live sessions keep streaming; on a load error the current model stays.
+    """
+    try:
+        return await model_admin.reload(spec.backend, spec.weights)
+    except ModelLoadError as exc:
+        raise HTTPException(400, f"Model failed to load: {exc}")
+
+@router.put("/shadow")
+async def start_shadow(spec: ShadowSpec):
+    """
+    Run a candidate model on `rate` of the frames, next to the primary.
+    Its outputs only feed agreement stats, never alerts.
+    """
+    try:
+        return await model_admin.set_shadow(spec.backend, spec.weights, spec.rate)
+    except ModelLoadError as exc:
+        raise HTTPException(400, f"Model failed to load: {exc}")
+
+@router.delete("/shadow")
+async def stop_shadow():
+    """
+    Detach the shadow model; returns its final stats.
+    """
+    return await model_admin.clear_shadow()
+
+@router.post("/shadow/promote")
+async def promote_shadow():
+    """
+    Make the (already warm) shadow model the primary.
+    """
+    try:
+        return await model_admin.promote_shadow()
+    except (LookupError, ModelLoadError) as exc:
+        raise HTTPException(409, str(exc))
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 import app.db.mongodb as mongodb  # <-- use module
 from app.core.deps import get_current_owner
+from app.core.cache import auth_cache
 from app.schemas.user import OwnerOut, OwnerUpdateIn
 
 router = APIRouter(prefix="/api/owners", tags=["Owners"])
@@ -32,6 +33,7 @@ async def update_me(payload: OwnerUpdateIn, current=Depends(get_current_owner)):
         raise HTTPException(400, "Nothing to update")
 
     await mongodb.db.users.update_one({"_id": current["_id"]}, {"$set": update})
+    await auth_cache.invalidate(str(current["_id"]))
     user = await mongodb.db.users.find_one({"_id": current["_id"]})
     return {
         "id": str(user["_id"]),
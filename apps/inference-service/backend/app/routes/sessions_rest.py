@@ -1,27 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
 import app.db.mongodb as mongodb
 from app.core.deps import get_current_owner
 from app.schemas.session import SessionCreate, SessionOut
 from app.models.session_model import session_doc
+from app.utils.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from app.utils.streaming import json_array
+from app.services import event_store
 from datetime import datetime
 
 router = APIRouter(prefix="/api/sessions", tags=["DMS Sessions"])
+SESSION_LIST_FIELDS = {"name": 1, "vehicleId": 1, "startedAt": 1, "endedAt": 1, "metrics": 1}
+
+def session_out(s: dict) -> dict:
+    return {
+        "id": str(s["_id"]),
+        "name": s["name"],
+        "vehicleId": str(s["vehicleId"]) if s.get("vehicleId") else None,
+        "startedAt": s["startedAt"].isoformat(),
+        "endedAt": s["endedAt"].isoformat() if s.get("endedAt") else None,
+        "metrics": s["metrics"],
+    }
+
+async def owned_vehicle_id(vehicle_id: str | None, current: dict) -> ObjectId | None:
+    """
+    ObjectId of one of the owner's vehicles (404 if it isn't theirs), or None.
+    """
+    if not vehicle_id:
+        return None
+    v = await mongodb.db.vehicles.find_one({"_id": ObjectId(vehicle_id), "ownerId": current["_id"]}, {"_id": 1})
+    if not v:
+        raise HTTPException(404, "Vehicle not found")
+    return v["_id"]
 
 @router.post("", response_model=SessionOut)
 async def start_session(payload: SessionCreate, current=Depends(get_current_owner)):
     """
     Start a new DMS session. Returns the session id for WS.
     """
-    doc = session_doc(current["_id"], payload.name)
-    res = await mongodb.db.sessions.insert_one(doc)
-    return {
-        "id": str(res.inserted_id),
-        "name": doc["name"],
-        "startedAt": doc["startedAt"].isoformat(),
-        "endedAt": None,
-        "metrics": doc["metrics"],
-    }
+    doc = session_doc(current["_id"], payload.name, await owned_vehicle_id(payload.vehicleId, current))
+    await mongodb.db.sessions.insert_one(doc)  # sets doc["_id"]
+    return session_out(doc)
 
 @router.post("/{sid}/end", response_model=SessionOut)
 async def end_session(sid: str, current=Depends(get_current_owner)):
@@ -34,30 +54,32 @@ async def end_session(sid: str, current=Depends(get_current_owner)):
         raise HTTPException(404, "Session not found")
     await mongodb.db.sessions.update_one(q, {"$set": {"endedAt": datetime.utcnow()}})
     s = await mongodb.db.sessions.find_one(q)
-    return {
-        "id": str(s["_id"]),
-        "name": s["name"],
-        "startedAt": s["startedAt"].isoformat(),
-        "endedAt": s["endedAt"].isoformat() if s.get("endedAt") else None,
-        "metrics": s["metrics"],
-    }
+    return session_out(s)
 
 @router.get("", response_model=list[SessionOut])
-async def list_sessions(current=Depends(get_current_owner)):
-    """
-    List sessions for the logged-in owner.
-    """
-    cur = mongodb.db.sessions.find({"ownerId": current["_id"]}).sort("startedAt", -1)
-    out = []
-    async for s in cur:
-        out.append({
-            "id": str(s["_id"]),
-            "name": s["name"],
-            "startedAt": s["startedAt"].isoformat(),
-            "endedAt": s["endedAt"].isoformat() if s.get("endedAt") else None,
-            "metrics": s["metrics"],
-        })
-    return out
+async def list_sessions(
+    response: Response,
+    current=Depends(get_current_owner),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+):
+    """
+    List sessions for the logged-in owner, newest first, one page at a time.
+    Keyset on (startedAt, _id); the next page's cursor is in the X-Next-Cursor header.
+    """
+    q = {"ownerId": current["_id"]}
+    if cursor:
+        started, last_id = decode_cursor(cursor, datetime, ObjectId)
+        q["$or"] = [{"startedAt": {"$lt": started}},
+                    {"startedAt": started, "_id": {"$lt": last_id}}]
+    cur = (mongodb.db.sessions.find(q, SESSION_LIST_FIELDS)
+           .sort([("startedAt", -1), ("_id", -1)])
+           .limit(limit + 1))  # one extra tells whether there is a next page
+    docs = await cur.to_list(length=limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1]["startedAt"], docs[-1]["_id"])
+    return [session_out(s) for s in docs]
 
 @router.get("/{sid}", response_model=SessionOut)
 async def get_session(sid: str, current=Depends(get_current_owner)):
@@ -67,10 +89,52 @@ async def get_session(sid: str, current=Depends(get_current_owner)):
     s = await mongodb.db.sessions.find_one({"_id": ObjectId(sid), "ownerId": current["_id"]})
     if not s:
         raise HTTPException(404, "Session not found")
-    return {
-        "id": str(s["_id"]),
-        "name": s["name"],
-        "startedAt": s["startedAt"].isoformat(),
-        "endedAt": s["endedAt"].isoformat() if s.get("endedAt") else None,
-        "metrics": s["metrics"],
-    }
+    return session_out(s)
+
+async def _owned_session_id(sid: str, current: dict) -> ObjectId:
+    """
+    Id of one of the owner's sessions (404 otherwise).
+    """
+    s = await mongodb.db.sessions.find_one({"_id": ObjectId(sid), "ownerId": current["_id"]}, {"_id": 1})
+    if not s:
+        raise HTTPException(404, "Session not found")
+    return s["_id"]
+
+async def _event_rows(events):
+    async for e in events:
+        yield {"type": e["type"], "confidence": e["confidence"], "createdAt": e["createdAt"]}
+
+@router.get("/{sid}/events")
+async def session_events(
+    sid: str,
+    current=Depends(get_current_owner),
+    start: datetime | None = Query(None, alias="from", description="ISO 8601 (UTC), inclusive"),
+    end: datetime | None = Query(None, alias="to", description="ISO 8601 (UTC), exclusive"),
+    types: list[str] | None = Query(None, alias="type", description="repeat to filter by several types"),
+):
+    """
+    Event timeline of a session, oldest first, streamed as a JSON array:
+    [{"type": "phone", "confidence": 0.83, "createdAt": "..."}, ...]
+    """
+    session_id = await _owned_session_id(sid, current)
+    events = event_store.find(mongodb.db, [session_id], start, end, types)
+    return StreamingResponse(json_array(_event_rows(events)), media_type="application/json")
+
+@router.get("/{sid}/timeline")
+async def session_timeline(
+    sid: str,
+    current=Depends(get_current_owner),
+    bucket: int = Query(60, ge=1, le=86400, description="bucket width in seconds"),
+    start: datetime | None = Query(None, alias="from", description="ISO 8601 (UTC), inclusive"),
+    end: datetime | None = Query(None, alias="to", description="ISO 8601 (UTC), exclusive"),
+    types: list[str] | None = Query(None, alias="type", description="repeat to filter by several types"),
+):
+    """
+    Events per `bucket` seconds and type, folded while the event buckets are
+    unpacked (services/event_store.py), streamed as a JSON array:
+    [{"start": "...", "total": 4, "types": {"phone": {"count": 3, "maxConfidence": 0.91}, ...}}, ...]
+    Empty buckets are omitted.
+    """
+    session_id = await _owned_session_id(sid, current)
+    rows = event_store.timeline(mongodb.db, session_id, bucket, start, end, types)
+    return StreamingResponse(json_array(rows), media_type="application/json")
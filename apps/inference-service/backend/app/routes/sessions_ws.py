@@ -1,36 +1,116 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 from jose import JWTError
 from bson import ObjectId
-import base64, numpy as np, cv2, time
+import asyncio, base64, json, logging, numpy as np, time
 import app.db.mongodb as mongodb
-from app.core.security import decode_token
+from app.core.cache import auth_cache, TTLCache
 from app.services.inference.pipeline import DmsPipeline
+from app.services.inference.preprocess import decode
+from app.services.inference.executor import inference_executor, InferenceBusy
+from app.services.inference.batching import BatchScheduler
+from app.services.session_state import SessionStateRegistry
+from app.services.admission import FrameAdmission
+from app.services.event_sink import event_sink
+from app.services.worker_pool import worker_pool, WorkerGone
+from app.services.load_control import load_controller, Tier
+from app.services.frame_protocol import BinaryFrame, parse_frame, frame_to_bgr
+from app.services import stage_timer
+from app.services.metrics import alerts_total
+from app.core.config import settings
 
 router = APIRouter(tags=["DMS WebSocket"])
-pipeline = DmsPipeline()  # load once
+log = logging.getLogger(__name__)
+# load once; with INFERENCE_PROCESSES the models live in the worker processes instead
+pipeline = DmsPipeline(load_models=not worker_pool.enabled)
+# debouncer state per session id; model above is shared
+session_states = SessionStateRegistry(pipeline.new_state, settings.SESSION_STATE_MAX, settings.SESSION_STATE_IDLE_SECS)
+# frames from all sessions share batched predict calls
+batcher = BatchScheduler(lambda: pipeline.det, inference_executor, settings.BATCH_MAX_SIZE, settings.BATCH_MAX_WAIT_MS)
+active_sessions = 0  # authenticated sockets currently streaming (GET /metrics)
+# (session_id, owner_id) → {_id, vehicleId} already checked; neither ever changes
+owned_sessions = TTLCache(settings.OWNER_CACHE_MAX, settings.OWNER_CACHE_SHARED_TTL_SECS)
 
-def b64webp_to_bgr(data_b64: str) -> np.ndarray:
+def b64webp_to_bgr(data_b64: str, target: int = 0) -> np.ndarray:
     """
     Decode base64-encoded WebP bytes into a BGR numpy image.
+    With `target` (model input size), large sources decode at reduced resolution.
     """
     raw = base64.b64decode(data_b64)
     arr = np.frombuffer(raw, dtype=np.uint8)
-    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)  # BGR
+    img = decode(arr, target)  # BGR
     return img
 
+def decode_frame(frame, target: int = 0) -> np.ndarray | None:
+    """
+    Binary frames (BinaryFrame) or legacy JSON base64 strings → BGR,
+    no bigger than the detector input (`target`, default its imgsz) needs.
+    """
+    return frame_to_bgr(frame, target or pipeline.det.imgsz)
+
+def decode_and_sign(frame, target: int = 0) -> tuple[np.ndarray | None, np.ndarray | None]:
+    """
+    Executor job: decoded frame + its motion-gate signature.
+    """
+    t0 = stage_timer.clock()
+    bgr = decode_frame(frame, target)
+    stage_timer.record("decode", t0)
+    if bgr is None:
+        return None, None
+    return bgr, pipeline.signature(bgr)
+
+async def run_local(session_id: str, frame, tier: Tier) -> dict:
+    """
+    In-process path: decode (executor) + batched detection across sessions,
+    unless the scene hasn't changed since the last inferred frame; sized and
+    staged by the load tier. Same result shape as worker_pool.process().
+    Raises InferenceBusy.
+    """
+    state = session_states.get(session_id)
+    bgr, sig = await inference_executor.submit(decode_and_sign, frame, tier.imgsz)
+    if bgr is None:
+        return {"events": [], "processed": False}
+    y = state.gate.reuse(sig, time.time())
+    if y is None:
+        y = await batcher.submit(bgr, tier.imgsz)
+        state.gate.store(sig, y, time.time())
+    face = None
+    if tier.optional and pipeline.face_due(state):
+        try:
+            face = await inference_executor.submit(pipeline.face.analyze, bgr)
+        except InferenceBusy:
+            pass  # skip the optional stage this time
+    events = pipeline.evaluate(y, time.time(), state, face)
+    return {"events": events, "processed": True, "reused": state.gate.skipped}
+
 @router.websocket("/ws/sessions/{session_id}")
 async def ws_session(websocket: WebSocket, session_id: str, token: str):
     """
     WebSocket pipeline:
       - Client connects: ws://host/ws/sessions/{session_id}?token=JWT
-      - Sends: {"frame": "<base64-webp>", "ts": <unix>}
+      - Sends binary frames (see services/frame_protocol.py: header + raw WebP/JPEG)
+        or, for old clients, JSON: {"frame": "<base64-webp>", "ts": <unix>}
       - Receives alerts: {"alert": {"type":"phone","confidence":0.83,"ts":<unix>}}
+        (binary frames also get "seq" of the frame that confirmed the alert)
+      - Receives ~1/s: {"stats": {"received": n, "dropped": n, "processed": n, "reused": n}}
+        ("reused" = processed frames that reused the last detector output, scene unchanged)
+      - Frames beyond MAX_FPS are dropped server-side (newest frame wins); so is a
+        frame that fails to decode or infer (the socket stays open).
+      - Receives {"quality": {"tier": n, "tiers": n, "imgsz": px, "maxFps": f,
+        "optionalStages": bool}} first and whenever server load changes the tier
+        (services/load_control.py); clients may match upload size / rate to it.
+      - With INFERENCE_PROCESSES > 0 frames run on the session's worker process
+        (services/worker_pool.py); the protocol is the same. Until the first
+        worker is warm the socket is closed with 1013 (try again later).
     """
     await websocket.accept()
+    if worker_pool.enabled and not worker_pool.serving:
+        # worker processes still warming up (GET /readyz is 503 meanwhile)
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
 
     # ---- 1) Auth via JWT ----
     try:
-        payload = decode_token(token)
+        payload = auth_cache.claims(token)
         owner_id = payload.get("sub")
         if not owner_id:
             raise ValueError
@@ -43,44 +123,102 @@ async def ws_session(websocket: WebSocket, session_id: str, token: str):
         await websocket.close()
         return
 
-    sess = await mongodb.db.sessions.find_one({
-        "_id": ObjectId(session_id),
-        "ownerId": ObjectId(owner_id)
-    })
-    if not sess:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
+    sess_oid, owner_oid = ObjectId(session_id), ObjectId(owner_id)
+    sess = owned_sessions.get((session_id, owner_id))
+    if sess is None:
+        sess = await mongodb.db.sessions.find_one({
+            "_id": sess_oid,
+            "ownerId": owner_oid
+        }, {"_id": 1, "vehicleId": 1})
+        if not sess:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        owned_sessions.set((session_id, owner_id), sess)
 
-    # ---- 3) Main loop: receive frames, run pipeline, send alerts ----
+    # ---- 3) Reader task: newest frame wins, paced to MAX_FPS ----
+    global active_sessions
+    admission = FrameAdmission(settings.MAX_FPS)
+    reader = asyncio.create_task(_read_frames(websocket, admission))
+    active_sessions += 1
+
+    # ---- 4) Main loop: take frames, run pipeline, send alerts ----
+    last_stats = 0.0
+    level = None  # load tier last announced to this client
     try:
         while True:
-            msg = await websocket.receive_json()
-            if "frame" not in msg:
-                continue
+            frame = await admission.take()
+            if frame is None:
+                break  # client gone
 
-            # Decode ROI frame
-            bgr = b64webp_to_bgr(msg["frame"])
-            if bgr is None:
-                continue
+            tier = load_controller.tier
+            if tier.level != level:
+                level = tier.level
+                admission.set_fps(tier.max_fps)
+                await websocket.send_json({"quality": tier.message(len(load_controller.tiers))})
 
-            events = pipeline.process(bgr)
+            started = time.perf_counter()
+            try:
+                if worker_pool.enabled:
+                    out = await worker_pool.process(session_id, frame, tier.imgsz, tier.optional)
+                else:
+                    out = await run_local(session_id, frame, tier)
+            except (InferenceBusy, WorkerGone):
+                admission.drop()
+                continue  # overloaded (or worker restarting): drop this frame, the client keeps streaming
+            except Exception:
+                # bad payload (e.g. invalid base64) or a model / worker error: this frame only
+                log.exception("session %s: frame failed", session_id)
+                admission.drop()
+                continue
+            if not out["processed"]:
+                continue  # undecodable frame
+            load_controller.observe(time.perf_counter() - started)
+            admission.mark_processed()
+            reused = out["reused"]
             now = time.time()
+            extra = {"seq": frame.seq} if isinstance(frame, BinaryFrame) else {}
+
+            for e in out["events"]:
+                # Push alert to client first, then queue it for the DB
+                await websocket.send_json({"alert": {**e, "ts": now, **extra}})
+                alerts_total.labels(e["type"]).inc()
+                event_sink.put(sess_oid, e["type"], e["confidence"], owner_oid, sess.get("vehicleId"))
 
-            for e in events:
-                # Persist event
-                await mongodb.db.events.insert_one({
-                    "sessionId": ObjectId(session_id),
-                    "type": e["type"],
-                    "confidence": float(e["confidence"]),
-                    "createdAt": None  # can set datetime.utcnow() in DB if preferred
-                })
-                # Increment session counters
-                await mongodb.db.sessions.update_one(
-                    {"_id": ObjectId(session_id)},
-                    {"$inc": {f"metrics.{e['type']}": 1}}
-                )
-                # Push alert to client
-                await websocket.send_json({"alert": {**e, "ts": now}})
+            # Frame accounting, at most once per second
+            if now - last_stats >= 1.0:
+                last_stats = now
+                await websocket.send_json({"stats": {**admission.counts(), "reused": reused}})
     except WebSocketDisconnect:
         # Client disconnected gracefully
         pass
+    finally:
+        active_sessions -= 1
+        reader.cancel()
+        await event_sink.flush()  # this session's alerts are stored before we return
+
+async def _read_frames(websocket: WebSocket, admission: FrameAdmission):
+    """
+    Drain the socket as fast as the client sends; only the newest frame is kept.
+    Binary messages use the frame protocol; text messages are legacy JSON.
+    """
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(msg.get("code", 1000))
+            if msg.get("bytes") is not None:
+                try:
+                    admission.offer(parse_frame(msg["bytes"]))
+                except ValueError:
+                    continue  # malformed binary frame: ignore it
+            elif msg.get("text") is not None:
+                try:
+                    data = json.loads(msg["text"])
+                except ValueError:
+                    continue  # malformed JSON: ignore it
+                if isinstance(data, dict) and "frame" in data:
+                    admission.offer(data["frame"])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        admission.close()
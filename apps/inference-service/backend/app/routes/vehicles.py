@@ -1,13 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response
 from typing import Optional
+import asyncio, os
 from bson import ObjectId
 import app.db.mongodb as mongodb  # <-- use module
 from app.core.deps import get_current_owner
 from app.schemas.vehicle import VehicleOut
 from app.models.vehicle_model import vehicle_doc
-from app.utils.images import save_image
+from app.utils.images import save_image, static_path
+from app.services.image_variants import schedule_vehicle_variants
+from app.utils.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
 
 router = APIRouter(prefix="/api/vehicles", tags=["Vehicles"])
+VEHICLE_LIST_FIELDS = {"createdAt": 0, "updatedAt": 0}
+
+async def save_sides(files: dict[str, UploadFile | None], subdir: str) -> dict[str, str]:
+    """
+    Save the uploaded side images concurrently → {side: url}.
+    If any is rejected, the others are removed and the first error is raised.
+    """
+    sides = [side for side, f in files.items() if f]
+    results = await asyncio.gather(*(save_image(files[side], subdir=subdir) for side in sides),
+                                   return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        for r in results:
+            if isinstance(r, str):
+                os.remove(static_path(r))
+        raise errors[0]
+    return dict(zip(sides, results))
 
 @router.post("", response_model=VehicleOut, status_code=201)
 async def create_vehicle(
@@ -29,13 +49,9 @@ async def create_vehicle(
         raise HTTPException(400, "Vehicle with this plate already exists")
 
     v_id = ObjectId()
-    images = {}
     subdir = f"vehicles/{str(current['_id'])}/{str(v_id)}"
-    if image_front: images["front"] = await save_image(image_front, subdir=subdir)
-    if image_back:  images["back"]  = await save_image(image_back,  subdir=subdir)
-    if image_right: images["right"] = await save_image(image_right, subdir=subdir)
-    if image_left:  images["left"]  = await save_image(image_left,  subdir=subdir)
-    if image_plate: images["plate"] = await save_image(image_plate, subdir=subdir)
+    images = await save_sides({"front": image_front, "back": image_back, "right": image_right,
+                               "left": image_left, "plate": image_plate}, subdir)
 
     doc = vehicle_doc(
         ownerId=current["_id"],
@@ -47,6 +63,7 @@ async def create_vehicle(
     )
     doc["_id"] = v_id
     await mongodb.db.vehicles.insert_one(doc)
+    schedule_vehicle_variants(v_id, images)  # thumbnails / WebP in the background
 
     return {
         "id": str(doc["_id"]),
@@ -56,16 +73,35 @@ async def create_vehicle(
         "registrationDate": doc["registrationDate"],
         "plateNo": doc["plateNo"],
         "images": doc["images"],
+        "imageVariants": doc.get("imageVariants", {}),
     }
 
 @router.get("/mine", response_model=list[VehicleOut])
-async def list_my_vehicles(current=Depends(get_current_owner)):
+async def list_my_vehicles(
+    response: Response,
+    current=Depends(get_current_owner),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+):
+    """
+    The owner's vehicles in creation order, one page at a time (keyset on _id).
+    The next page's cursor is in the X-Next-Cursor header.
+    """
     if mongodb.db is None:
         raise HTTPException(500, "DB not initialized")
 
-    cursor = mongodb.db.vehicles.find({"ownerId": current["_id"]})
+    q = {"ownerId": current["_id"]}
+    if cursor:
+        (last_id,) = decode_cursor(cursor, ObjectId)
+        q["_id"] = {"$gt": last_id}
+    cur = mongodb.db.vehicles.find(q, VEHICLE_LIST_FIELDS).sort("_id", 1).limit(limit + 1)
+    docs = await cur.to_list(length=limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1]["_id"])
+
     out = []
-    async for v in cursor:
+    for v in docs:
         out.append({
             "id": str(v["_id"]),
             "ownerId": str(v["ownerId"]),
@@ -74,6 +110,7 @@ async def list_my_vehicles(current=Depends(get_current_owner)):
             "registrationDate": v["registrationDate"],
             "plateNo": v["plateNo"],
             "images": v.get("images", {}),
+            "imageVariants": v.get("imageVariants", {}),
         })
     return out
 
@@ -93,6 +130,7 @@ async def get_vehicle(vehicle_id: str, current=Depends(get_current_owner)):
         "registrationDate": v["registrationDate"],
         "plateNo": v["plateNo"],
         "images": v.get("images", {}),
+        "imageVariants": v.get("imageVariants", {}),
     }
 
 @router.put("/{vehicle_id}", response_model=VehicleOut)
@@ -126,15 +164,16 @@ async def update_vehicle(
             raise HTTPException(400, "Another vehicle already has this plate number")
         update["plateNo"] = plateNo.upper()
 
-    images = v.get("images", {})
+    images = dict(v.get("images", {}))
     subdir = f"vehicles/{str(current['_id'])}/{vehicle_id}"
-    if image_front: images["front"] = await save_image(image_front, subdir=subdir)
-    if image_back:  images["back"]  = await save_image(image_back,  subdir=subdir)
-    if image_right: images["right"] = await save_image(image_right, subdir=subdir)
-    if image_left:  images["left"]  = await save_image(image_left,  subdir=subdir)
-    if image_plate: images["plate"] = await save_image(image_plate, subdir=subdir)
-    if images != v.get("images", {}):
+    uploaded = await save_sides({"front": image_front, "back": image_back, "right": image_right,
+                                 "left": image_left, "plate": image_plate}, subdir)
+    images.update(uploaded)
+    unset = {}
+    if uploaded:
         update["images"] = images
+        # variants of the replaced originals are stale until the new ones are made
+        unset = {f"imageVariants.{side}": "" for side in uploaded}
 
     if not update:
         return {
@@ -145,9 +184,14 @@ async def update_vehicle(
             "registrationDate": v["registrationDate"],
             "plateNo": v["plateNo"],
             "images": v.get("images", {}),
+            "imageVariants": v.get("imageVariants", {}),
         }
 
-    await mongodb.db.vehicles.update_one({"_id": v["_id"]}, {"$set": update})
+    ops = {"$set": update}
+    if unset:
+        ops["$unset"] = unset
+    await mongodb.db.vehicles.update_one({"_id": v["_id"]}, ops)
+    schedule_vehicle_variants(v["_id"], uploaded)
     nv = await mongodb.db.vehicles.find_one({"_id": v["_id"]})
     return {
         "id": str(nv["_id"]),
@@ -157,6 +201,7 @@ async def update_vehicle(
         "registrationDate": nv["registrationDate"],
         "plateNo": str(nv["plateNo"]),
         "images": nv.get("images", {}),
+        "imageVariants": nv.get("imageVariants", {}),
     }
 
 @router.delete("/{vehicle_id}", status_code=204)
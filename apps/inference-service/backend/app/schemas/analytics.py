@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Dict
+
+class RollupPoint(BaseModel):
+    bucket: str              # bucket start, ISO (UTC)
+    counts: Dict[str, int]   # event type → count
+    total: int
+
+class VehicleRisk(BaseModel):
+    vehicleId: str
+    counts: Dict[str, int]
+    total: int
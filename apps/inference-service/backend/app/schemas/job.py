@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Optional, Any, Dict
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str                     # "queued" | "running" | "done" | "failed"
+    createdAt: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from app.core.config import settings
+
+class ModelSpec(BaseModel):
+    backend: Optional[str] = None   # "ultralytics" | "onnx" | "stub"; default DETECTOR_BACKEND
+    weights: Optional[str] = None   # model file on the server; default: the backend's configured file
+
+class ShadowSpec(ModelSpec):
+    rate: float = Field(default=settings.SHADOW_SAMPLE_RATE, gt=0, le=1)  # fraction of frames sampled
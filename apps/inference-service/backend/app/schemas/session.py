@@ -3,10 +3,12 @@ from typing import Optional, Dict
 
 class SessionCreate(BaseModel):
     name: str = Field(min_length=1, max_length=80)
+    vehicleId: Optional[str] = None  # one of the owner's vehicles (per-vehicle analytics)
 
 class SessionOut(BaseModel):
     id: str
     name: str
+    vehicleId: Optional[str] = None
     startedAt: str
     endedAt: Optional[str] = None
     metrics: Dict[str, int]
@@ -15,3 +15,4 @@ class VehicleOut(BaseModel):
     registrationDate: str
     plateNo: str
     images: Dict[str, Optional[str]]
+    imageVariants: Dict[str, Dict[str, str]] = {}  # side → {"thumb", "webp"} once generated
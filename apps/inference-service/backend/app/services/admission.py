@@ -0,0 +1,84 @@
+"""
+Per-session frame admission for the DMS WebSocket.
+- Holds only the newest pending frame: a new frame replaces (drops) the old one.
+- `take()` hands frames to the processing loop no faster than `max_fps`.
+- Alert latency stays bounded by one frame of inference, whatever the client
+  upload rate is; the counters tell the client how much it is over-sending
+  (and feed the process-wide dms_frames_total metric).
+"""
+import asyncio
+from app.services.metrics import frames_total
+
+_received = frames_total.labels("received")
+_dropped = frames_total.labels("dropped")
+_processed = frames_total.labels("processed")
+
+
+class FrameAdmission:
+    def __init__(self, max_fps: float):
+        self.set_fps(max_fps)
+        self._frame = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._next_at = 0.0
+
+        self.received = 0
+        self.dropped = 0    # replaced before processing, or rejected by a busy executor
+        self.processed = 0
+
+    def set_fps(self, max_fps: float):
+        """
+        Change the pace (load tiers); applies from the next take().
+        """
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+
+    def offer(self, frame):
+        """
+        Called by the socket reader for every incoming frame.
+        """
+        self.received += 1
+        _received.inc()
+        if self._frame is not None:
+            self.drop()
+        self._frame = frame
+        self._ready.set()
+
+    def drop(self):
+        """
+        A frame was discarded (replaced, or rejected by a busy executor).
+        """
+        self.dropped += 1
+        _dropped.inc()
+
+    def mark_processed(self):
+        self.processed += 1
+        _processed.inc()
+
+    def close(self):
+        """
+        Reader is done (client gone); wakes a waiting `take()` with None.
+        """
+        self._closed = True
+        self._ready.set()
+
+    async def take(self):
+        """
+        Wait for the pacing interval, then return the newest frame
+        (None once closed and drained).
+        """
+        loop = asyncio.get_running_loop()
+        delay = self._next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self._frame is None and not self._closed:
+            await self._ready.wait()
+        self._ready.clear()
+        frame, self._frame = self._frame, None
+        if frame is None:  # closed
+            return None
+        self._next_at = loop.time() + self.min_interval
+        return frame
+
+    def counts(self) -> dict:
+        return {"received": self.received, "dropped": self.dropped, "processed": self.processed}
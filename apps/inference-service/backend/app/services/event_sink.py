@@ -0,0 +1,145 @@
+"""
+Write-behind sink for confirmed DMS events.
+- The WebSocket pushes the alert first, then `put()`s the event (no await).
+- A background task flushes on size (`max_batch`) or time (`flush_ms`):
+  one bulk_write of bucket appends for the events (services/event_store.py)
+  + one aggregated $inc per session + the analytics rollups (services/rollups.py).
+- A batch whose write fails is retried on the next tick with the same
+  bucket ops; appends that already landed are skipped (event_store.write).
+- `flush()` on disconnect, `stop()` on shutdown drain whatever is queued.
+"""
+import asyncio
+import logging
+from collections import defaultdict, deque
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import app.db.mongodb as mongodb
+from app.core.config import settings
+from app.models.event_model import event_doc
+from app.services import stage_timer, rollups, event_store
+
+log = logging.getLogger(__name__)
+
+
+class EventSink:
+    def __init__(self, max_batch: int, flush_ms: float, max_queue: int):
+        self.max_batch = max(1, max_batch)
+        self.flush_secs = max(1.0, flush_ms) / 1000.0
+        self.max_queue = max(self.max_batch, max_queue)
+
+        self._buf: deque[dict] = deque(maxlen=self.max_queue)  # full: oldest event dropped
+        self._retry: tuple[list[dict], list] | None = None  # (batch, bucket ops) not yet written
+        self._owners: dict[ObjectId, tuple] = {}  # sessionId → (ownerId, vehicleId) for rollups
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()  # one flush at a time
+        self._task: asyncio.Task | None = None
+
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0  # queue overflow (DB down for a long time)
+        self.failed_flushes = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def put(self, session_id: ObjectId, etype: str, conf: float,
+            owner_id: ObjectId | None = None, vehicle_id: ObjectId | None = None):
+        """
+        Queue one confirmed event (createdAt stamped now). Never blocks.
+        With owner_id the event also counts towards the owner's (and vehicle's) rollups.
+        """
+        if owner_id is not None:
+            self._owners[session_id] = (owner_id, vehicle_id)
+        if len(self._buf) == self.max_queue:
+            self.dropped += 1
+        self._buf.append(event_doc(session_id, etype, conf))
+        self.queued += 1
+        if len(self._buf) >= self.max_batch:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_secs)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            while self._retry is not None or self._buf:
+                retry = self._retry is not None
+                if not retry:
+                    # off the queue, but kept until written (even if this flush is cancelled)
+                    batch = [self._buf.popleft() for _ in range(min(self.max_batch, len(self._buf)))]
+                    self._retry = (batch, event_store.append_ops(batch))
+                batch, ops = self._retry
+                t0 = stage_timer.clock()
+                ok = await self._write(batch, ops, retry)
+                stage_timer.record("persist", t0)
+                if not ok:
+                    break  # retry on the next tick
+                self._retry = None
+            if not self._buf and self._retry is None:
+                self._owners.clear()  # all queued events are written
+
+    async def _write(self, batch: list[dict], ops: list, retry: bool) -> bool:
+        if mongodb.db is None:
+            return False
+
+        incs: dict[ObjectId, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for doc in batch:
+            incs[doc["sessionId"]][f"metrics.{doc['type']}"] += 1
+
+        try:
+            await event_store.write(mongodb.db, ops, retry)
+        except BulkWriteError as exc:
+            # some bucket appends rejected (they would be again); the rest are stored
+            log.warning("event flush: %d bucket writes rejected", len(exc.details.get("writeErrors", [])))
+        except Exception:
+            self.failed_flushes += 1
+            log.exception("event flush failed (%d events queued)", len(self._buf) + len(batch))
+            return False
+
+        try:
+            await mongodb.db.sessions.bulk_write(
+                [UpdateOne({"_id": sid}, {"$inc": dict(c)}) for sid, c in incs.items()],
+                ordered=False,
+            )
+        except Exception:
+            # events are stored; only the counters are off, don't re-insert them
+            self.failed_flushes += 1
+            log.exception("session metrics update failed for %d sessions", len(incs))
+
+        try:
+            await rollups.apply(mongodb.db, batch, self._owners)
+        except Exception:
+            self.failed_flushes += 1
+            log.exception("rollup update failed for %d events", len(batch))
+        self.written += len(batch)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._buf) + (len(self._retry[0]) if self._retry else 0),
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+event_sink = EventSink(settings.EVENT_FLUSH_MAX, settings.EVENT_FLUSH_MS, settings.EVENT_QUEUE_MAX)
@@ -0,0 +1,297 @@
+"""
+Bucketed, columnar event storage (collection `event_buckets`).
+- One document per session per EVENT_BUCKET_SECS window, events as parallel
+  arrays instead of one document each:
+    {"sessionId", "start": <window start, UTC>, "n": <events>,
+     "t": [ms since start, ...], "c": [type code, ...], "p": [confidence ‰, ...]}
+  Type codes are fixed (EVENT_TYPES); confidences are stored as integer
+  per-mille. A window holding EVENT_BUCKET_MAX events continues in another
+  document with the same start.
+- append() turns a batch of event docs into one upserted $push per
+  (session, window): the write path stays one bulk_write per flush.
+- Appends are not naturally idempotent, so each upsert carries an op id
+  (bucket field "u", last APPLIED_KEEP kept). write(ops, retry=True) skips
+  the ops of a failed attempt that already landed, so a retry never stores
+  events twice.
+- find() / timeline() are the read side: they unpack buckets back into
+  {"sessionId", "type", "confidence", "createdAt"} in time order (type and
+  time-range filters applied while unpacking).
+- Until `python -m app.cli.migrate_events` has moved the old per-event
+  `events` collection, reads merge it in (EVENT_LEGACY_READS) for sessions
+  not yet marked `eventsMigrated`; migrate_session() does one session.
+  Legacy rows with a null createdAt are timed by their ObjectId (event_time()).
+"""
+from bisect import insort
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.core.config import settings
+
+EVENT_TYPES = ("phone", "seatbelt", "drowsy", "distracted")  # code = index; append only
+TYPE_CODES = {t: i for i, t in enumerate(EVENT_TYPES)}
+EPOCH = datetime(1970, 1, 1)
+APPLIED_KEEP = 8  # op ids remembered per bucket: enough for the retry of a recent write
+
+
+def utc_naive(ts: datetime | None) -> datetime | None:
+    """
+    Stored times are naive UTC (as pymongo returns them); aware ones are converted.
+    """
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def event_time(e: dict) -> datetime:
+    """
+    An event's time as naive UTC; a legacy row stored with a null createdAt
+    falls back to its _id's creation time.
+    """
+    ts = e.get("createdAt")
+    return utc_naive(ts if ts is not None else e["_id"].generation_time)
+
+
+def window_start(ts: datetime, secs: int | None = None) -> datetime:
+    ts = utc_naive(ts)
+    secs = secs or settings.EVENT_BUCKET_SECS
+    offset = (ts - EPOCH) // timedelta(seconds=secs)
+    return EPOCH + timedelta(seconds=offset * secs)
+
+
+def append_ops(events: list[dict], migrated: bool = False) -> list[tuple[ObjectId, UpdateOne]]:
+    """
+    Event docs ({"sessionId", "type", "confidence", "createdAt"}) → (op id, bucket upsert) pairs.
+    migrated=True writes into separate buckets (flag "m") that the migration
+    tool can rebuild without touching live ones.
+    """
+    groups: dict[tuple, list[dict]] = defaultdict(list)
+    for e in events:
+        ts = utc_naive(e["createdAt"])
+        groups[(e["sessionId"], window_start(ts))].append({**e, "createdAt": ts})
+
+    ops = []
+    for (sid, start), evs in groups.items():
+        evs.sort(key=lambda e: e["createdAt"])
+        for i in range(0, len(evs), settings.EVENT_BUCKET_MAX):
+            chunk = evs[i:i + settings.EVENT_BUCKET_MAX]
+            flt = {"sessionId": sid, "start": start, "n": {"$lte": settings.EVENT_BUCKET_MAX - len(chunk)},
+                   "m": True if migrated else {"$exists": False}}
+            op_id = ObjectId()
+            ops.append((op_id, UpdateOne(flt, {
+                "$push": {
+                    "t": {"$each": [(e["createdAt"] - start) // timedelta(milliseconds=1) for e in chunk]},
+                    "c": {"$each": [TYPE_CODES[e["type"]] for e in chunk]},
+                    "p": {"$each": [round(e["confidence"] * 1000) for e in chunk]},
+                    "u": {"$each": [op_id], "$slice": -APPLIED_KEEP},
+                },
+                "$inc": {"n": len(chunk)},
+            }, upsert=True)))
+    return ops
+
+
+async def write(db, ops: list[tuple[ObjectId, UpdateOne]], retry: bool = False) -> int:
+    """
+    Apply append_ops() output; returns the number of upserts sent. retry=True
+    (the same ops again after a failed attempt) first drops the ops that
+    already landed.
+    """
+    if retry and ops:
+        done = set()
+        async for b in db.event_buckets.find({"u": {"$in": [i for i, _ in ops]}}, {"_id": 0, "u": 1}):
+            done.update(b["u"])
+        ops = [(i, op) for i, op in ops if i not in done]
+    if ops:
+        await db.event_buckets.bulk_write([op for _, op in ops], ordered=False)
+    return len(ops)
+
+
+async def append(db, events: list[dict], migrated: bool = False) -> int:
+    """
+    Store a batch of events in one attempt (a caller that retries keeps the
+    append_ops() output and uses write(..., retry=True)).
+    """
+    return await write(db, append_ops(events, migrated))
+
+
+def unpack(bucket: dict, codes: set[int] | None = None,
+           start: datetime | None = None, end: datetime | None = None) -> list[dict]:
+    """
+    One bucket doc → its events, oldest first, filtered by type code / [start, end).
+    """
+    base, sid = bucket["start"], bucket["sessionId"]
+    out = []
+    for t, c, p in zip(bucket["t"], bucket["c"], bucket["p"]):
+        if codes is not None and c not in codes:
+            continue
+        ts = base + timedelta(milliseconds=t)
+        if (start is not None and ts < start) or (end is not None and ts >= end):
+            continue
+        out.append({"sessionId": sid, "type": EVENT_TYPES[c], "confidence": p / 1000.0, "createdAt": ts})
+    out.sort(key=lambda e: e["createdAt"])
+    return out
+
+
+def _bucket_query(session_ids: list[ObjectId], start, end, codes) -> dict:
+    q: dict = {"sessionId": session_ids[0] if len(session_ids) == 1 else {"$in": session_ids}}
+    rng = {}
+    if start is not None:
+        rng["$gte"] = window_start(start)  # the window holding `start` begins before it
+    if end is not None:
+        rng["$lt"] = end
+    if rng:
+        q["start"] = rng
+    if codes is not None:
+        q["c"] = {"$in": sorted(codes)}  # skip buckets without any wanted type
+    return q
+
+
+async def _bucketed(db, session_ids, start, end, codes, batch: int):
+    cur = (db.event_buckets.find(_bucket_query(session_ids, start, end, codes), {"_id": 0, "m": 0, "u": 0})
+           .sort([("sessionId", 1), ("start", 1)])
+           .batch_size(batch))
+    # documents sharing a window (overflow, migrated + live) are merged before yielding
+    group: list[dict] = []
+    key = None
+    async for b in cur:
+        k = (b["sessionId"], b["start"])
+        if k != key and group:
+            yield sorted(group, key=lambda e: e["createdAt"])
+            group = []
+        key = k
+        group += unpack(b, codes, start, end)
+    if group:
+        yield sorted(group, key=lambda e: e["createdAt"])
+
+
+async def _legacy(db, session_ids, start, end, types, batch: int):
+    q: dict = {"sessionId": {"$in": session_ids}}
+    if start or end:
+        # undated rows are ranged by _id (whole seconds) and re-checked below
+        ids = {k: ObjectId.from_datetime(v) for k, v in
+               (("$gte", start), ("$lt", end and end + timedelta(seconds=1))) if v is not None}
+        q["$or"] = [{"createdAt": {k: v for k, v in (("$gte", start), ("$lt", end)) if v is not None}},
+                    {"createdAt": None, "_id": ids}]
+    if types:
+        q["type"] = {"$in": types}
+    cur = (db.events.find(q, {"_id": 1, "sessionId": 1, "type": 1, "confidence": 1, "createdAt": 1})
+           .sort([("sessionId", 1), ("createdAt", 1)])
+           .batch_size(batch))
+    # a session's undated rows sort first: hold them and merge them in by event_time()
+    undated: list[dict] = []
+    async for e in cur:
+        if undated and undated[0]["sessionId"] != e["sessionId"]:
+            while undated:
+                yield undated.pop(0)
+        dated = e.get("createdAt") is not None
+        e = {"sessionId": e["sessionId"], "type": e["type"], "confidence": e["confidence"],
+             "createdAt": event_time(e)}
+        if not dated:
+            if (start is None or e["createdAt"] >= start) and (end is None or e["createdAt"] < end):
+                insort(undated, e, key=lambda u: u["createdAt"])
+            continue
+        while undated and undated[0]["createdAt"] <= e["createdAt"]:
+            yield undated.pop(0)
+        yield e
+    while undated:
+        yield undated.pop(0)
+
+
+async def find(db, session_ids: list[ObjectId], start: datetime | None = None, end: datetime | None = None,
+               types: list[str] | None = None, batch: int = 200):
+    """
+    Async iterator of events of these sessions, per session in time order
+    (sessions in id order), createdAt in [start, end), optionally only `types`.
+    """
+    if not session_ids:
+        return
+    start, end = utc_naive(start), utc_naive(end)
+    codes = {TYPE_CODES[t] for t in types if t in TYPE_CODES} if types else None
+    if codes is not None and not codes:
+        return
+    buckets = _bucketed(db, session_ids, start, end, codes, batch)
+    if not settings.EVENT_LEGACY_READS:
+        async for group in buckets:
+            for e in group:
+                yield e
+        return
+
+    migrated = {s["_id"] async for s in db.sessions.find(
+        {"_id": {"$in": session_ids}, "eventsMigrated": True}, {"_id": 1})}
+    legacy_ids = [i for i in session_ids if i not in migrated]
+    if not legacy_ids:
+        async for group in buckets:
+            for e in group:
+                yield e
+        return
+
+    # merge the two (sessionId, createdAt)-ordered streams
+    def key(e):
+        return e["sessionId"], e["createdAt"]
+
+    legacy = _legacy(db, legacy_ids, start, end, types, batch * 50)
+    old = await anext(legacy, None)
+    async for group in buckets:
+        for e in group:
+            while old is not None and key(old) <= key(e):
+                yield old
+                old = await anext(legacy, None)
+            yield e
+    while old is not None:
+        yield old
+        old = await anext(legacy, None)
+
+
+async def timeline(db, session_id: ObjectId, bucket_secs: int, start: datetime | None = None,
+                   end: datetime | None = None, types: list[str] | None = None):
+    """
+    Events per `bucket_secs` (epoch-aligned) and type, oldest first; empty buckets omitted:
+    {"start", "total", "types": {type: {"count", "maxConfidence"}}}
+    """
+    step = timedelta(seconds=bucket_secs)
+    cur_start, counts = None, {}
+    async for e in find(db, [session_id], start, end, types):
+        s = EPOCH + ((e["createdAt"] - EPOCH) // step) * step
+        if s != cur_start and counts:
+            yield _timeline_row(cur_start, counts)
+            counts = {}
+        cur_start = s
+        c = counts.setdefault(e["type"], {"count": 0, "maxConfidence": 0.0})
+        c["count"] += 1
+        c["maxConfidence"] = max(c["maxConfidence"], e["confidence"])
+    if counts:
+        yield _timeline_row(cur_start, counts)
+
+
+def _timeline_row(start: datetime, counts: dict) -> dict:
+    return {"start": start, "total": sum(c["count"] for c in counts.values()), "types": counts}
+
+
+async def migrate_session(db, session_id: ObjectId, batch: int = 5000, drop: bool = False) -> int:
+    """
+    Copy one session's rows from the legacy `events` collection into buckets,
+    then mark the session `eventsMigrated` (reads stop merging its legacy
+    rows). Re-runnable: earlier migrated buckets of the session are rebuilt.
+    drop=True deletes the legacy rows afterwards. Returns the events copied.
+    """
+    await db.event_buckets.delete_many({"sessionId": session_id, "m": True})
+    copied = 0
+    pending: list[dict] = []
+    cur = (db.events.find({"sessionId": session_id},
+                          {"_id": 1, "sessionId": 1, "type": 1, "confidence": 1, "createdAt": 1})
+           .batch_size(batch))
+    async for e in cur:
+        if e["type"] not in TYPE_CODES:
+            continue
+        pending.append({**e, "createdAt": event_time(e)})
+        if len(pending) >= batch:
+            await append(db, pending, migrated=True)
+            copied += len(pending)
+            pending.clear()
+    if pending:
+        await append(db, pending, migrated=True)
+        copied += len(pending)
+    await db.sessions.update_one({"_id": session_id}, {"$set": {"eventsMigrated": True}})
+    if drop:
+        await db.events.delete_many({"sessionId": session_id})
+    return copied
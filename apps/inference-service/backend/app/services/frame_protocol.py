@@ -0,0 +1,78 @@
+"""
+Binary frame protocol for /ws/sessions/{id} (JSON/base64 stays for old clients).
+
+Each binary WebSocket message = 24-byte little-endian header + encoded image:
+
+  offset  size  field
+  0       2     magic  b"DF"
+  2       1     version (1)
+  3       1     codec   (1 = WebP, 2 = JPEG)
+  4       4     seq     uint32, client frame counter (echoed back in alerts)
+  8       8     ts      float64, client capture time (unix secs)
+  16      8     roi     uint16 x, y, w, h in decoded pixels (w = h = 0 → full frame)
+  24      ...   raw WebP/JPEG bytes
+
+The payload is wrapped with np.frombuffer over the received buffer, so the
+image bytes are not copied before cv2.imdecode (see inference/preprocess.py).
+"""
+import base64
+import struct
+from typing import NamedTuple
+import numpy as np
+from app.services.inference.preprocess import decode
+
+HEADER = struct.Struct("<2sBBIdHHHH")
+MAGIC = b"DF"
+VERSION = 1
+CODECS = {1: "webp", 2: "jpeg"}
+
+
+class BinaryFrame(NamedTuple):
+    seq: int
+    ts: float
+    codec: str
+    roi: tuple[int, int, int, int] | None  # x, y, w, h
+    payload: np.ndarray                    # uint8 view over the message buffer
+
+
+def parse_frame(buf: bytes) -> BinaryFrame:
+    """
+    Parse the header; raises ValueError on anything malformed.
+    """
+    if len(buf) <= HEADER.size:
+        raise ValueError("frame too short")
+    magic, version, codec, seq, ts, x, y, w, h = HEADER.unpack_from(buf)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("bad frame header")
+    if codec not in CODECS:
+        raise ValueError(f"unknown codec {codec}")
+    roi = (x, y, w, h) if w and h else None
+    payload = np.frombuffer(buf, dtype=np.uint8, offset=HEADER.size)
+    return BinaryFrame(seq, ts, CODECS[codec], roi, payload)
+
+
+def pack_frame(image: bytes, *, seq: int, ts: float, codec: str = "webp",
+               roi: tuple[int, int, int, int] | None = None) -> bytes:
+    """
+    Client-side helper (tests, benchmarks, Python clients).
+    """
+    code = {v: k for k, v in CODECS.items()}[codec]
+    x, y, w, h = roi or (0, 0, 0, 0)
+    return HEADER.pack(MAGIC, VERSION, code, seq & 0xFFFFFFFF, ts, x, y, w, h) + image
+
+
+def binary_frame_to_bgr(frame: BinaryFrame, target: int = 0) -> np.ndarray | None:
+    """
+    Decode the payload into BGR and apply the ROI as a view (no copy).
+    With `target` (model input size), large sources decode at reduced resolution.
+    """
+    return decode(frame.payload, target, frame.roi)
+
+
+def frame_to_bgr(frame, target: int = 0) -> np.ndarray | None:
+    """
+    A BinaryFrame, or a legacy JSON base64 string, → BGR (None if undecodable).
+    """
+    if isinstance(frame, BinaryFrame):
+        return binary_frame_to_bgr(frame, target)
+    return decode(np.frombuffer(base64.b64decode(frame), dtype=np.uint8), target)
@@ -0,0 +1,53 @@
+"""
+Background thumbnail / WebP variants for vehicle photos.
+- Scheduled after the vehicle document is written; the upload request
+  doesn't wait for it.
+- At most IMAGE_VARIANT_WORKERS images are processed at once (cv2 on worker
+  threads), the rest wait their turn.
+- Results land in vehicle.imageVariants.<side> = {"thumb": url, "webp": url},
+  only if that side still holds the same original (a newer upload wins).
+"""
+import asyncio
+import logging
+from bson import ObjectId
+from starlette.concurrency import run_in_threadpool
+import app.db.mongodb as mongodb
+from app.core.config import settings
+from app.utils.images import make_variants
+
+log = logging.getLogger(__name__)
+
+_running: set[asyncio.Task] = set()  # keep references so tasks aren't GC'd mid-run
+_slots: asyncio.Semaphore | None = None
+
+
+def schedule_vehicle_variants(vehicle_id: ObjectId, images: dict[str, str]):
+    """
+    images: {side: original url} of the images just uploaded.
+    """
+    for side, url in images.items():
+        task = asyncio.create_task(_vehicle_variant(vehicle_id, side, url))
+        _running.add(task)
+        task.add_done_callback(_running.discard)
+
+
+async def _vehicle_variant(vehicle_id: ObjectId, side: str, url: str):
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(max(1, settings.IMAGE_VARIANT_WORKERS))
+    try:
+        async with _slots:
+            variants = await run_in_threadpool(make_variants, url)
+        if variants is None:
+            log.warning("image variants: cannot decode %s", url)
+            return
+        await mongodb.db.vehicles.update_one(
+            {"_id": vehicle_id, f"images.{side}": url},
+            {"$set": {f"imageVariants.{side}": variants}},
+        )
+    except Exception:
+        log.exception("image variants failed for %s", url)
+
+
+def pending() -> int:
+    return len(_running)
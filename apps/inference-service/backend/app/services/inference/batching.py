@@ -0,0 +1,118 @@
+"""
+Cross-session dynamic micro-batching in front of SeatbeltPhoneDetector.
+- Frames from every connected socket land in one pending list.
+- A batch is flushed when it reaches `max_batch` frames or the oldest frame
+  has waited `max_wait_ms`, whichever comes first.
+- Each batch is a single `run_batch` call on the inference executor; every
+  caller gets back its own result dict.
+- The detector is resolved per batch (`get_detector()`), so a hot-reloaded
+  model takes over at the next batch boundary. After the callers have their
+  results, the batch is offered to the shadow model, if any (and the load
+  tier runs optional stages).
+- Each frame carries the input size of its session's load tier; a batch
+  that straddles a tier change runs as one predict call per size.
+"""
+import asyncio
+import time
+import numpy as np
+from .executor import InferenceExecutor
+from .registry import models
+from ..load_control import load_controller
+
+
+class BatchScheduler:
+    def __init__(self, get_detector, executor: InferenceExecutor, max_batch: int, max_wait_ms: float):
+        """
+        get_detector() -> the detector to run the next batch on.
+        """
+        self.get_detector = get_detector
+        self.executor = executor
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._pending: list[tuple[np.ndarray, int, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task] = set()  # keep references so tasks aren't GC'd mid-run
+
+        self.batches = 0
+        self.frames = 0
+        self.queue_secs = 0.0  # total time frames waited for their batch to close
+
+    async def submit(self, bgr: np.ndarray, imgsz: int | None = None) -> dict:
+        """
+        Queue one frame and await its detector output (at `imgsz`, default the detector's).
+        Raises InferenceBusy if the executor rejected the batch.
+        """
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((bgr, imgsz or 0, fut, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            # leftovers start a fresh wait window
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+
+        now = time.perf_counter()
+        self.batches += 1
+        self.frames += len(batch)
+        self.queue_secs += sum(now - t for *_, t in batch)
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        frames = [b for b, _, _, _ in batch]
+        try:
+            results = await self.executor.submit(self._infer, frames, [s for _, s, _, _ in batch])
+            if len(results) != len(frames):
+                raise RuntimeError(f"detector returned {len(results)} results for {len(frames)} frames")
+        except BaseException as exc:  # InferenceBusy, a model error or cancellation: fail every caller
+            for _, _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(exc if isinstance(exc, Exception) else RuntimeError("batch cancelled"))
+            if not isinstance(exc, Exception):
+                raise
+            return
+        for (_, _, fut, _), res in zip(batch, results):
+            if not fut.done():  # caller may have gone away
+                fut.set_result(res)
+        if load_controller.tier.optional:
+            models.shadow_offer(frames, results)
+
+    def _infer(self, frames: list[np.ndarray], sizes: list[int]) -> list[dict]:
+        # resolved on the executor thread: a first (lazy) load never blocks the loop
+        det = self.get_detector()
+        if len(set(sizes)) == 1:
+            return det.run_batch(frames, sizes[0] or None)
+        out: list = [None] * len(frames)
+        for size in set(sizes):
+            idx = [i for i, s in enumerate(sizes) if s == size]
+            for i, y in zip(idx, det.run_batch([frames[i] for i in idx], size or None)):
+                out[i] = y
+        return out
+
+    def stats(self) -> dict:
+        batches = max(1, self.batches)
+        frames = max(1, self.frames)
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch_size": round(self.frames / batches, 2),
+            "avg_queue_ms": round(1000 * self.queue_secs / frames, 2),
+        }
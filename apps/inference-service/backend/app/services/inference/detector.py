@@ -0,0 +1,57 @@
+"""
+Seatbelt / phone detector backends, selected by settings.DETECTOR_BACKEND.
+
+Every backend exposes the same small surface:
+  - names: {class_id: lowercase name}
+  - run(bgr) -> {"phone_conf": float, "seatbelt_present": bool, ...}
+    (extra per-class confidences / boxes: see postprocess.summarize)
+  - run_batch([bgr, ...], imgsz=None) -> [dict, ...]  (same order; imgsz
+    overrides the input size for this call: load tiers, see load_control.py)
+  - warm(): load whatever per-thread state the backend needs
+
+Backends are imported lazily so an ONNX-only worker never imports torch.
+"stub" (stub_backend.py) needs no weights: benchmarks and local dev only.
+"""
+from app.core.config import settings
+
+# Common aliases (adjust if your dataset uses different terms)
+SEATBELT_ALIASES = {"seatbelt", "seat_belt", "belt"}
+PHONE_ALIASES = {"phone", "cell_phone", "mobile_phone", "smartphone"}
+
+
+def resolve_class_ids(names: dict[int, str]) -> tuple[set[int], set[int]]:
+    """
+    Map model class names → (seatbelt_ids, phone_ids).
+    """
+    seatbelt_ids = {i for i, n in names.items() if n in SEATBELT_ALIASES}
+    phone_ids = {i for i, n in names.items() if n in PHONE_ALIASES}
+
+    # Fallback in case names are missing
+    if not seatbelt_ids and not phone_ids:
+        seatbelt_ids = {0}
+        phone_ids = {1}
+    return seatbelt_ids, phone_ids
+
+
+def default_weights(backend: str) -> str:
+    """
+    Configured weights file of a backend ("" for the stub).
+    """
+    return {"ultralytics": settings.YOLO_MODEL, "onnx": settings.ONNX_MODEL}.get(backend.lower(), "")
+
+
+def create_detector(backend: str | None = None, weights: str | None = None):
+    """
+    weights: model file to load instead of the configured one (hot reload / shadow).
+    """
+    backend = (backend or settings.DETECTOR_BACKEND).lower()
+    if backend == "ultralytics":
+        from .yolo import SeatbeltPhoneDetector
+        return SeatbeltPhoneDetector(weights)
+    if backend == "onnx":
+        from .onnx_backend import OnnxSeatbeltPhoneDetector
+        return OnnxSeatbeltPhoneDetector(weights)
+    if backend == "stub":
+        from .stub_backend import StubDetector
+        return StubDetector(weights)
+    raise ValueError(f"Unknown DETECTOR_BACKEND: {backend!r}")
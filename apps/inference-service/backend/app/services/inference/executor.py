@@ -0,0 +1,22 @@
+"""
+Inference executor: runs model work off the asyncio event loop.
+- A BoundedExecutor (core/executor.py); torch / cv2 release the GIL while
+  they crunch.
+- A full queue raises InferenceBusy instead of piling up frames.
+"""
+from app.core.config import settings
+from app.core.executor import BoundedExecutor, Busy
+
+
+class InferenceBusy(Busy):
+    """Raised when `max_queue` inference jobs are already waiting or running."""
+
+
+class InferenceExecutor(BoundedExecutor):
+    busy = InferenceBusy
+
+    def __init__(self, workers: int, max_queue: int, name: str = "inference"):
+        super().__init__(workers, max_queue, name)
+
+
+inference_executor = InferenceExecutor(settings.INFERENCE_WORKERS, settings.INFERENCE_QUEUE_DEPTH)
@@ -0,0 +1,101 @@
+"""
+Face stage for drowsiness / distraction (runs next to the seatbelt/phone model).
+- Landmarks: MediaPipe FaceMesh (CPU, optional dependency). Without mediapipe
+  the stage reports itself unavailable and the pipeline skips it.
+- Eye aspect ratio (EAR) per frame → PERCLOS (share of time eyes closed) over
+  a sliding window, kept per session.
+- Head pose via solvePnP (head_pose.py).
+- Cheap cadence: the pipeline only calls it every FACE_EVERY_N processed frames,
+  on a frame downscaled to FACE_MAX_SIDE.
+"""
+import logging
+import threading
+from collections import deque
+import numpy as np
+import cv2
+from .head_pose import POSE_LANDMARKS, estimate_head_pose
+
+log = logging.getLogger(__name__)
+
+try:
+    import mediapipe as mp
+except ImportError:  # optional: face stage is simply off
+    mp = None
+
+# MediaPipe FaceMesh eye contours: p1..p6 as in Soukupová & Čech (2016)
+LEFT_EYE = [362, 385, 387, 263, 373, 380]
+RIGHT_EYE = [33, 160, 158, 133, 153, 144]
+
+EAR_CLOSED = 0.21      # below this the eye counts as closed
+FACE_MAX_SIDE = 320    # landmarks are stable well below full resolution
+
+
+def eye_aspect_ratio(eye: np.ndarray) -> float:
+    """
+    eye: (6, 2) points p1..p6 → (|p2-p6| + |p3-p5|) / (2 |p1-p4|)
+    """
+    v = np.linalg.norm(eye[[1, 2]] - eye[[5, 4]], axis=1).sum()
+    h = np.linalg.norm(eye[0] - eye[3])
+    return float(v / (2.0 * h)) if h > 0 else 0.0
+
+
+class Perclos:
+    """
+    Share of samples with eyes closed over the last `window` seconds.
+    """
+    __slots__ = ("window", "samples", "closed")
+
+    def __init__(self, window: float = 30.0):
+        self.window = window
+        self.samples: deque = deque()  # (ts, closed)
+        self.closed = 0
+
+    def update(self, closed: bool, now: float) -> float:
+        self.samples.append((now, closed))
+        self.closed += closed
+        while self.samples and now - self.samples[0][0] > self.window:
+            _, was_closed = self.samples.popleft()
+            self.closed -= was_closed
+        return self.closed / len(self.samples)
+
+
+class FaceStage:
+    def __init__(self):
+        self.available = mp is not None
+        self._local = threading.local()  # FaceMesh graphs are not thread-safe
+        if not self.available:
+            log.warning("mediapipe not installed: drowsiness/distraction stage disabled")
+
+    def _mesh(self):
+        mesh = getattr(self._local, "mesh", None)
+        if mesh is None:
+            # static mode: frames from different sessions share this graph
+            mesh = mp.solutions.face_mesh.FaceMesh(static_image_mode=True, max_num_faces=1,
+                                                   refine_landmarks=False)
+            self._local.mesh = mesh
+        return mesh
+
+    def analyze(self, bgr: np.ndarray) -> dict | None:
+        """
+        Returns {"face": True, "ear": float, "yaw": deg, "pitch": deg, "roll": deg},
+        {"face": False} when no face is found (driver turned away / out of
+        frame), or None when the stage is unavailable.
+        """
+        if not self.available:
+            return None
+
+        h, w = bgr.shape[:2]
+        scale = min(1.0, FACE_MAX_SIDE / max(h, w))
+        if scale < 1.0:
+            bgr = cv2.resize(bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            h, w = bgr.shape[:2]
+
+        res = self._mesh().process(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+        if not res.multi_face_landmarks:
+            return {"face": False}
+
+        lm = res.multi_face_landmarks[0].landmark
+        pts = np.array([(p.x * w, p.y * h) for p in lm], dtype=np.float64)
+        ear = (eye_aspect_ratio(pts[LEFT_EYE]) + eye_aspect_ratio(pts[RIGHT_EYE])) / 2.0
+        pose = estimate_head_pose(pts[POSE_LANDMARKS], w, h) or {"yaw": 0.0, "pitch": 0.0, "roll": 0.0}
+        return {"face": True, "ear": ear, **pose}
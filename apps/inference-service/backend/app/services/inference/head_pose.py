@@ -0,0 +1,44 @@
+"""
+Head pose from 2D face landmarks with cv2.solvePnP.
+- Six stable points (nose tip, chin, eye outer corners, mouth corners) against a
+  generic 3D face model; the camera is approximated from the frame size.
+- Angles in degrees: yaw (left/right), pitch (up/down), roll (tilt).
+"""
+import numpy as np
+import cv2
+
+# MediaPipe FaceMesh indices for the model points below
+POSE_LANDMARKS = [1, 152, 33, 263, 57, 287]
+
+# Generic face model (mm), same order as POSE_LANDMARKS
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),          # nose tip
+    (0.0, -63.6, -12.5),      # chin
+    (-43.3, 32.7, -26.0),     # eye outer corner, image left (driver's right)
+    (43.3, 32.7, -26.0),      # eye outer corner, image right
+    (-28.9, -28.9, -24.1),    # mouth corner, image left
+    (28.9, -28.9, -24.1),     # mouth corner, image right
+], dtype=np.float64)
+
+FLIP_X = np.diag([1.0, -1.0, -1.0])
+
+
+def estimate_head_pose(points_2d: np.ndarray, frame_w: int, frame_h: int) -> dict | None:
+    """
+    points_2d: (6, 2) pixel coords in POSE_LANDMARKS order.
+    Returns {"yaw": deg, "pitch": deg, "roll": deg} or None if PnP fails.
+    """
+    focal = float(frame_w)
+    camera = np.array([[focal, 0, frame_w / 2],
+                       [0, focal, frame_h / 2],
+                       [0, 0, 1]], dtype=np.float64)
+    ok, rvec, _ = cv2.solvePnP(MODEL_POINTS, points_2d.astype(np.float64), camera, None,
+                               flags=cv2.SOLVEPNP_ITERATIVE)
+    if not ok:
+        return None
+
+    rot, _ = cv2.Rodrigues(rvec)
+    # The model is y-up, the image y-down: undo that 180° flip about x first
+    angles, *_ = cv2.RQDecomp3x3(FLIP_X @ rot)
+    pitch, yaw, roll = angles
+    return {"yaw": float(yaw), "pitch": float(pitch), "roll": float(roll)}
@@ -0,0 +1,123 @@
+"""
+ONNX Runtime (CPU) backend for the seatbelt / phone model.
+- Expects an ultralytics export: `yolo export model=best.pt format=onnx imgsz=480`
+  (output shape (B, 4 + num_classes, N), boxes as cx, cy, w, h in input pixels).
+- Class names / imgsz come from the export metadata; class ids go through the
+  same alias mapping and post-processing (postprocess.py) as the ultralytics backend.
+- Letterbox / color swap come from preprocess.py (reused buffers); confidence
+  filter and class-aware NMS are plain NumPy.
+- One InferenceSession is shared by all executor threads (run() is thread-safe).
+- Load tiers' smaller input sizes need an export with dynamic H/W
+  (`dynamic=True`); a fixed-size export always runs at its own imgsz.
+"""
+import ast
+import threading
+import numpy as np
+import onnxruntime as ort
+from app.core.config import settings
+from app.services import stage_timer
+from .detector import resolve_class_ids
+from .postprocess import ClassLookup, summarize
+from .preprocess import LetterboxerSet, to_nchw, unletterbox
+
+CONF_THRES = 0.5   # same as the ultralytics backend
+IOU_THRES = 0.7    # ultralytics default
+MAX_WH = 7680      # class offset for batched NMS
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_thres: float) -> np.ndarray:
+    """
+    Greedy NMS over xyxy boxes; each step suppresses against all remaining boxes at once.
+    Returns kept indices, highest score first.
+    """
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        ih = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = iw * ih
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_thres]
+    return np.asarray(keep, dtype=np.int64)
+
+
+class OnnxSeatbeltPhoneDetector:
+    def __init__(self, weights: str | None = None):
+        self.weights = weights or settings.ONNX_MODEL
+        opts = ort.SessionOptions()
+        if settings.ONNX_THREADS > 0:
+            opts.intra_op_num_threads = settings.ONNX_THREADS
+        self.session = ort.InferenceSession(self.weights, sess_options=opts,
+                                            providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.dynamic_batch = not isinstance(inp.shape[0], int)
+        self.dynamic_size = not isinstance(inp.shape[2], int)
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        names = ast.literal_eval(meta["names"]) if "names" in meta else {}
+        self.names = {int(i): str(n).lower() for i, n in names.items()}
+        imgsz = ast.literal_eval(meta["imgsz"]) if "imgsz" in meta else [inp.shape[2]]
+        self.imgsz = int(imgsz[0])
+        self.letterboxers = LetterboxerSet()
+        self._local = threading.local()  # per-thread input tensor
+
+        # Find IDs for seatbelt & phone
+        self.seatbelt_ids, self.phone_ids = resolve_class_ids(self.names)
+        self.lookup = ClassLookup(self.names, self.seatbelt_ids, self.phone_ids)
+
+    def warm(self):
+        pass  # the session is shared and already loaded
+
+    def run(self, bgr: np.ndarray) -> dict:
+        return self.run_batch([bgr])[0]
+
+    def run_batch(self, frames: list[np.ndarray], imgsz: int | None = None) -> list[dict]:
+        if not frames:
+            return []
+        t0 = stage_timer.clock()
+        blob, geoms = self._to_blob(frames, imgsz if imgsz and self.dynamic_size else self.imgsz)
+        t1 = stage_timer.clock()
+        stage_timer.record("preprocess", t0, t1)
+
+        if self.dynamic_batch:
+            preds = self.session.run(None, {self.input_name: blob})[0]
+        else:  # static batch-1 export
+            preds = np.concatenate([self.session.run(None, {self.input_name: b[None]})[0] for b in blob])
+        t2 = stage_timer.clock()
+        stage_timer.record("infer", t1, t2)
+
+        out = [self._summarize(p, g) for p, g in zip(preds, geoms)]
+        stage_timer.record("postprocess", t2)
+        return out
+
+    def _to_blob(self, frames: list[np.ndarray], size: int) -> tuple[np.ndarray, list[tuple]]:
+        # BGR HWC uint8 → RGB NCHW float32 0..1, written into a reused tensor
+        batch, geoms = self.letterboxers.get(size).batch(frames)
+        full = getattr(self._local, "blob", None)
+        if full is None or full.shape[0] < len(frames) or full.shape[2] != size:
+            full = np.empty((len(frames), 3, size, size), dtype=np.float32)
+            self._local.blob = full
+        return to_nchw(batch, full[:len(frames)]), geoms
+
+    def _summarize(self, pred: np.ndarray, geom: tuple[float, int, int]) -> dict:
+        """
+        pred: (4 + num_classes, N) for one image; geom: letterbox (scale, pad_left, pad_top).
+        """
+        scores_all = pred[4:]
+        cls = scores_all.argmax(0)
+        conf = scores_all[cls, np.arange(cls.size)]
+        keep = conf >= CONF_THRES
+        cls, conf = cls[keep], conf[keep]
+        cx, cy, w, h = pred[:4, keep]
+        xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        if cls.size:
+            kept = nms(xyxy + (cls * MAX_WH)[:, None], conf, IOU_THRES)
+            cls, conf, xyxy = cls[kept], conf[kept], xyxy[kept]
+            xyxy = unletterbox(xyxy, geom)  # letterbox → original frame pixels
+        return summarize(cls, conf, xyxy, self.lookup)
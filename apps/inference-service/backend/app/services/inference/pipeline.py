@@ -1,38 +1,120 @@
 """
-Minimal DMS pipeline for this stage:
-- Only detects "phone use" and "seatbelt OFF".
+DMS pipeline:
+- Detects "phone use" and "seatbelt OFF" (detector, every frame).
+- Detects "drowsy" (PERCLOS) and "distracted" (head pose, or no face found)
+  from the face stage, which only runs every FACE_EVERY_N frames to keep its
+  cost small.
+- Motion gate: when the scene is unchanged, the last detector output is
+  reused (up to MOTION_MAX_REUSE_SECS old) instead of running the model.
 - Uses TemporalDebouncer to confirm sustained events (avoid flicker).
+- One detector for all sessions; debouncers are per session (SessionState).
+  Models come from the process-wide registry (registry.py), on first use.
 """
 import time
 import numpy as np
-from .yolo import SeatbeltPhoneDetector
+from app.core.config import settings
+from .registry import models
+from .face_metrics import Perclos, EAR_CLOSED
+from .postprocess import PHONE_ACTIVE
+from .motion_gate import MotionGate, signature
 from ..temporal import TemporalDebouncer
+from ..session_state import SessionState
+from .. import stage_timer
+
+PERCLOS_DROWSY = 0.3    # eyes closed ≥30% of the window
+YAW_DISTRACTED = 30.0   # degrees away from straight ahead
+PITCH_DISTRACTED = 25.0
 
 class DmsPipeline:
-    def __init__(self):
-        self.det = SeatbeltPhoneDetector()
+    def __init__(self, load_models: bool = True):
+        """
+        load_models=False gives a debounce-only pipeline (evaluate / new_state),
+        e.g. to replay detector outputs computed elsewhere.
+        """
+        # Shared by every session; per-session timers live in SessionState.
+        self.load_models = load_models
+        self.face_every_n = max(1, settings.FACE_EVERY_N)
+
+    @property
+    def det(self):
+        return models.detector() if self.load_models else None
+
+    @property
+    def face(self):
+        return models.face() if self.load_models else None
+
+    def new_state(self, session_id: str) -> SessionState:
         # Debounce windows — tweak to taste after testing on your clips.
-        self.debouncers = {
-            "phone":    TemporalDebouncer(min_secs=1.0, cooldown=2.0),
-            "seatbelt": TemporalDebouncer(min_secs=1.0, cooldown=2.0),
-        }
+        st = SessionState(session_id, {
+            "phone":      TemporalDebouncer(min_secs=1.0, cooldown=2.0),
+            "seatbelt":   TemporalDebouncer(min_secs=1.0, cooldown=2.0),
+            "drowsy":     TemporalDebouncer(min_secs=2.0, cooldown=10.0),
+            "distracted": TemporalDebouncer(min_secs=2.0, cooldown=5.0),
+        })
+        st.perclos = Perclos(window=30.0)
+        # threshold 0 = gate off (nothing is ever "unchanged enough")
+        threshold = settings.MOTION_DIFF_THRESHOLD if settings.MOTION_GATE_ENABLED else 0.0
+        st.gate = MotionGate(threshold, settings.MOTION_MAX_REUSE_SECS)
+        return st
 
-    def process(self, bgr: np.ndarray) -> list[dict]:
+    def signature(self, bgr: np.ndarray) -> np.ndarray | None:
+        return signature(bgr) if settings.MOTION_GATE_ENABLED else None
+
+    def face_due(self, state: SessionState) -> bool:
+        """
+        Count a processed frame; True when the face stage should run on it.
         """
-        Input: BGR image (ROI)
+        state.frames += 1
+        return self.face is not None and state.frames % self.face_every_n == 0
+
+    def process(self, bgr: np.ndarray, state: SessionState) -> list[dict]:
+        """
+        Input: BGR image (ROI) + the session's debounce state
         Output: confirmed events [{"type":"phone","confidence":0.8}, {"type":"seatbelt","confidence":0.9}]
         """
         now = time.time()
+        sig = self.signature(bgr)
+        y = state.gate.reuse(sig, now)
+        if y is None:
+            y = self.det.run(bgr)
+            state.gate.store(sig, y, now)
+        face = self.face.analyze(bgr) if self.face_due(state) else None
+        return self.evaluate(y, now, state, face)
+
+    def evaluate(self, y: dict, now: float, state: SessionState, face: dict | None = None) -> list[dict]:
+        """
+        Debounce one detector output (from `det.run` or a batched call),
+        plus a face-stage result when one was computed for this frame.
+        """
+        t0 = stage_timer.clock()
         out: list[dict] = []
+        debouncers = state.debouncers
 
-        y = self.det.run(bgr)
-        phone_active = (y.get("phone_conf", 0.0) > 0.6)
+        phone_active = (y.get("phone_conf", 0.0) > PHONE_ACTIVE)
         seatbelt_off = (y.get("seatbelt_present", False) is False)
 
-        if self.debouncers["phone"].update(phone_active, now):
-            out.append({"type": "phone", "confidence": float(y.get("phone_conf", 0.0))})
+        if debouncers["phone"].update(phone_active, now):
+            out.append({"type": "phone", "confidence": float(y.get("phone_conf", 0.0)),
+                        "box": y.get("phone_box")})
 
-        if self.debouncers["seatbelt"].update(seatbelt_off, now):
+        if debouncers["seatbelt"].update(seatbelt_off, now):
             out.append({"type": "seatbelt", "confidence": 0.9})
 
+        if face is not None and not face["face"]:
+            # no face at all: looking fully away is the strongest distraction;
+            # eyes unknown, so PERCLOS is left as it is
+            if debouncers["distracted"].update(True, now):
+                out.append({"type": "distracted", "confidence": 1.0})
+        elif face is not None:
+            perclos = state.perclos.update(face["ear"] < EAR_CLOSED, now)
+            if debouncers["drowsy"].update(perclos >= PERCLOS_DROWSY, now):
+                out.append({"type": "drowsy", "confidence": round(perclos, 3)})
+
+            yaw, pitch = abs(face["yaw"]), abs(face["pitch"])
+            away = yaw > YAW_DISTRACTED or pitch > PITCH_DISTRACTED
+            if debouncers["distracted"].update(away, now):
+                conf = min(1.0, max(yaw / (2 * YAW_DISTRACTED), pitch / (2 * PITCH_DISTRACTED)))
+                out.append({"type": "distracted", "confidence": round(conf, 3)})
+
+        stage_timer.record("debounce", t0)
         return out
@@ -0,0 +1,75 @@
+"""
+Vectorized post-processing shared by all detector backends.
+- Input: one image's detections as arrays (cls, conf, xyxy) — no per-box Python.
+- Class ids → phone / seatbelt via precomputed boolean lookup arrays.
+- Besides the phone_conf / seatbelt_present contract, returns the best
+  confidence and box per class name for the pipeline to reuse.
+"""
+import numpy as np
+
+PHONE_ACTIVE = 0.6  # phone_conf above this counts as phone use (pipeline, shadow agreement)
+
+
+class ClassLookup:
+    def __init__(self, names: dict[int, str], seatbelt_ids: set[int], phone_ids: set[int]):
+        size = max([len(names) - 1, *names.keys(), *seatbelt_ids, *phone_ids], default=0) + 1
+        self.names = np.array([names.get(i, str(i)) for i in range(size)], dtype=object)
+        self.is_phone = np.zeros(size, dtype=bool)
+        self.is_phone[list(phone_ids)] = True
+        self.is_seatbelt = np.zeros(size, dtype=bool)
+        self.is_seatbelt[list(seatbelt_ids)] = True
+
+    @property
+    def size(self) -> int:
+        return self.is_phone.size
+
+
+EMPTY = {"phone_conf": 0.0, "seatbelt_present": False, "seatbelt_conf": 0.0,
+         "phone_box": None, "seatbelt_box": None, "classes": {}}
+
+
+def summarize(cls: np.ndarray, conf: np.ndarray, xyxy: np.ndarray, lookup: ClassLookup) -> dict:
+    """
+    cls (N,) int, conf (N,) float, xyxy (N, 4) float → result dict:
+      phone_conf, seatbelt_present              (contract used by the pipeline)
+      seatbelt_conf, phone_box, seatbelt_box    (best box per kind, xyxy or None)
+      classes: {name: {"conf": float, "box": [x1, y1, x2, y2]}}
+    """
+    if cls.size == 0:
+        return {**EMPTY, "classes": {}}
+
+    cls = cls.astype(np.int64, copy=False)
+    valid = (cls >= 0) & (cls < lookup.size)
+    cls, conf, xyxy = cls[valid], conf[valid], xyxy[valid]
+    if cls.size == 0:
+        return {**EMPTY, "classes": {}}
+
+    # Best detection per class: sort by conf desc, first hit of each class wins
+    order = np.argsort(-conf, kind="stable")
+    uniq, first = np.unique(cls[order], return_index=True)
+    best = order[first]
+    best_conf = conf[best].astype(float)
+    best_box = xyxy[best].astype(float)
+
+    phone = lookup.is_phone[uniq]
+    seatbelt = lookup.is_seatbelt[uniq]
+
+    def top(mask):
+        if not mask.any():
+            return 0.0, None
+        j = np.flatnonzero(mask)[best_conf[mask].argmax()]
+        return float(best_conf[j]), best_box[j].tolist()
+
+    phone_conf, phone_box = top(phone)
+    seatbelt_conf, seatbelt_box = top(seatbelt)
+    return {
+        "phone_conf": phone_conf,
+        "seatbelt_present": bool(seatbelt.any()),
+        "seatbelt_conf": seatbelt_conf,
+        "phone_box": phone_box,
+        "seatbelt_box": seatbelt_box,
+        "classes": {
+            str(lookup.names[c]): {"conf": float(cf), "box": bx.tolist()}
+            for c, cf, bx in zip(uniq, best_conf, best_box)
+        },
+    }
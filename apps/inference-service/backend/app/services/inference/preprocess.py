@@ -0,0 +1,163 @@
+"""
+Frame preprocessing for the detector, with as few copies as possible.
+- decode(): peek at the JPEG/WebP header and use cv2.IMREAD_REDUCED_* when the
+  source is 2x/4x/8x bigger than the model input needs (JPEG decodes at the
+  reduced scale directly), then crop to the optional ROI as a view.
+- Letterboxer: cv2.resize writes straight into a per-thread preallocated
+  buffer and only the pad bands are painted (no temporary image, no np.full).
+- to_nchw(): BGR→RGB swap, HWC→CHW and /255 folded into one write of the
+  model input tensor (ONNX backend). The ultralytics backend takes BGR as is.
+"""
+import struct
+import threading
+import numpy as np
+import cv2
+
+PAD_VALUE = 114  # ultralytics letterbox gray
+
+_REDUCED = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+            4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+
+def probe_size(buf) -> tuple[int, int] | None:
+    """
+    (width, height) from a JPEG or WebP header without decoding; None if unknown.
+    """
+    b = memoryview(buf).cast("B")
+    n = len(b)
+    if n >= 4 and b[0] == 0xFF and b[1] == 0xD8:  # JPEG: walk markers to the SOFn segment
+        i = 2
+        while i + 9 < n:
+            if b[i] != 0xFF:
+                return None
+            marker = b[i + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                i += 2
+                continue
+            seg_len = (b[i + 2] << 8) | b[i + 3]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                h = (b[i + 5] << 8) | b[i + 6]
+                w = (b[i + 7] << 8) | b[i + 8]
+                return w, h
+            i += 2 + seg_len
+        return None
+    if n >= 30 and bytes(b[0:4]) == b"RIFF" and bytes(b[8:12]) == b"WEBP":
+        chunk = bytes(b[12:16])
+        if chunk == b"VP8 ":  # lossy: frame header after the 3-byte start code
+            w, h = struct.unpack_from("<HH", b, 26)
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":  # lossless: 14-bit fields packed after the 0x2F signature
+            bits = int.from_bytes(bytes(b[21:25]), "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":  # extended: 24-bit canvas size minus one
+            w = int.from_bytes(bytes(b[24:27]), "little") + 1
+            h = int.from_bytes(bytes(b[27:30]), "little") + 1
+            return w, h
+    return None
+
+
+def reduction_for(size: tuple[int, int] | None, target: int,
+                  roi: tuple[int, int, int, int] | None = None) -> int:
+    """
+    Largest factor in 1/2/4/8 that still leaves the (ROI's) long side >= target.
+    """
+    if size is None or target <= 0:
+        return 1
+    w, h = (roi[2], roi[3]) if roi else size
+    long_side = max(w, h)
+    factor = 1
+    for f in (2, 4, 8):
+        if long_side // f >= target:
+            factor = f
+    return factor
+
+
+def decode(buf, target: int, roi: tuple[int, int, int, int] | None = None) -> np.ndarray | None:
+    """
+    Encoded bytes (bytes / uint8 array) → BGR image, ROI-cropped (view), decoded
+    at reduced resolution when the model input doesn't need full size.
+    """
+    arr = buf if isinstance(buf, np.ndarray) else np.frombuffer(buf, dtype=np.uint8)
+    factor = reduction_for(probe_size(arr), target, roi)
+    img = cv2.imdecode(arr, _REDUCED[factor])
+    if img is None or roi is None:
+        return img
+    x, y, w, h = (v // factor for v in roi)
+    crop = img[y:y + h, x:x + w]
+    return crop if crop.size else None
+
+
+class Letterboxer:
+    """
+    Letterbox frames into reused (B, size, size, 3) uint8 buffers, one set per thread.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+
+    def _buffer(self, n: int) -> np.ndarray:
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < n:
+            buf = np.empty((n, self.size, self.size, 3), dtype=np.uint8)
+            self._local.buf = buf
+        return buf
+
+    def batch(self, frames: list[np.ndarray]) -> tuple[np.ndarray, list[tuple[float, float, float]]]:
+        """
+        Returns (buffer view (n, size, size, 3), [(scale, pad_left, pad_top), ...]).
+        The buffer is overwritten by the next call on the same thread.
+        """
+        out = self._buffer(len(frames))[:len(frames)]
+        geoms = []
+        for i, bgr in enumerate(frames):
+            geoms.append(self.into(bgr, out[i]))
+        return out, geoms
+
+    def into(self, bgr: np.ndarray, dst: np.ndarray) -> tuple[float, float, float]:
+        h, w = bgr.shape[:2]
+        s = self.size
+        r = min(s / h, s / w)
+        nh, nw = min(s, int(round(h * r))), min(s, int(round(w * r)))
+        top, left = (s - nh) // 2, (s - nw) // 2
+
+        # resize straight into the buffer region, then paint only the pad bands
+        cv2.resize(bgr, (nw, nh), dst=dst[top:top + nh, left:left + nw], interpolation=cv2.INTER_LINEAR)
+        dst[:top] = PAD_VALUE
+        dst[top + nh:] = PAD_VALUE
+        dst[top:top + nh, :left] = PAD_VALUE
+        dst[top:top + nh, left + nw:] = PAD_VALUE
+        return r, left, top
+
+
+class LetterboxerSet:
+    """
+    One Letterboxer per input size (load tiers switch the detector imgsz).
+    """
+    def __init__(self):
+        self._by_size: dict[int, Letterboxer] = {}
+
+    def get(self, size: int) -> Letterboxer:
+        lb = self._by_size.get(size)
+        if lb is None:
+            lb = self._by_size.setdefault(size, Letterboxer(size))
+        return lb
+
+
+def to_nchw(batch: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    (B, H, W, 3) BGR uint8 → (B, 3, H, W) RGB float32 in 0..1, in one pass.
+    `out` (same shape, float32) is reused when given.
+    """
+    view = batch.transpose(0, 3, 1, 2)[:, ::-1]
+    if out is None or out.shape != view.shape:
+        out = np.empty(view.shape, dtype=np.float32)
+    np.multiply(view, np.float32(1 / 255), out=out, casting="unsafe")
+    return out
+
+
+def unletterbox(xyxy: np.ndarray, geom: tuple[float, float, float]) -> np.ndarray:
+    """
+    Boxes in letterboxed pixels → original frame pixels.
+    """
+    r, left, top = geom
+    return (xyxy - np.array([left, top, left, top], dtype=xyxy.dtype)) / r
@@ -0,0 +1,199 @@
+"""
+Process-wide model registry: each model is loaded at most once per process.
+- detector() / face() build on first use (thread-safe) and return the same
+  instance afterwards; the WS pipeline, the debug endpoint and offline jobs
+  in one process all share it.
+- Nothing is loaded at import time: app startup calls warmup() in the
+  background, so the server answers /healthz while weights load.
+- warmup() loads the per-thread handles on every inference thread and runs
+  WARMUP_FRAMES synthetic frames through each, so lazy init / JIT / allocator
+  growth happens before the first live frame. /readyz reports ready after it.
+- Hot reload: reload() builds and warms new weights off the hot path (and,
+  through `prewarm`, on every thread that runs inference, since ultralytics
+  handles are per thread), then swaps the default detector in one assignment. Callers resolve detector()
+  per batch, so in-flight batches finish on the old model and the next one
+  uses the new model; sessions and debouncer state are untouched.
+- Shadow: set_shadow() attaches a candidate model that sees a sample of the
+  primary's frames (shadow.py); promote_shadow() makes it the primary.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+from app.core.config import settings
+from .detector import create_detector, default_weights
+from .shadow import ShadowRunner
+
+log = logging.getLogger(__name__)
+
+# calls that swap the primary detector: they take prewarm (see reload())
+SWAPS_PRIMARY = ("reload", "promote_shadow")
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._detectors: dict[str, object] = {}
+        self._face = None
+        self._face_loaded = False
+        self._reload_lock = threading.Lock()  # one reload / shadow load at a time
+        self.active: dict = {}     # {"backend", "weights", "version", "loadedAt"} of the default detector
+        self.shadow: ShadowRunner | None = None
+
+        self.ready = False
+        self.error: str | None = None
+        self.warmup_secs: float | None = None
+
+    def detector(self, backend: str | None = None):
+        backend = (backend or settings.DETECTOR_BACKEND).lower()
+        det = self._detectors.get(backend)
+        if det is None:
+            with self._lock:
+                det = self._detectors.get(backend)
+                if det is None:
+                    t0 = time.perf_counter()
+                    det = create_detector(backend)
+                    self._detectors[backend] = det
+                    log.info("loaded %s detector in %.2fs", backend, time.perf_counter() - t0)
+                    if backend == settings.DETECTOR_BACKEND.lower() and not self.active:
+                        self._set_active(backend, default_weights(backend))
+        return det
+
+    def _set_active(self, backend: str, weights: str):
+        self.active = {"backend": backend, "weights": weights,
+                       "version": self.active.get("version", 0) + 1,
+                       "loadedAt": datetime.now(timezone.utc).isoformat()}
+
+    def _build(self, backend: str | None, weights: str | None):
+        """
+        New detector, loaded and warmed on the calling thread (never the hot path).
+        """
+        backend = (backend or settings.DETECTOR_BACKEND).lower()
+        t0 = time.perf_counter()
+        det = create_detector(backend, weights)
+        det.warm()
+        if settings.WARMUP_FRAMES > 0:
+            blank = np.zeros((det.imgsz, det.imgsz, 3), dtype=np.uint8)
+            det.run_batch([blank] * settings.WARMUP_FRAMES)
+        log.info("built %s detector from %r in %.2fs", backend, det.weights, time.perf_counter() - t0)
+        return backend, det
+
+    def reload(self, backend: str | None = None, weights: str | None = None, prewarm=None) -> dict:
+        """
+        Load new weights (default: the configured file again) and swap them in
+        as the default detector. Blocking; raises if they don't load, in which
+        case the current model stays. prewarm(det), if given, loads the new
+        model's handles on the inference threads before the swap.
+        """
+        with self._reload_lock:
+            backend, det = self._build(backend, weights)
+            if prewarm is not None:
+                prewarm(det)
+            self._detectors[settings.DETECTOR_BACKEND.lower()] = det  # the atomic swap
+            self._set_active(backend, det.weights)
+        return dict(self.active)
+
+    def set_shadow(self, backend: str | None, weights: str | None, rate: float) -> dict:
+        """
+        Attach a candidate model (replacing any previous one). Blocking.
+        """
+        with self._reload_lock:
+            backend, det = self._build(backend, weights)
+            old, self.shadow = self.shadow, ShadowRunner(det, rate, settings.SHADOW_QUEUE_DEPTH,
+                                                         {"backend": backend, "weights": det.weights})
+        if old is not None:
+            old.close()
+        return self.shadow.stats()
+
+    def clear_shadow(self) -> dict | None:
+        """
+        Detach the candidate; returns its final stats (None if there was none).
+        """
+        old, self.shadow = self.shadow, None
+        if old is None:
+            return None
+        old.close()
+        return old.stats()
+
+    def promote_shadow(self, prewarm=None) -> dict:
+        """
+        The shadow model becomes the primary (already loaded; prewarm(det) as
+        in reload()). Raises LookupError without one.
+        """
+        with self._reload_lock:
+            runner = self.shadow
+            if runner is None:
+                raise LookupError("no shadow model")
+            if prewarm is not None:
+                prewarm(runner.detector)
+            self._detectors[settings.DETECTOR_BACKEND.lower()] = runner.detector
+            self._set_active(runner.info["backend"], runner.info["weights"])
+            self.shadow = None
+        runner.close()
+        return dict(self.active)
+
+    def shadow_offer(self, frames: list, results: list[dict]):
+        """
+        Hook after every primary batch; a no-op without a shadow model.
+        """
+        runner = self.shadow
+        if runner is not None:
+            runner.offer(frames, results)
+
+    def face(self):
+        """
+        Shared FaceStage, or None when disabled / mediapipe is missing.
+        """
+        if not self._face_loaded:
+            with self._lock:
+                if not self._face_loaded:
+                    if settings.FACE_STAGE_ENABLED:
+                        from .face_metrics import FaceStage
+                        face = FaceStage()
+                        self._face = face if face.available else None
+                    self._face_loaded = True
+        return self._face
+
+    def warm_thread(self):
+        """
+        Load this thread's model handles and push a synthetic batch through them.
+        """
+        det = self.detector()
+        det.warm()
+        if settings.WARMUP_FRAMES > 0:
+            blank = np.zeros((det.imgsz, det.imgsz, 3), dtype=np.uint8)
+            det.run_batch([blank] * settings.WARMUP_FRAMES)
+            face = self.face()
+            if face is not None:
+                face.analyze(blank)
+
+    async def warmup(self, executor):
+        """
+        warm_thread() on every executor thread; sets `ready`. Never raises:
+        a failure is kept in `error` and /readyz stays unready.
+        """
+        t0 = time.perf_counter()
+        try:
+            await executor.preload(self.warm_thread)
+        except Exception as exc:
+            self.error = repr(exc)
+            log.exception("model warmup failed")
+            return
+        self.warmup_secs = round(time.perf_counter() - t0, 3)
+        self.ready = True
+        log.info("models warm in %.2fs", self.warmup_secs)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "warmup_secs": self.warmup_secs,
+            "detectors": sorted(self._detectors),
+            "face_stage": self._face is not None,
+            "active": self.active or None,
+            "shadow": self.shadow.stats() if self.shadow is not None else None,
+        }
+
+
+models = ModelRegistry()
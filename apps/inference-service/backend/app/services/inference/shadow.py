@@ -0,0 +1,96 @@
+"""
+Shadow (A/B) inference: a candidate model sees a sample of live frames.
+- offer() is called after the primary results were handed out; it only
+  samples and queues, so the primary path never waits for the candidate.
+- The candidate runs on its own single thread. When SHADOW_QUEUE_DEPTH
+  batches are already waiting, new samples are skipped, not queued.
+- Its outputs never reach the debouncers; they are only compared with the
+  primary's: phone on/off (PHONE_ACTIVE), seatbelt present, |Δ phone_conf|.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.services import stage_timer
+from .postprocess import PHONE_ACTIVE
+
+log = logging.getLogger(__name__)
+
+
+class ShadowRunner:
+    def __init__(self, detector, rate: float, max_queue: int, info: dict):
+        self.detector = detector
+        self.rate = min(1.0, max(0.0, rate))
+        self.max_queue = max(1, max_queue)
+        self.info = info  # {"backend", "weights"} for stats
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix="shadow", initializer=stage_timer.mute_thread)
+        self._lock = threading.Lock()
+        self._queued = 0
+
+        self.frames = 0
+        self.phone_agree = 0
+        self.seatbelt_agree = 0
+        self.both_agree = 0
+        self.phone_conf_diff = 0.0
+        self.run_secs = 0.0
+        self.skipped = 0
+        self.failed = 0
+
+    def offer(self, frames: list[np.ndarray], primary: list[dict]):
+        """
+        Maybe queue some of these frames (with the primary's outputs) for the candidate.
+        """
+        picked = [i for i in range(len(frames)) if random.random() < self.rate]
+        if not picked:
+            return
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.skipped += len(picked)
+                return
+            self._queued += 1
+        self._pool.submit(self._run, [frames[i] for i in picked], [primary[i] for i in picked])
+
+    def _run(self, frames: list[np.ndarray], primary: list[dict]):
+        try:
+            t0 = time.perf_counter()
+            ys = self.detector.run_batch(frames)
+            secs = time.perf_counter() - t0
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+                self.failed += len(frames)
+            log.exception("shadow model failed")
+            return
+        with self._lock:
+            self._queued -= 1
+            self.run_secs += secs
+            for p, s in zip(primary, ys):
+                phone = (p["phone_conf"] > PHONE_ACTIVE) == (s["phone_conf"] > PHONE_ACTIVE)
+                belt = p["seatbelt_present"] == s["seatbelt_present"]
+                self.frames += 1
+                self.phone_agree += phone
+                self.seatbelt_agree += belt
+                self.both_agree += phone and belt
+                self.phone_conf_diff += abs(p["phone_conf"] - s["phone_conf"])
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        n = max(1, self.frames)
+        return {
+            **self.info,
+            "rate": self.rate,
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "agreement": {
+                "phone": round(self.phone_agree / n, 4),
+                "seatbelt": round(self.seatbelt_agree / n, 4),
+                "both": round(self.both_agree / n, 4),
+            },
+            "avg_phone_conf_diff": round(self.phone_conf_diff / n, 4),
+            "avg_ms_per_frame": round(1000 * self.run_secs / n, 2),
+        }
@@ -0,0 +1,62 @@
+"""
+Stub detector (DETECTOR_BACKEND=stub) for benchmarks and local dev without weights.
+- Real preprocessing (letterbox into the reused buffer) and real post-processing;
+  "inference" is a sleep of STUB_INFER_MS per batch (releases the GIL like a model).
+- Deterministic output read from the frame itself, so synthetic clips can
+  script events: top-left 16x16 block brightness = phone confidence,
+  bottom-right 16x16 block bright = seatbelt present.
+"""
+import time
+import numpy as np
+from app.core.config import settings
+from app.services import stage_timer
+from .detector import resolve_class_ids
+from .postprocess import ClassLookup, summarize
+from .preprocess import LetterboxerSet
+
+MARK = 16  # marker block size in source pixels
+
+
+class StubDetector:
+    def __init__(self, weights: str | None = None):
+        self.weights = weights or ""  # unused: lets hot reload / shadow exercise the stub
+        self.names = {0: "seatbelt", 1: "phone"}
+        self.seatbelt_ids, self.phone_ids = resolve_class_ids(self.names)
+        self.lookup = ClassLookup(self.names, self.seatbelt_ids, self.phone_ids)
+        self.imgsz = settings.DETECTOR_IMGSZ
+        self.letterboxers = LetterboxerSet()
+        self.infer_secs = settings.STUB_INFER_MS / 1000.0
+
+    def warm(self):
+        pass
+
+    def run(self, bgr: np.ndarray) -> dict:
+        return self.run_batch([bgr])[0]
+
+    def run_batch(self, frames: list[np.ndarray], imgsz: int | None = None) -> list[dict]:
+        t0 = stage_timer.clock()
+        size = imgsz or self.imgsz
+        self.letterboxers.get(size).batch(frames)
+        t1 = stage_timer.clock()
+        stage_timer.record("preprocess", t0, t1)
+
+        if self.infer_secs > 0:  # model time scales with input pixels
+            time.sleep(self.infer_secs * (size / self.imgsz) ** 2)
+        t2 = stage_timer.clock()
+        stage_timer.record("infer", t1, t2)
+
+        out = [self._summarize(f) for f in frames]
+        stage_timer.record("postprocess", t2)
+        return out
+
+    def _summarize(self, bgr: np.ndarray) -> dict:
+        h, w = bgr.shape[:2]
+        phone = float(bgr[:MARK, :MARK].mean()) / 255.0
+        belt = float(bgr[h - MARK:, w - MARK:].mean()) / 255.0
+        cls, conf, boxes = [], [], []
+        if phone >= 0.5:
+            cls.append(1); conf.append(phone); boxes.append((0, 0, MARK, MARK))
+        if belt >= 0.5:
+            cls.append(0); conf.append(belt); boxes.append((w - MARK, h - MARK, w, h))
+        return summarize(np.array(cls, dtype=np.int64), np.array(conf, dtype=np.float32),
+                         np.array(boxes, dtype=np.float32).reshape(-1, 4), self.lookup)
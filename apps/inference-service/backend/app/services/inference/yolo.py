@@ -1,32 +1,54 @@
 """
 YOLOv8 inference for seatbelt / phone using your trained weights (best.pt).
-- We only compute two outputs: phone_conf (max) and seatbelt_present (bool).
+- "ultralytics" backend (see detector.py); PyTorch under the hood.
+- Main outputs: phone_conf (max) and seatbelt_present (bool); see postprocess.py
+  for the extra per-class confidences / boxes.
+- Runs on inference executor threads; each thread gets its own YOLO handle
+  because ultralytics predictors are not thread-safe.
 """
+import threading
 import numpy as np
 from ultralytics import YOLO
 from app.core.config import settings
+from app.services import stage_timer
+from .detector import resolve_class_ids
+from .postprocess import ClassLookup, summarize
+from .preprocess import LetterboxerSet, unletterbox
+
+NO_CLS = np.zeros(0, dtype=np.int64)
+NO_CONF = np.zeros(0, dtype=np.float32)
+NO_BOX = np.zeros((0, 4), dtype=np.float32)
 
 class SeatbeltPhoneDetector:
-    def __init__(self):
-        # Load once per worker
-        self.model = YOLO(settings.YOLO_MODEL)
+    def __init__(self, weights: str | None = None):
+        # One model per thread, loaded on first use in that thread
+        self.weights = weights or settings.YOLO_MODEL
+        self._local = threading.local()
+        model = self._load()
 
         # Resolve class names
-        names = getattr(self.model, "names", None) or getattr(self.model.model, "names", {})
+        names = getattr(model, "names", None) or getattr(model.model, "names", {})
         self.names = {int(i): str(n).lower() for i, n in names.items()}
 
-        # Common aliases (adjust if your dataset uses different terms)
-        seatbelt_aliases = {"seatbelt", "seat_belt", "belt"}
-        phone_aliases = {"phone", "cell_phone", "mobile_phone", "smartphone"}
-
         # Find IDs for seatbelt & phone
-        self.seatbelt_ids = {i for i, n in self.names.items() if n in seatbelt_aliases}
-        self.phone_ids    = {i for i, n in self.names.items() if n in phone_aliases}
+        self.seatbelt_ids, self.phone_ids = resolve_class_ids(self.names)
+        self.lookup = ClassLookup(self.names, self.seatbelt_ids, self.phone_ids)
+
+        self.imgsz = settings.DETECTOR_IMGSZ
+        self.letterboxers = LetterboxerSet()
+
+    def _load(self):
+        model = YOLO(self.weights)
+        self._local.model = model
+        return model
+
+    @property
+    def model(self):
+        model = getattr(self._local, "model", None)
+        return model if model is not None else self._load()
 
-        # Fallback in case names are missing
-        if not self.seatbelt_ids and not self.phone_ids:
-            self.seatbelt_ids = {0}
-            self.phone_ids = {1}
+    def warm(self):
+        self.model
 
     def run(self, bgr: np.ndarray) -> dict:
         """
@@ -36,27 +58,39 @@ class SeatbeltPhoneDetector:
             "seatbelt_present": bool        # True if any seatbelt detected
           }
         """
-        # YOLO expects RGB
-        rgb = bgr[:, :, ::-1]
+        return self.run_batch([bgr])[0]
 
-        # imgsz 480 is fine for ROI  (adjust if your ROI is smaller/bigger)
-        results = self.model.predict(source=rgb, imgsz=480, conf=0.5, verbose=False)
+    def run_batch(self, frames: list[np.ndarray], imgsz: int | None = None) -> list[dict]:
+        """
+        One predict call for many frames (one result dict per frame, same order).
+        Per-call overhead is what dominates on CPU, so batching pays off.
+        imgsz: input size for this call (multiple of 32); default DETECTOR_IMGSZ.
+        """
+        imgsz = imgsz or self.imgsz
+        # Letterbox into the reused per-thread buffer; ultralytics then skips its own
+        # resize/pad. Numpy sources are BGR for ultralytics (it swaps to RGB itself).
+        t0 = stage_timer.clock()
+        batch, geoms = self.letterboxers.get(imgsz).batch(frames)
+        t1 = stage_timer.clock()
+        stage_timer.record("preprocess", t0, t1)
 
-        phone_conf = 0.0
-        seatbelt_present = False
+        # imgsz 480 is fine for ROI  (adjust DETECTOR_IMGSZ if your ROI is smaller/bigger)
+        # (ultralytics' own pre/post steps are small here: input is already letterboxed)
+        results = self.model.predict(source=list(batch), imgsz=imgsz, conf=0.5, verbose=False)
+        t2 = stage_timer.clock()
+        stage_timer.record("infer", t1, t2)
 
         if not results:
-            return {"phone_conf": phone_conf, "seatbelt_present": seatbelt_present}
-
-        for r in results:
-            if r.boxes is None:
-                continue
-            for b in r.boxes:
-                cls_id = int(b.cls.item())
-                conf = float(b.conf.item())
-                if cls_id in self.phone_ids:
-                    phone_conf = max(phone_conf, conf)
-                if cls_id in self.seatbelt_ids:
-                    seatbelt_present = True
-
-        return {"phone_conf": phone_conf, "seatbelt_present": seatbelt_present}
+            out = [self._summarize(None, g) for g in geoms]
+        else:
+            out = [self._summarize(r, g) for r, g in zip(results, geoms)]
+        stage_timer.record("postprocess", t2)
+        return out
+
+    def _summarize(self, r, geom) -> dict:
+        if r is None or r.boxes is None or len(r.boxes) == 0:
+            return summarize(NO_CLS, NO_CONF, NO_BOX, self.lookup)
+
+        # one device→host copy for the whole (N, 6) [x1, y1, x2, y2, conf, cls] tensor
+        data = r.boxes.data.cpu().numpy()
+        return summarize(data[:, 5], data[:, 4], unletterbox(data[:, :4], geom), self.lookup)
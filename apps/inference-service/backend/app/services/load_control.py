@@ -0,0 +1,134 @@
+"""
+Load-aware quality tiers for live sessions.
+- Tier 0 is full quality; each next tier in QUALITY_TIERS is cheaper:
+  smaller detector input (imgsz), lower per-session frame rate, optional
+  stages (face landmarks, shadow model) off.
+- Every LOAD_CHECK_SECS the controller looks at inference queue fill
+  (executor, or worker processes), frames rejected as busy, and the smoothed
+  per-frame latency. Pressure steps every session one tier down; stepping
+  back up takes LOAD_CALM_CHECKS calm checks in a row (no flapping).
+- Sessions read `tier` per frame and tell their client when it changes
+  ({"quality": {...}}), so the client can shrink its uploads as well.
+"""
+import asyncio
+import logging
+from typing import NamedTuple
+from app.core.config import settings
+from app.services.inference.executor import inference_executor
+from app.services.worker_pool import worker_pool
+
+log = logging.getLogger(__name__)
+
+EWMA_ALPHA = 0.2  # weight of the newest frame in the latency average
+
+
+class Tier(NamedTuple):
+    level: int
+    imgsz: int        # detector input size (multiple of 32)
+    max_fps: float    # per-session frame rate cap
+    optional: bool    # face stage / shadow model run at this tier
+
+    def message(self, levels: int) -> dict:
+        return {"tier": self.level, "tiers": levels, "imgsz": self.imgsz,
+                "maxFps": self.max_fps, "optionalStages": self.optional}
+
+
+def parse_tiers(raw) -> list[Tier]:
+    """
+    [(imgsz, max_fps, optional), ...] → Tiers; 0 = DETECTOR_IMGSZ / MAX_FPS,
+    sizes rounded down to the model stride (32), fps never above MAX_FPS.
+    """
+    tiers = []
+    for level, (imgsz, fps, optional) in enumerate(raw or [(0, 0.0, True)]):
+        size = max(32, (int(imgsz or settings.DETECTOR_IMGSZ) // 32) * 32)
+        cap = min(fps, settings.MAX_FPS) if fps > 0 else settings.MAX_FPS
+        tiers.append(Tier(level, size, float(cap), bool(optional)))
+    return tiers
+
+
+class LoadController:
+    def __init__(self, tiers: list[Tier], check_secs: float):
+        self.tiers = tiers
+        self.check_secs = check_secs
+        self.level = 0
+        self.latency_ms: float | None = None  # EWMA
+        self._frames = 0        # observed since the last check
+        self._rejected = 0      # busy rejections seen at the last check
+        self._calm = 0
+
+        self.steps_down = 0
+        self.steps_up = 0
+
+    @property
+    def tier(self) -> Tier:
+        return self.tiers[self.level]
+
+    def observe(self, secs: float):
+        """
+        One processed frame took `secs` from admission to result.
+        """
+        ms = secs * 1000.0
+        self.latency_ms = ms if self.latency_ms is None else self.latency_ms + EWMA_ALPHA * (ms - self.latency_ms)
+        self._frames += 1
+
+    def queue_fill(self) -> float:
+        if worker_pool.enabled:
+            capacity = max(1, len(worker_pool.ring.members())) * worker_pool.max_queue
+            return worker_pool.in_flight() / capacity
+        s = inference_executor.stats()
+        # max_queue already counts running jobs (in_flight is capped by it alone)
+        return s["in_flight"] / max(1, s["max_queue"])
+
+    def check(self) -> Tier:
+        """
+        One control step; returns the (possibly new) tier.
+        """
+        fill = self.queue_fill()
+        rejected = inference_executor.rejected + worker_pool.rejected
+        busy, self._rejected = rejected > self._rejected, rejected
+        # no frames since the last check = nothing is waiting on inference
+        latency = self.latency_ms if self._frames else None
+        self._frames = 0
+
+        pressure = busy or fill >= settings.LOAD_HIGH_QUEUE or (
+            latency is not None and latency >= settings.LOAD_HIGH_LATENCY_MS)
+        calm = not busy and fill <= settings.LOAD_LOW_QUEUE and (
+            latency is None or latency <= settings.LOAD_LOW_LATENCY_MS)
+
+        if pressure:
+            self._calm = 0
+            if self.level < len(self.tiers) - 1:
+                self.level += 1
+                self.steps_down += 1
+                log.warning("load: stepping down to tier %d (queue %.2f, latency %s ms, busy %s)",
+                            self.level, fill, None if latency is None else round(latency), busy)
+        elif calm:
+            self._calm += 1
+            if self.level > 0 and self._calm >= settings.LOAD_CALM_CHECKS:
+                self._calm = 0
+                self.level -= 1
+                self.steps_up += 1
+                log.info("load: stepping up to tier %d", self.level)
+        else:
+            self._calm = 0
+        return self.tier
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.check_secs)
+            try:
+                self.check()
+            except Exception:
+                log.exception("load check failed")
+
+    def stats(self) -> dict:
+        return {
+            **self.tier.message(len(self.tiers)),
+            "latency_ms": None if self.latency_ms is None else round(self.latency_ms, 1),
+            "queue_fill": round(self.queue_fill(), 3),
+            "steps_down": self.steps_down,
+            "steps_up": self.steps_up,
+        }
+
+
+load_controller = LoadController(parse_tiers(settings.QUALITY_TIERS), settings.LOAD_CHECK_SECS)
@@ -0,0 +1,215 @@
+"""
+Prometheus-style metrics (text exposition, no client library).
+- Counter / Histogram values live in per-thread shards: the event loop,
+  inference threads and motor's pool threads each write their own slots,
+  so the hot path takes no lock. A scrape sums the shards.
+- CallbackMetric reads a value at scrape time (queue depths, existing
+  stats() counters) instead of being updated on the hot path.
+- render() gives the text format served by GET /metrics.
+"""
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from pymongo import monitoring
+
+_registry: list = []
+
+# seconds; covers sub-ms debounce up to multi-second DB stalls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Shards:
+    """
+    One float list per writing thread; only its owner thread writes to it.
+    """
+    __slots__ = ("size", "_local", "_all")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._all: list[list[float]] = []
+
+    def mine(self) -> list[float]:
+        try:
+            return self._local.v
+        except AttributeError:
+            v = self._local.v = [0.0] * self.size
+            self._all.append(v)  # list.append is atomic under the GIL
+            return v
+
+    def total(self) -> list[float]:
+        out = [0.0] * self.size
+        for shard in list(self._all):
+            for i, x in enumerate(shard):
+                out[i] += x
+        return out
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        _registry.append(self)
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        """Sample lines of the text format (without the header)."""
+
+    def _label_str(self, key: tuple, extra: str = "") -> str:
+        parts = [f'{n}="{v}"' for n, v in zip(self.label_names, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _ChildMetric(_Metric):
+    """
+    A metric whose values are recorded on per-label-set children.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self._children: dict[tuple, object] = {}
+        super().__init__(name, help, labels)
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new())
+        return child
+
+    @abstractmethod
+    def _new(self):
+        """A fresh child for one label set."""
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, n: float = 1.0):
+        self._shards.mine()[0] += n
+
+    def value(self) -> float:
+        return self._shards.total()[0]
+
+
+class Counter(_ChildMetric):
+    kind = "counter"
+
+    def _new(self):
+        return _CounterChild()
+
+    def inc(self, n: float = 1.0):
+        self.labels().inc(n)
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{self._label_str(k)} {_fmt(c.value())}"
+                for k, c in list(self._children.items())]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "_shards")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # one slot per bucket, one for +Inf, one for the sum
+        self._shards = _Shards(len(bounds) + 2)
+
+    def observe(self, v: float):
+        s = self._shards.mine()
+        s[bisect_left(self.bounds, v)] += 1
+        s[-1] += v
+
+
+class Histogram(_ChildMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def _new(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, v: float):
+        self.labels().observe(v)
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            t = child._shards.total()
+            acc = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), t[:-1]):
+                acc += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_fmt(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_str(key, le)} {_fmt(acc)}")
+            lines.append(f"{self.name}_sum{self._label_str(key)} {_fmt(t[-1])}")
+            lines.append(f"{self.name}_count{self._label_str(key)} {_fmt(acc)}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """
+    fn() -> number, or {label value (or tuple of values): number}.
+    """
+
+    def __init__(self, name: str, help: str, fn, labels: tuple[str, ...] = (), kind: str = "gauge"):
+        self.fn = fn
+        self.kind = kind
+        super().__init__(name, help, labels)
+
+    def render(self) -> list[str]:
+        v = self.fn()
+        if not isinstance(v, dict):
+            return [f"{self.name} {_fmt(v)}"]
+        return [f"{self.name}{self._label_str(k if isinstance(k, tuple) else (k,))} {_fmt(n)}"
+                for k, n in v.items()]
+
+
+def _fmt(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def render() -> str:
+    lines = []
+    for m in _registry:
+        body = m.render()
+        if body:
+            lines += m.header() + body
+    return "\n".join(lines) + "\n"
+
+
+# ---- hot-path metrics ----
+
+stage_seconds = Histogram("dms_stage_seconds", "DMS pipeline stage latency", ("stage",))
+frames_total = Counter("dms_frames_total", "WebSocket frames by outcome", ("outcome",))
+alerts_total = Counter("dms_alerts_total", "Confirmed alerts sent to clients", ("type",))
+mongo_seconds = Histogram("dms_mongo_command_seconds", "MongoDB command latency", ("command",))
+mongo_failures = Counter("dms_mongo_command_failures_total", "Failed MongoDB commands", ("command",))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Times every driver command (insert / update / find / ...);
+    pass as AsyncIOMotorClient(event_listeners=[...]).
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_seconds.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        mongo_seconds.labels(event.command_name).observe(event.duration_micros / 1e6)
+        mongo_failures.labels(event.command_name).inc()
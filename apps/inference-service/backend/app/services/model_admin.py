@@ -0,0 +1,149 @@
+"""
+Hot model reload / shadow (A/B) control, for this process or its workers.
+- In-process inference: registry calls run on a worker thread, so loading
+  new weights never blocks the event loop; every inference thread loads its
+  handle of the new model before the swap, which happens between batches.
+- INFERENCE_PROCESSES > 0: the same call is broadcast to every worker
+  process (each loads on a side thread, frames keep flowing). A reloaded
+  model is also what replacement / newly added workers load.
+- watch(): polls the active weights file every MODEL_WATCH_SECS and reloads
+  it once a change has stayed put for one poll (copy finished). Replacing
+  the file with an atomic rename is still the safe way to publish weights.
+"""
+import asyncio
+import logging
+import os
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.services.inference.detector import default_weights
+from app.services.inference.executor import inference_executor
+from app.services.inference.registry import models, SWAPS_PRIMARY
+from app.services.worker_pool import worker_pool
+
+log = logging.getLogger(__name__)
+
+
+class ModelLoadError(RuntimeError):
+    """The requested model could not be loaded (or switched) on every worker."""
+
+
+async def _registry(op: str, **kwargs):
+    if worker_pool.enabled:
+        out = await worker_pool.broadcast("models", op, kwargs)
+        failed = {w: r for w, r in out.items() if isinstance(r, str)}  # str = that worker's error
+        if failed:
+            switched = [w for w in out if w not in failed]
+            if switched:
+                await _undo(op, switched)
+            raise ModelLoadError(f"{op} failed on worker(s) {sorted(failed)}: {next(iter(failed.values()))}"
+                                 + (f"; rolled back on {switched}" if switched else ""))
+        return {"workers": out}
+    if op in SWAPS_PRIMARY:
+        loop = asyncio.get_running_loop()
+
+        def prewarm(det):  # on the admin thread: wait for every inference thread
+            asyncio.run_coroutine_threadsafe(inference_executor.preload(det.warm), loop).result()
+        kwargs["prewarm"] = prewarm
+    try:
+        return await run_in_threadpool(getattr(models, op), **kwargs)
+    except LookupError:
+        raise
+    except Exception as exc:
+        raise ModelLoadError(repr(exc)) from exc
+
+
+async def _undo(op: str, wids: list[int]):
+    """
+    Put workers that did apply `op` back on the pool's model (no split models).
+    """
+    if op in SWAPS_PRIMARY:
+        # model_spec is only updated after a successful broadcast: still the old primary
+        kind, kwargs = "reload", worker_pool.model_spec or {"backend": None, "weights": None}
+    elif op == "set_shadow":
+        kind, kwargs = "clear_shadow", {}
+    else:
+        return
+    out = await worker_pool.broadcast("models", kind, kwargs, only=wids)
+    bad = sorted(w for w, r in out.items() if isinstance(r, str))
+    if bad:
+        log.error("rolling back %s failed on worker(s) %s: workers now serve different models", op, bad)
+
+
+async def status() -> dict:
+    if worker_pool.enabled:
+        return {"workers": await worker_pool.broadcast("models", "stats", {})}
+    return models.stats()
+
+
+async def reload(backend: str | None = None, weights: str | None = None) -> dict:
+    out = await _registry("reload", backend=backend, weights=weights)
+    if worker_pool.enabled:
+        worker_pool.model_spec = {"backend": backend, "weights": weights}
+    return out
+
+
+async def set_shadow(backend: str | None, weights: str | None, rate: float) -> dict:
+    return await _registry("set_shadow", backend=backend, weights=weights, rate=rate)
+
+
+async def clear_shadow() -> dict:
+    return {"stopped": await _registry("clear_shadow")}
+
+
+async def promote_shadow() -> dict:
+    """
+    Raises LookupError without a shadow model (in-process mode).
+    """
+    out = await _registry("promote_shadow")
+    if worker_pool.enabled:
+        # the candidate becomes the model new workers load too
+        active = next((r for r in out["workers"].values() if isinstance(r, dict)), None)
+        if active is not None:
+            worker_pool.model_spec = {"backend": active["backend"], "weights": active["weights"]}
+    return out
+
+
+def active_spec() -> tuple[str, str]:
+    """
+    (backend, weights file) currently served.
+    """
+    spec = (worker_pool.model_spec if worker_pool.enabled else models.active) or {}
+    backend = (spec.get("backend") or settings.DETECTOR_BACKEND).lower()
+    return backend, spec.get("weights") or default_weights(backend)
+
+
+def _file_sig(path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+async def watch(interval: float):
+    """
+    Reload the active weights file whenever it changes. Runs until cancelled.
+    """
+    path = active_spec()[1]
+    seen = loaded = _file_sig(path) if path else None
+    while True:
+        await asyncio.sleep(interval)
+        backend, current = active_spec()
+        if not current:
+            continue  # stub backend: nothing to watch
+        if current != path:  # switched through the admin API: watch the new file
+            path, seen = current, _file_sig(current)
+            loaded = seen
+            continue
+        sig = _file_sig(path)
+        if sig is None or sig == loaded:
+            continue
+        if sig != seen:
+            seen = sig  # still changing: wait for it to settle
+            continue
+        try:
+            await reload(backend, path)
+            log.info("model file %s changed: reloaded", path)
+        except ModelLoadError:
+            log.exception("model file %s changed but does not load; keeping the current model", path)
+        loaded = sig
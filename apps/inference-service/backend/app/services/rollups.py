@@ -0,0 +1,113 @@
+"""
+Materialized event rollups for fleet analytics.
+- One document per (owner, vehicle, granularity, bucket start):
+  {"ownerId", "vehicleId", "granularity": "hour" | "day", "bucket": <UTC start>,
+   "counts": {"phone": n, "seatbelt": n, ...}}
+  vehicleId None = all of the owner's sessions; sessions linked to a vehicle
+  also count towards that vehicle's own rollups.
+- Updated incrementally: every persisted batch of events becomes one
+  bulk_write of upserted $inc (event sink, offline video jobs).
+- backfill() rebuilds them from the stored events (services/event_store.py),
+  one owner at a time, replacing that owner's rollups only once rebuilt.
+"""
+from collections import defaultdict
+from datetime import datetime
+from itertools import groupby
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.services import event_store
+
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _count(events: list[dict], owners: dict, incs: dict):
+    # add events to incs: (ownerId, vehicleId, granularity, bucket) → {"counts.<type>": n}
+    for e in events:
+        ctx = owners.get(e["sessionId"])
+        if ctx is None:
+            continue
+        owner_id, vehicle_id = ctx
+        ts = event_store.event_time(e)
+        for g in GRANULARITIES:
+            b = bucket_start(ts, g)
+            incs[(owner_id, None, g, b)][f"counts.{e['type']}"] += 1
+            if vehicle_id is not None:
+                incs[(owner_id, vehicle_id, g, b)][f"counts.{e['type']}"] += 1
+
+
+def rollup_ops(events: list[dict], owners: dict[ObjectId, tuple[ObjectId, ObjectId | None]]) -> list[UpdateOne]:
+    """
+    events: event docs; owners: sessionId → (ownerId, vehicleId | None).
+    Events of sessions missing from `owners` are skipped.
+    """
+    incs: dict[tuple, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    _count(events, owners, incs)
+    return [
+        UpdateOne({"ownerId": o, "vehicleId": v, "granularity": g, "bucket": b},
+                  {"$inc": dict(c)}, upsert=True)
+        for (o, v, g, b), c in incs.items()
+    ]
+
+
+async def apply(db, events: list[dict], owners: dict) -> int:
+    """
+    Add a batch of stored events to the rollups. Returns the number of rollup docs touched.
+    """
+    ops = rollup_ops(events, owners)
+    if ops:
+        await db.rollups.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+async def backfill(db, owner_id: ObjectId | None = None, batch: int = 5000) -> dict:
+    """
+    Rebuild rollups (all owners, or one) from the stored events.
+    Per owner: counts are rebuilt in memory, written over the existing
+    rollups, and only then are that owner's rollups without events deleted,
+    so an interrupted run never leaves an owner with missing rollups. Run it
+    while that owner's sessions aren't streaming, or their live increments
+    may be lost.
+    """
+    q = {} if owner_id is None else {"ownerId": owner_id}
+    sessions: dict[ObjectId, tuple] = {}
+    async for s in db.sessions.find(q, {"ownerId": 1, "vehicleId": 1}):
+        sessions[s["_id"]] = (s["ownerId"], s.get("vehicleId"))
+
+    # one owner's sessions before the next one's
+    by_owner = groupby(sorted(sessions, key=lambda sid: sessions[sid][0]), key=lambda sid: sessions[sid][0])
+    events = touched = deleted = 0
+    stamp = ObjectId()  # marks the docs of this rebuild
+    for owner, sids in by_owner:
+        ids = list(sids)
+        counts: dict[tuple, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # sessions in chunks keep each $in (and the events pulled per round) bounded
+        for i in range(0, len(ids), 500):
+            pending: list[dict] = []
+            async for e in event_store.find(db, ids[i:i + 500]):
+                pending.append(e)
+                if len(pending) >= batch:
+                    _count(pending, sessions, counts)
+                    events += len(pending)
+                    pending.clear()
+            _count(pending, sessions, counts)
+            events += len(pending)
+
+        ops = [UpdateOne({"ownerId": o, "vehicleId": v, "granularity": g, "bucket": b},
+                         {"$set": {"counts": {k.removeprefix("counts."): n for k, n in c.items()},
+                                   "rebuild": stamp}}, upsert=True)
+               for (o, v, g, b), c in counts.items()]
+        for i in range(0, len(ops), batch):
+            await db.rollups.bulk_write(ops[i:i + batch], ordered=False)
+        touched += len(ops)
+        # whatever this rebuild did not write has no events left
+        deleted += (await db.rollups.delete_many({"ownerId": owner, "rebuild": {"$ne": stamp}})).deleted_count
+
+    # owners in scope without any session left
+    deleted += (await db.rollups.delete_many({**q, "rebuild": {"$ne": stamp}})).deleted_count
+    return {"sessions": len(sessions), "events": events, "deleted": deleted, "upserts": touched}
@@ -0,0 +1,82 @@
+"""
+Per-session DMS state (debouncers etc.) keyed by session id.
+- The model is shared; only this small state is per session.
+- LRU order + idle eviction keep memory bounded with thousands of sessions.
+- State survives a quick reconnect, so a flaky socket doesn't reset timers.
+"""
+import time
+from collections import OrderedDict
+
+
+class SessionState:
+    __slots__ = ("session_id", "debouncers", "last_seen", "frames", "perclos", "gate")
+
+    def __init__(self, session_id: str, debouncers: dict):
+        self.session_id = session_id
+        self.debouncers = debouncers
+        self.last_seen = time.monotonic()
+        self.frames = 0       # processed frames (face-stage cadence)
+        self.perclos = None   # face_metrics.Perclos, set by the pipeline
+        self.gate = None      # motion_gate.MotionGate, set by the pipeline
+
+
+class SessionStateRegistry:
+    def __init__(self, factory, max_sessions: int, idle_secs: float):
+        """
+        factory(session_id) -> SessionState
+        """
+        self.factory = factory
+        self.max_sessions = max(1, max_sessions)
+        self.idle_secs = idle_secs
+        self._states: "OrderedDict[str, SessionState]" = OrderedDict()  # oldest use first
+        self.evicted = 0
+
+    def get(self, session_id: str) -> SessionState:
+        now = time.monotonic()
+        st = self._states.get(session_id)
+        if st is None:
+            st = self.factory(session_id)
+            self._states[session_id] = st
+        else:
+            self._states.move_to_end(session_id)
+        st.last_seen = now
+        self._evict(now)
+        return st
+
+    def drop(self, session_id: str):
+        self._states.pop(session_id, None)
+
+    def take(self, session_id: str) -> SessionState | None:
+        """
+        Remove and return a session's state (to move it to another process).
+        """
+        return self._states.pop(session_id, None)
+
+    def adopt(self, st: SessionState):
+        """
+        Install state taken from another process (debouncer timers keep running).
+        """
+        st.last_seen = time.monotonic()
+        self._states[st.session_id] = st
+        self._evict(st.last_seen)
+
+    def _evict(self, now: float):
+        # Head of the dict is the least recently used entry
+        while self._states:
+            sid, st = next(iter(self._states.items()))
+            if len(self._states) > self.max_sessions or now - st.last_seen > self.idle_secs:
+                del self._states[sid]
+                self.evicted += 1
+            else:
+                break
+
+    def __len__(self):
+        return len(self._states)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._states),
+            "max_sessions": self.max_sessions,
+            "idle_secs": self.idle_secs,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,55 @@
+"""
+Per-stage timing hooks for the DMS hot path.
+- Stages: decode, preprocess, infer, postprocess, debounce, persist.
+- Every record() feeds the dms_stage_seconds histogram (GET /metrics).
+- Raw samples (milliseconds, in memory) are only kept after enable():
+  benchmarks, profiling.
+- mute_thread() turns record() off for the calling thread (shadow model runs
+  mustn't show up as primary stage timings).
+"""
+import threading
+import time
+from collections import defaultdict
+from app.services.metrics import stage_seconds
+
+STAGES = ("decode", "preprocess", "infer", "postprocess", "debounce", "persist")
+
+_enabled = False
+_samples: dict[str, list[float]] = defaultdict(list)
+_hist = {s: stage_seconds.labels(s) for s in STAGES}
+_local = threading.local()
+
+clock = time.perf_counter
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def mute_thread():
+    _local.muted = True
+
+
+def record(stage: str, started: float, ended: float | None = None):
+    """
+    record("infer", t0) after `t0 = clock()`; list.append is atomic under the GIL
+    and the histogram is sharded per thread, so executor threads record without a lock.
+    """
+    if getattr(_local, "muted", False):
+        return
+    secs = (ended if ended is not None else clock()) - started
+    _hist[stage].observe(secs)
+    if _enabled:
+        _samples[stage].append(secs * 1000.0)
+
+
+def snapshot(reset: bool = False) -> dict[str, list[float]]:
+    out = {k: list(v) for k, v in _samples.items()}
+    if reset:
+        _samples.clear()
+    return out
@@ -3,6 +3,8 @@ class TemporalDebouncer:
     Fires once when `active` stays true for `min_secs`,
     then suppresses further fires for `cooldown` seconds.
     """
+    __slots__ = ("min_secs", "cooldown", "active_since", "last_fired")
+
     def __init__(self, min_secs: float, cooldown: float):
         self.min_secs = min_secs
         self.cooldown = cooldown
@@ -0,0 +1,214 @@
+"""
+Offline analysis of recorded trips (dashcam / cabin video files).
+- The video is split into time segments; each segment runs in a worker
+  process (model loaded once per process) that streams decoded frames through
+  a generator with a configurable stride and runs batched inference.
+- Workers return compact per-frame detector outputs; the parent replays them,
+  in order, through the same debouncers as the live socket, using the video
+  timestamps instead of time.time().
+- Results are bulk-written: one session document + bucketed event appends
+  (services/event_store.py) + their analytics rollups.
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import multiprocessing as mp
+import cv2
+from bson import ObjectId
+import app.db.mongodb as mongodb
+from app.core.config import settings
+from app.models.event_model import event_doc
+from app.models.session_model import session_doc
+from app.services.inference.pipeline import DmsPipeline
+from app.services import rollups, event_store
+
+# ---- worker process side ----
+
+_pipeline = None  # DmsPipeline with models, one per worker process
+
+
+def _init_worker():
+    global _pipeline
+    _pipeline = DmsPipeline()
+
+
+def probe_video(path: str) -> tuple[int, float]:
+    """
+    (frame_count, fps) of a video file.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {path}")
+    try:
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    finally:
+        cap.release()
+    return count, fps
+
+
+def iter_frames(path: str, start: int, end: int, stride: int, fps: float):
+    """
+    Yield (video_secs, bgr) for frames start, start+stride, ... < end.
+    Skipped frames are only grabbed (demuxed), never decoded.
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        for idx in range(start, end):
+            if (idx - start) % stride:
+                if not cap.grab():
+                    return
+                continue
+            ok, bgr = cap.read()
+            if not ok:
+                return
+            yield idx / fps, bgr
+    finally:
+        cap.release()
+
+
+def analyze_segment(path: str, start: int, end: int, stride: int, fps: float, batch: int) -> list[tuple]:
+    """
+    Runs in a worker process. Returns [(video_secs, detector_out, face_out | None), ...].
+    """
+    det, face = _pipeline.det, _pipeline.face
+    every_n = _pipeline.face_every_n
+    out: list[tuple] = []
+    pending: list[tuple] = []
+
+    def flush():
+        ys = det.run_batch([bgr for _, bgr in pending])
+        for (ts, bgr), y in zip(pending, ys):
+            f = face.analyze(bgr) if face is not None and len(out) % every_n == 0 else None
+            # keep only what the debouncers read; the rest would bloat the pickle
+            out.append((ts, {"phone_conf": y["phone_conf"], "seatbelt_present": y["seatbelt_present"]}, f))
+        pending.clear()
+
+    for ts, bgr in iter_frames(path, start, end, stride, fps):
+        pending.append((ts, bgr))
+        if len(pending) >= batch:
+            flush()
+    if pending:
+        flush()
+    return out
+
+
+# ---- parent side ----
+
+class JobSlots:
+    """
+    Process-wide cap on running video jobs: each one spawns up to
+    VIDEO_JOB_WORKERS model-loading processes next to the live inference.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.active = 0
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.size:
+            return False
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+
+
+job_slots = JobSlots(settings.VIDEO_JOB_CONCURRENCY)
+
+
+def split_segments(frame_count: int, parts: int, stride: int) -> list[tuple[int, int]]:
+    """
+    Contiguous [start, end) frame ranges; boundaries on the stride grid so the
+    sampled frames are the same as a single pass.
+    """
+    parts = max(1, min(parts, frame_count // max(1, stride) or 1))
+    size = -(-frame_count // parts)
+    size += (-size) % stride
+    return [(s, min(s + size, frame_count)) for s in range(0, frame_count, size)]
+
+
+def analyze_video(path: str, *, stride: int = 1, workers: int | None = None, batch: int = 8) -> dict:
+    """
+    Blocking. Returns {"fps", "frames", "duration", "detections": [(secs, y, face), ...]}.
+    """
+    count, fps = probe_video(path)
+    workers = workers or settings.VIDEO_JOB_WORKERS or os.cpu_count() or 1
+    # Some containers don't report a frame count: then read one segment to the end
+    segments = split_segments(count, workers, stride) if count > 0 else [(0, 2**31 - 1)]
+
+    # spawn: don't fork a parent that may already hold torch / BLAS threads
+    with ProcessPoolExecutor(max_workers=len(segments), mp_context=mp.get_context("spawn"),
+                             initializer=_init_worker) as pool:
+        futures = [pool.submit(analyze_segment, path, s, e, stride, fps, batch) for s, e in segments]
+        detections = [d for f in futures for d in f.result()]  # segment order = time order
+
+    duration = count / fps if count > 0 else (detections[-1][0] if detections else 0.0)
+    return {"fps": fps, "frames": count, "duration": duration, "detections": detections}
+
+
+def replay(detections: list[tuple], session_id: ObjectId, started_at: datetime) -> list[dict]:
+    """
+    Run detector outputs through fresh debouncers on the video clock.
+    Returns event docs with createdAt = recording start + video time.
+    """
+    pipeline = DmsPipeline(load_models=False)
+    state = pipeline.new_state(str(session_id))
+    base = started_at.timestamp()  # debouncers expect an absolute clock (cooldown starts at 0)
+
+    docs = []
+    for secs, y, face in detections:
+        for e in pipeline.evaluate(y, base + secs, state, face):
+            docs.append(event_doc(session_id, e["type"], e["confidence"],
+                                  created_at=started_at + timedelta(seconds=secs)))
+    return docs
+
+
+async def run_video_job(path: str, owner_id: ObjectId, name: str, *, stride: int = 1,
+                        workers: int | None = None, batch: int = 8,
+                        started_at: datetime | None = None, job_id: ObjectId | None = None,
+                        vehicle_id: ObjectId | None = None) -> dict:
+    """
+    Analyze a recording and store it as a finished session with its events.
+    Updates the `jobs` document (if job_id is given) as it goes.
+    """
+    db = mongodb.db
+    if db is None:
+        raise RuntimeError("Mongo database is not initialized. Call connect_to_mongo() first.")
+
+    async def set_job(**fields):
+        if job_id is not None:
+            await db.jobs.update_one({"_id": job_id}, {"$set": {**fields, "updatedAt": datetime.utcnow()}})
+
+    await set_job(status="running")
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None, lambda: analyze_video(path, stride=stride, workers=workers, batch=batch))
+
+        started_at = event_store.utc_naive(started_at) or datetime.utcnow()
+        sess = session_doc(owner_id, name, vehicle_id)
+        sess.update({"_id": ObjectId(), "startedAt": started_at,
+                     "endedAt": started_at + timedelta(seconds=result["duration"]),
+                     "source": {"type": "video", "file": os.path.basename(path), "stride": stride}})
+        events = replay(result["detections"], sess["_id"], started_at)
+        for e in events:
+            sess["metrics"][e["type"]] = sess["metrics"].get(e["type"], 0) + 1
+
+        await db.sessions.insert_one(sess)
+        if events:
+            await event_store.append(db, events)
+            await rollups.apply(db, events, {sess["_id"]: (owner_id, vehicle_id)})
+    except Exception as exc:
+        await set_job(status="failed", error=str(exc))
+        raise
+
+    summary = {"sessionId": str(sess["_id"]), "frames": result["frames"],
+               "analyzed": len(result["detections"]), "events": len(events),
+               "metrics": sess["metrics"]}
+    await set_job(status="done", result=summary)
+    return summary
@@ -0,0 +1,477 @@
+"""
+Multi-process inference with session affinity (INFERENCE_PROCESSES > 0).
+- The API process stays a thin gateway: it accepts the WebSocket, then
+  forwards each admitted frame to one inference worker process over a
+  duplex pipe. Workers decode, gate, run the detector (batched over the
+  frames waiting in their pipe) and debounce; the gateway pushes alerts and
+  persists events as before.
+- Sessions are assigned with a consistent-hash ring (virtual nodes), so a
+  session's debouncer state lives in exactly one worker and adding or
+  removing a worker only moves ~1/N of the sessions.
+- Moves carry the session state: on its next frame a moved session's state
+  is exported from the old worker and imported into the new one (frames of
+  one session are sequential, so nothing is in flight for it meanwhile).
+  A worker being removed hands all its sessions over first; a worker that
+  crashes is replaced and its sessions start with fresh state.
+- Replacements back off exponentially; after WORKER_RESTART_LIMIT crashes
+  within WORKER_RESTART_WINDOW_SECS the pool stops replacing workers and
+  reports not ready until an operator resizes it.
+- Each worker is single-threaded with its own model, so capacity grows with
+  the number of cores given to it.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import pickle
+import queue
+import threading
+import time
+import multiprocessing as mp
+from bisect import bisect
+from collections import deque
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.inference.executor import InferenceBusy
+
+log = logging.getLogger(__name__)
+
+VNODES = 64  # ring points per worker
+RESTART_DELAY = 0.5, 30.0  # replacement backoff: first delay, cap (seconds)
+
+
+class WorkerGone(RuntimeError):
+    """The worker handling a request exited before answering."""
+
+
+# ---- worker process side ----
+
+def worker_main(conn, worker_id: int, model_spec: dict | None = None):
+    """
+    Process entry point. One message at a time, except that frames already
+    waiting in the pipe are batched into one detector call. Model admin
+    messages (reload / shadow) run on a side thread so frames keep flowing;
+    a new primary model is warmed on this (the frame) thread between batches
+    before it is swapped in.
+    model_spec: {"backend", "weights"} a hot reload put in place of the configured model.
+    """
+    # one core per worker process: keep BLAS / OpenMP / OpenCV from oversubscribing
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    import cv2
+    cv2.setNumThreads(1)
+    from app.services.inference.pipeline import DmsPipeline
+    from app.services.inference.registry import models, SWAPS_PRIMARY
+    from app.services.session_state import SessionStateRegistry
+    from app.services.frame_protocol import frame_to_bgr
+
+    send_lock = threading.Lock()  # the main loop and model admin threads both answer
+    main_jobs: queue.SimpleQueue = queue.SimpleQueue()  # run on the frame thread between batches
+
+    def send(msg):
+        with send_lock:
+            conn.send(msg)
+
+    pipeline = DmsPipeline()
+    if model_spec:
+        models.reload(**model_spec)
+    models.warm_thread()  # "ready" (below) only once the model is loaded and warm
+    models.ready = True
+    states = SessionStateRegistry(pipeline.new_state, settings.SESSION_STATE_MAX, settings.SESSION_STATE_IDLE_SECS)
+    max_batch = max(1, settings.BATCH_MAX_SIZE)
+    processed = 0
+
+    def run_frames(items):
+        nonlocal processed
+        now = time.time()
+        work = []
+        for rid, sid, frame, imgsz, optional in items:
+            st = states.get(sid)
+            try:
+                bgr = frame_to_bgr(frame, imgsz)
+            except Exception:
+                bgr = None
+            if bgr is None:
+                send((rid, True, {"events": [], "processed": False}))
+                continue
+            sig = pipeline.signature(bgr)
+            work.append([rid, st, bgr, sig, st.gate.reuse(sig, now), imgsz, optional])
+
+        frames, ys = [], []
+        for size in {w[5] for w in work if w[4] is None}:  # one call per load-tier size
+            todo = [w for w in work if w[4] is None and w[5] == size]
+            out = pipeline.det.run_batch([w[2] for w in todo], size)
+            for w, y in zip(todo, out):
+                w[4] = y
+                w[1].gate.store(w[3], y, now)
+                if w[6]:
+                    frames.append(w[2])
+                    ys.append(y)
+
+        for rid, st, bgr, _, y, _, optional in work:
+            face = pipeline.face.analyze(bgr) if optional and pipeline.face_due(st) else None
+            events = pipeline.evaluate(y, time.time(), st, face)
+            processed += 1
+            send((rid, True, {"events": events, "processed": True, "reused": st.gate.skipped}))
+        models.shadow_offer(frames, ys)
+
+    def prewarm(det):
+        # model admin thread: have the frame thread load its handle, and wait
+        done, err = threading.Event(), []
+
+        def job():
+            try:
+                det.warm()
+            except Exception as exc:
+                err.append(exc)
+            finally:
+                done.set()
+        main_jobs.put(job)
+        done.wait()
+        if err:
+            raise err[0]
+
+    def model_op(rid, op, kwargs):
+        if op in SWAPS_PRIMARY:
+            kwargs = {**kwargs, "prewarm": prewarm}
+        try:
+            send((rid, True, getattr(models, op)(**kwargs)))
+        except Exception as exc:
+            send((rid, False, repr(exc)))
+
+    def control(msg):
+        kind, rid = msg[0], msg[1]
+        if kind == "export":
+            st = states.take(msg[2])
+            send((rid, True, pickle.dumps(st) if st is not None else None))
+        elif kind == "import":
+            if msg[3] is not None:
+                states.adopt(pickle.loads(msg[3]))
+            send((rid, True, None))
+        elif kind == "models":  # ("models", rid, registry method, kwargs)
+            if msg[2] == "stats":
+                send((rid, True, models.stats()))
+            else:
+                threading.Thread(target=model_op, args=(rid, msg[2], msg[3]), daemon=True).start()
+        elif kind == "stats":
+            send((rid, True, {"worker": worker_id, "pid": os.getpid(),
+                                   "processed": processed, **states.stats()}))
+        else:
+            send((rid, False, f"unknown message {kind!r}"))
+
+    send(("ready", worker_id))
+    while True:
+        while not main_jobs.empty():
+            main_jobs.get()()
+        try:
+            if not conn.poll(0.05):
+                continue  # idle: keep serving main_jobs
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:  # stop
+            return
+        frames = []
+        while msg and msg[0] == "frame":
+            frames.append(msg[1:])
+            if len(frames) >= max_batch or not conn.poll():
+                msg = ()  # nothing more read yet
+                break
+            msg = conn.recv()
+        try:
+            if frames:
+                run_frames(frames)
+            if msg:
+                control(msg)
+        except Exception as exc:
+            log.exception("worker %d failed", worker_id)
+            for rid, *_ in frames:
+                send((rid, False, repr(exc)))
+        if msg is None:  # stop, read while batching
+            return
+
+
+# ---- gateway side ----
+
+class HashRing:
+    def __init__(self, vnodes: int = VNODES):
+        self.vnodes = vnodes
+        self._points: list[int] = []
+        self._owners: list[int] = []
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def rebuild(self, worker_ids):
+        ring = sorted((self._hash(f"{w}#{i}"), w) for w in worker_ids for i in range(self.vnodes))
+        self._points = [h for h, _ in ring]
+        self._owners = [w for _, w in ring]
+
+    def members(self) -> set[int]:
+        return set(self._owners)
+
+    def lookup(self, key: str) -> int | None:
+        if not self._points:
+            return None
+        return self._owners[bisect(self._points, self._hash(key)) % len(self._points)]
+
+
+class _Worker:
+    def __init__(self, wid: int, ctx, pool: "WorkerPool"):
+        self.wid = wid
+        self.conn, child = ctx.Pipe(duplex=True)
+        self.proc = ctx.Process(target=worker_main, args=(child, wid, pool.model_spec), daemon=True,
+                                name=f"inference-worker-{wid}")
+        self.proc.start()
+        child.close()
+        self.ready = asyncio.get_running_loop().create_future()
+        self.pending: dict[int, asyncio.Future] = {}
+        self.outbox: queue.SimpleQueue = queue.SimpleQueue()
+        self.sent = 0
+        # pipe I/O on threads: a full pipe must never block the event loop
+        threading.Thread(target=self._send_loop, daemon=True).start()
+        threading.Thread(target=self._recv_loop, args=(pool, asyncio.get_running_loop()), daemon=True).start()
+
+    def _send_loop(self):
+        while True:
+            msg = self.outbox.get()
+            try:
+                self.conn.send(msg)
+            except (OSError, ValueError):
+                return
+            if msg is None:
+                return
+
+    def _recv_loop(self, pool: "WorkerPool", loop):
+        while True:
+            try:
+                msg = self.conn.recv()
+            except (EOFError, OSError):
+                loop.call_soon_threadsafe(pool._lost, self)
+                return
+            loop.call_soon_threadsafe(pool._resolve, self, msg)
+
+
+class WorkerPool:
+    def __init__(self, processes: int, max_queue: int):
+        self.size = processes
+        self.max_queue = max(1, max_queue)
+        self.ring = HashRing()
+        self._workers: dict[int, _Worker] = {}
+        self._next_id = 0
+        self._next_rid = 0
+        self._ctx = mp.get_context("spawn")  # never fork a process holding torch / threads
+        # session id → worker id it last ran on (state lives there)
+        self._placement = TTLCache(settings.SESSION_STATE_MAX, settings.SESSION_STATE_IDLE_SECS)
+        self._moves: dict[str, asyncio.Future] = {}
+        self._stopping = False
+        self._restarts: deque[float] = deque()  # monotonic times of recent crashes
+        self._respawn: asyncio.Task | None = None
+        self.gave_up = False  # crash-looping: no more replacements until the next resize()
+        self.model_spec: dict | None = None  # hot-reloaded model, loaded by workers spawned later too
+
+        self.migrations = 0
+        self.lost_workers = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    @property
+    def serving(self) -> bool:
+        """At least one worker is in the ring (frames can be routed)."""
+        return bool(self.ring.members())
+
+    @property
+    def ready(self) -> bool:
+        """Every wanted worker is warm and in the ring, and the pool is not crash-looping."""
+        return self.enabled and not self.gave_up and len(self.ring.members()) >= self.size
+
+    async def start(self):
+        await self.resize(self.size)
+
+    async def resize(self, processes: int):
+        """
+        Grow or shrink the pool. New workers join the ring once their model is
+        loaded; leaving workers hand their sessions over before they stop.
+        Called from outside, this also clears a crash-loop stop.
+        """
+        if self.gave_up:
+            self.gave_up = False
+            self._restarts.clear()
+        self.size = processes
+        if processes > len(self._workers):
+            new = [self._spawn() for _ in range(processes - len(self._workers))]
+            await asyncio.gather(*(w.ready for w in new))
+            self.ring.rebuild(self._workers)
+        while len(self._workers) > processes:
+            await self._retire(max(self._workers))
+
+    def _spawn(self) -> _Worker:
+        w = _Worker(self._next_id, self._ctx, self)
+        self._next_id += 1
+        self._workers[w.wid] = w
+        return w
+
+    async def _retire(self, wid: int):
+        leaving = self._workers[wid]
+        self.ring.rebuild([w for w in self._workers if w != wid])
+        for sid, _ in self._placement.items():
+            # a frame may be moving this session already: let it finish, then re-check
+            while (move := self._moves.get(sid)) is not None:
+                await move
+            if self._placement.get(sid) == wid:
+                dst = self.ring.lookup(sid)
+                if dst is None:
+                    break  # shrinking to no workers: nowhere to hand sessions to
+                await self._migrate(sid, leaving, self._workers[dst])
+        del self._workers[wid]
+        leaving.outbox.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, leaving.proc.join, 10)
+
+    async def process(self, session_id: str, frame, imgsz: int = 0, optional: bool = True) -> dict:
+        """
+        Run one frame of a session on its worker, at detector input `imgsz`
+        (0 = configured), with or without the optional stages (load tier).
+        → {"events": [...], "processed": bool, "reused": n}
+        Raises InferenceBusy when that worker already has max_queue frames
+        waiting, WorkerGone if it died meanwhile or no worker is up.
+        """
+        while (move := self._moves.get(session_id)) is not None:
+            await move
+        wid = self.ring.lookup(session_id)
+        if wid is None:  # every worker is (re)starting
+            raise WorkerGone("no inference worker in the ring")
+        target = self._workers[wid]
+        placed = self._placement.get(session_id)
+        if placed is not None and placed != target.wid and placed in self._workers:
+            await self._migrate(session_id, self._workers[placed], target)
+        self._placement.set(session_id, target.wid)
+
+        if len(target.pending) >= self.max_queue:
+            self.rejected += 1
+            raise InferenceBusy(f"{len(target.pending)} frames queued on worker {target.wid}")
+        return await self._call(target, "frame", session_id, frame, imgsz or settings.DETECTOR_IMGSZ, optional)
+
+    async def _migrate(self, session_id: str, src: _Worker, dst: _Worker):
+        fut = asyncio.get_running_loop().create_future()
+        self._moves[session_id] = fut
+        try:
+            blob = await self._call(src, "export", session_id)
+            await self._call(dst, "import", session_id, blob)
+            self._placement.set(session_id, dst.wid)
+            self.migrations += 1
+        except WorkerGone:
+            pass  # state is lost with the worker; the session restarts fresh
+        finally:
+            if self._moves.get(session_id) is fut:
+                del self._moves[session_id]
+            fut.set_result(None)
+
+    async def _call(self, w: _Worker, kind: str, *args):
+        self._next_rid += 1
+        rid = self._next_rid
+        fut = asyncio.get_running_loop().create_future()
+        w.pending[rid] = fut
+        w.outbox.put((kind, rid, *args))
+        w.sent += 1
+        return await fut
+
+    def _resolve(self, w: _Worker, msg):
+        if msg[0] == "ready":
+            if not w.ready.done():
+                w.ready.set_result(None)
+            return
+        rid, ok, payload = msg
+        fut = w.pending.pop(rid, None)
+        if fut is None or fut.done():
+            return
+        if ok:
+            fut.set_result(payload)
+        else:
+            fut.set_exception(RuntimeError(f"worker {w.wid}: {payload}"))
+
+    def _lost(self, w: _Worker):
+        for fut in w.pending.values():
+            if not fut.done():
+                fut.set_exception(WorkerGone(f"worker {w.wid} exited"))
+        w.pending.clear()
+        if not w.ready.done():
+            w.ready.set_exception(WorkerGone(f"worker {w.wid} exited during startup"))
+        if self._workers.get(w.wid) is not w or self._stopping:
+            return  # retired on purpose
+        self.lost_workers += 1
+        del self._workers[w.wid]
+        self.ring.rebuild(self._workers)
+        now = time.monotonic()
+        self._restarts.append(now)
+        while self._restarts[0] < now - settings.WORKER_RESTART_WINDOW_SECS:
+            self._restarts.popleft()
+        if len(self._restarts) > settings.WORKER_RESTART_LIMIT:
+            self.gave_up = True
+            log.error("inference worker %d exited (code %s); %d crashes in %.0fs, not replacing it",
+                      w.wid, w.proc.exitcode, len(self._restarts), settings.WORKER_RESTART_WINDOW_SECS)
+            return
+        log.error("inference worker %d exited (code %s); replacing it", w.wid, w.proc.exitcode)
+        if self._respawn is None or self._respawn.done():
+            self._respawn = asyncio.create_task(self._replace())
+
+    async def _replace(self):
+        # one task refills the pool; workers that die meanwhile are picked up by its loop
+        while not (self._stopping or self.gave_up) and len(self._workers) < self.size:
+            first, cap = RESTART_DELAY
+            await asyncio.sleep(min(cap, first * 2 ** (len(self._restarts) - 1)))
+            if self._stopping or self.gave_up:
+                return
+            try:
+                await self.resize(self.size)
+            except WorkerGone:
+                # a replacement died while starting: serve with the ones that came up
+                self.ring.rebuild([wid for wid, w in self._workers.items() if w.ready.done()])
+            except Exception:
+                log.exception("replacing inference workers failed")
+                return
+
+    async def broadcast(self, kind: str, *args, only=None) -> dict[int, object]:
+        """
+        Send one control message to every worker (or those in `only`)
+        → {worker id: answer or error text}.
+        """
+        ws = [w for w in self._workers.values() if only is None or w.wid in only]
+        out = await asyncio.gather(*(self._call(w, kind, *args) for w in ws), return_exceptions=True)
+        return {w.wid: (repr(r) if isinstance(r, Exception) else r) for w, r in zip(ws, out)}
+
+    def in_flight(self) -> int:
+        return sum(len(w.pending) for w in self._workers.values())
+
+    async def stats(self) -> dict:
+        workers = await asyncio.gather(*(self._call(w, "stats") for w in self._workers.values()),
+                                       return_exceptions=True)
+        return {
+            "processes": len(self._workers),
+            "max_queue": self.max_queue,
+            "placed_sessions": len(self._placement),
+            "migrations": self.migrations,
+            "lost_workers": self.lost_workers,
+            "recent_restarts": len(self._restarts),
+            "gave_up": self.gave_up,
+            "rejected": self.rejected,
+            "workers": [
+                {**s, "in_flight": len(self._workers[s["worker"]].pending)} if isinstance(s, dict) else repr(s)
+                for s in workers
+            ],
+        }
+
+    async def stop(self):
+        self._stopping = True
+        if self._respawn is not None:
+            self._respawn.cancel()
+        for w in self._workers.values():
+            w.outbox.put(None)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, w.proc.join, 10) for w in self._workers.values()))
+        self._workers.clear()
+
+
+worker_pool = WorkerPool(settings.INFERENCE_PROCESSES, settings.WORKER_QUEUE_DEPTH)
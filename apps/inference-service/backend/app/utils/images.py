@@ -1,19 +1,95 @@
 import os
 from pathlib import Path
 from uuid import uuid4
-from fastapi import UploadFile
+import cv2
+from fastapi import UploadFile, HTTPException
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 
+CHUNK = 256 * 1024
+
+# magic bytes → extension; the client's filename / content-type is not trusted
+def sniff_image(head: bytes) -> str | None:
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
 def ensure_dir(path: str) -> None:
     Path(path).mkdir(parents=True, exist_ok=True)
 
+def static_url(rel_path: str) -> str:
+    return f"{settings.BASE_URL}/static/{rel_path}"
+
+def static_path(url: str) -> str:
+    """
+    Inverse of static_url: file path under UPLOAD_DIR.
+    """
+    rel = url.split("/static/", 1)[1]
+    return os.path.join(settings.UPLOAD_DIR, rel)
+
 async def save_image(file: UploadFile, subdir: str) -> str:
-    ensure_dir(settings.UPLOAD_DIR)
+    """
+    Copy an uploaded image under UPLOAD_DIR/subdir and return its /static URL.
+    - Chunked copy on a worker thread (the event loop never touches the bytes).
+    - Capped at MAX_IMAGE_BYTES (413); JPEG / PNG / WebP only, by content (415).
+    """
+    if file.size is not None and file.size > settings.MAX_IMAGE_BYTES:
+        raise HTTPException(413, f"Image larger than {settings.MAX_IMAGE_BYTES} bytes")
+
     full_dir = os.path.join(settings.UPLOAD_DIR, subdir)
-    ensure_dir(full_dir)
-    ext = os.path.splitext(file.filename or "")[1].lower() or ".jpg"
-    fname = f"{uuid4().hex}{ext}"
-    fpath = os.path.join(full_dir, fname)
-    with open(fpath, "wb") as out:
-        out.write(await file.read())
-    return f"{settings.BASE_URL}/static/{subdir}/{fname}"
+    name = uuid4().hex
+
+    def copy() -> str:
+        ensure_dir(full_dir)
+        src = file.file
+        src.seek(0)
+        head = src.read(16)
+        ext = sniff_image(head)
+        if ext is None:
+            raise HTTPException(415, f"{file.filename or 'upload'}: only JPEG, PNG or WebP images are accepted")
+        fpath = os.path.join(full_dir, name + ext)
+        size = len(head)
+        with open(fpath, "wb") as out:
+            out.write(head)
+            while chunk := src.read(CHUNK):
+                size += len(chunk)
+                if size > settings.MAX_IMAGE_BYTES:
+                    break
+                out.write(chunk)
+        if size > settings.MAX_IMAGE_BYTES:
+            os.remove(fpath)
+            raise HTTPException(413, f"Image larger than {settings.MAX_IMAGE_BYTES} bytes")
+        return ext
+
+    ext = await run_in_threadpool(copy)
+    return static_url(f"{subdir}/{name}{ext}")
+
+def make_variants(url: str) -> dict[str, str] | None:
+    """
+    Blocking. Writes <name>_thumb.webp (longest side THUMB_MAX_SIDE) and <name>.webp
+    next to the original; returns their URLs, or None if the file can't be decoded.
+    """
+    src = static_path(url)
+    img = cv2.imread(src, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    base, ext = os.path.splitext(src)
+    base_url = url[: -len(ext)] if ext else url
+    params = [cv2.IMWRITE_WEBP_QUALITY, settings.IMAGE_WEBP_QUALITY]
+
+    out = {}
+    h, w = img.shape[:2]
+    r = settings.THUMB_MAX_SIDE / max(h, w)
+    thumb = cv2.resize(img, (max(1, round(w * r)), max(1, round(h * r))), interpolation=cv2.INTER_AREA) if r < 1 else img
+    cv2.imwrite(base + "_thumb.webp", thumb, params)
+    out["thumb"] = base_url + "_thumb.webp"
+    if ext != ".webp":
+        cv2.imwrite(base + ".webp", img, params)
+        out["webp"] = base_url + ".webp"
+    else:
+        out["webp"] = url
+    return out
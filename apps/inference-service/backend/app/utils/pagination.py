@@ -0,0 +1,26 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+# Keyset cursors: the sort key of the last item returned, opaque to clients.
+# Sent back in the X-Next-Cursor response header; absent on the last page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*keys) -> str:
+    parts = [k.isoformat() if isinstance(k, datetime) else str(k) for k in keys]
+    return base64.urlsafe_b64encode(json.dumps(parts).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    decode_cursor(c, datetime, ObjectId) → (datetime, ObjectId); 400 if malformed.
+    """
+    try:
+        parts = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(parts) != len(types):
+            raise ValueError
+        return tuple(datetime.fromisoformat(p) if t is datetime else t(p) for t, p in zip(types, parts))
+    except (ValueError, TypeError, InvalidId, json.JSONDecodeError):
+        raise HTTPException(400, "Invalid cursor")
@@ -0,0 +1,25 @@
+import json
+from datetime import datetime
+
+def _default(o):
+    if isinstance(o, datetime):
+        return o.isoformat()
+    return str(o)  # ObjectId
+
+async def json_array(items, chunk_items: int = 256):
+    """
+    Async iterable of dicts → a JSON array, yielded in chunks of `chunk_items`,
+    so a long result is never held in memory as a whole (StreamingResponse body).
+    """
+    yield "["
+    buf: list[str] = []
+    first = True
+    async for item in items:
+        buf.append(json.dumps(item, default=_default))
+        if len(buf) >= chunk_items:
+            yield ("" if first else ",") + ",".join(buf)
+            first = False
+            buf.clear()
+    if buf:
+        yield ("" if first else ",") + ",".join(buf)
+    yield "]"
@@ -0,0 +1,167 @@
+"""
+Event storage: one document per event (`events`) vs bucketed columnar
+documents (`event_buckets`, app/services/event_store.py).
+
+  python -m benchmarks.bench_event_store [--sessions 20] [--events 5000] [--json out.json]
+
+Offline (no DB): synthetic events are encoded as the BSON each layout would
+store, then decoded again the way a read would. Reported:
+  bytes       BSON bytes per event (documents incl. _id; index and
+              WiredTiger block compression not included)
+  scan        decode + unpack all events of one session
+  timeline    per-minute counts for one session (the /timeline fold)
+Before timing, check_legacy() runs find() / timeline() / migrate_session()
+against benchmarks/fake_mongo.py on legacy rows, one with a null createdAt.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+import bson
+from bson import ObjectId
+
+# Settings are read at import time: set the environment before importing app.*
+os.environ.setdefault("MONGODB_URI", "mongodb://unused-by-benchmark")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from app.models.event_model import event_doc
+from app.services import event_store
+from app.services.event_store import EVENT_TYPES, EPOCH
+from benchmarks.fake_mongo import FakeDatabase
+
+
+def synthetic_events(session_id: ObjectId, n: int, seed: int) -> list[dict]:
+    # alerts arrive in bursts a few seconds apart over a multi-hour drive
+    rng = random.Random(seed)
+    ts = datetime(2024, 5, 1, 8, 0, 0)
+    out = []
+    for _ in range(n):
+        ts += timedelta(milliseconds=rng.randint(200, 8000))
+        out.append(event_doc(session_id, rng.choice(EVENT_TYPES), round(rng.uniform(0.5, 1.0), 3), ts))
+    return out
+
+
+def as_buckets(events: list[dict]) -> list[dict]:
+    # what append_ops' upserts leave in the collection
+    docs = []
+    for _, op in event_store.append_ops(events):
+        flt, push = op._filter, op._doc["$push"]
+        docs.append({"_id": ObjectId(), "sessionId": flt["sessionId"], "start": flt["start"],
+                     "n": op._doc["$inc"]["n"], **{k: v["$each"] for k, v in push.items()}})
+    return docs
+
+
+def timeline(events, step: timedelta) -> dict:
+    rows: dict = {}
+    for e in events:
+        s = EPOCH + ((e["createdAt"] - EPOCH) // step) * step
+        rows[(s, e["type"])] = rows.get((s, e["type"]), 0) + 1
+    return rows
+
+
+async def check_legacy():
+    # legacy rows (one stored with createdAt null) merged with live buckets, then migrated
+    db = FakeDatabase()
+    sid, t0 = ObjectId(), datetime(2024, 5, 1, 8, 0, 0)
+    undated = ObjectId.from_datetime(t0 + timedelta(seconds=90))
+    await db.sessions.insert_one({"_id": sid})
+    await db.events.insert_many([
+        event_doc(sid, "phone", 0.9, t0 + timedelta(seconds=30)),
+        {"_id": undated, **event_doc(sid, "seatbelt", 0.8, t0), "createdAt": None},
+        event_doc(sid, "phone", 0.7, t0 + timedelta(seconds=150)),
+    ])
+    await event_store.append(db, [event_doc(sid, "drowsy", 0.6, t0 + timedelta(seconds=60))])
+
+    want = [(30, "phone"), (60, "drowsy"), (90, "seatbelt"), (150, "phone")]
+    got = [((e["createdAt"] - t0).seconds, e["type"]) async for e in event_store.find(db, [sid])]
+    assert got == want, got
+    got = [((e["createdAt"] - t0).seconds, e["type"])
+           async for e in event_store.find(db, [sid], t0 + timedelta(seconds=61), t0 + timedelta(seconds=120))]
+    assert got == [(90, "seatbelt")], got
+    rows = [(r["start"], r["total"]) async for r in event_store.timeline(db, sid, 60)]
+    assert rows == [(t0, 1), (t0 + timedelta(minutes=1), 2), (t0 + timedelta(minutes=2), 1)], rows
+
+    assert await event_store.migrate_session(db, sid, drop=True) == 3
+    assert not db.events.docs
+    got = [((e["createdAt"] - t0).seconds, e["type"]) async for e in event_store.find(db, [sid])]
+    assert got == want, got
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t) * 1000.0
+
+
+def summary(ms: list[float]) -> dict:
+    ms = sorted(ms)
+    return {"p50_ms": round(statistics.median(ms), 3),
+            "p95_ms": round(ms[int(0.95 * (len(ms) - 1))], 3),
+            "mean_ms": round(statistics.fmean(ms), 3)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=20)
+    ap.add_argument("--events", type=int, default=5000, help="events per session")
+    ap.add_argument("--json", help="also write the report to this file")
+    args = ap.parse_args()
+    asyncio.run(check_legacy())
+
+    step = timedelta(minutes=1)
+    sizes = {"per_event": 0, "bucketed": 0}
+    docs = {"per_event": 0, "bucketed": 0}
+    stages = {k: {"per_event": [], "bucketed": []} for k in ("scan", "timeline")}
+    for i in range(args.sessions):
+        events = synthetic_events(ObjectId(), args.events, i)
+        rows = [bson.encode({"_id": ObjectId(), **e}) for e in events]
+        buckets = [bson.encode(b) for b in as_buckets(events)]
+        sizes["per_event"] += sum(map(len, rows))
+        sizes["bucketed"] += sum(map(len, buckets))
+        docs["per_event"] += len(rows)
+        docs["bucketed"] += len(buckets)
+
+        def scan_rows():
+            return [bson.decode(r) for r in rows]
+
+        def scan_buckets():
+            return [e for b in buckets for e in event_store.unpack(bson.decode(b))]
+
+        a, t = timed(scan_rows)
+        stages["scan"]["per_event"].append(t)
+        b, t = timed(scan_buckets)
+        stages["scan"]["bucketed"].append(t)
+        assert len(a) == len(b)
+
+        a, t = timed(lambda: timeline(scan_rows(), step))
+        stages["timeline"]["per_event"].append(t)
+        b, t = timed(lambda: timeline(scan_buckets(), step))
+        stages["timeline"]["bucketed"].append(t)
+        assert a == b
+
+    total = args.sessions * args.events
+    report = {
+        "sessions": args.sessions, "events_per_session": args.events,
+        "bucket_secs": event_store.settings.EVENT_BUCKET_SECS,
+        "documents": docs,
+        "bytes_per_event": {k: round(v / total, 1) for k, v in sizes.items()},
+        "size_ratio": round(sizes["per_event"] / max(1, sizes["bucketed"]), 2),
+    }
+    for name, runs in stages.items():
+        old, new = summary(runs["per_event"]), summary(runs["bucketed"])
+        report[name] = {"per_event": old, "bucketed": new,
+                        "speedup_p50": round(old["p50_ms"] / max(new["p50_ms"], 1e-6), 2)}
+
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+End-to-end DMS benchmark: per-stage latency histograms + fps vs. concurrent sessions.
+
+  python -m benchmarks.bench_pipeline [--frames-dir DIR] [--frames 300]
+      [--mode replay|ws|both] [--sessions 1,2,4,8] [--duration 10] [--send-fps 15]
+      [--out report.json] [--baseline old.json --tolerance 0.15]
+
+- Input: the images in --frames-dir (sorted; JPEG/WebP/PNG bytes as-is), or a
+  synthetic clip whose marker blocks script phone / seatbelt-off episodes, so
+  the stub detector (DETECTOR_BACKEND=stub, the default here) gives the same
+  events on every run. Pass --detector ultralytics|onnx to time a real model.
+- replay: one session in-process, b64webp_to_bgr -> detector -> debouncers ->
+  event sink, on a fixed 10 fps clock (deterministic event count).
+- ws: the real app under uvicorn with an in-memory Mongo (benchmarks/fake_mongo.py),
+  N websocket clients streaming binary frames at --send-fps for --duration secs.
+- Stages (app/services/stage_timer.py): decode, preprocess, infer, postprocess,
+  debounce, persist. The report is JSON; with --baseline, p50/p99 and fps are
+  compared against a previous report and the exit code is 1 on a regression.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BUCKETS_MS = (0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+MARK = 64      # marker block size in synthetic frames (stub detector reads the corners)
+CLIP_FPS = 10  # replay clock
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames-dir", help="replay these images instead of the synthetic clip")
+    ap.add_argument("--frames", type=int, default=300, help="synthetic clip length")
+    ap.add_argument("--size", default="1280x720", help="synthetic frame size WxH")
+    ap.add_argument("--mode", choices=("replay", "ws", "both"), default="both")
+    ap.add_argument("--sessions", default="1,2,4,8", help="concurrency levels for ws mode")
+    ap.add_argument("--duration", type=float, default=10.0, help="secs per ws concurrency level")
+    ap.add_argument("--send-fps", type=float, default=15.0, help="per-client send rate in ws mode")
+    ap.add_argument("--max-fps", type=int, default=1000, help="server MAX_FPS (high = measure capacity)")
+    ap.add_argument("--detector", default="stub", help="DETECTOR_BACKEND")
+    ap.add_argument("--stub-infer-ms", type=float, default=15.0)
+    ap.add_argument("--db-latency-ms", type=float, default=1.0, help="fake Mongo round trip")
+    ap.add_argument("--gate", action="store_true", help="keep the motion gate on")
+    ap.add_argument("--out", help="also write the report to this file")
+    ap.add_argument("--baseline", help="previous report to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    return ap.parse_args()
+
+
+def configure(args):
+    # Settings are read at import time: set the environment before importing app.*
+    os.environ.setdefault("MONGODB_URI", "mongodb://unused-by-benchmark")
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+    os.environ["DETECTOR_BACKEND"] = args.detector
+    os.environ["STUB_INFER_MS"] = str(args.stub_infer_ms)
+    os.environ["MAX_FPS"] = str(args.max_fps)
+    os.environ["MOTION_GATE_ENABLED"] = "true" if args.gate else "false"
+    os.environ["FACE_STAGE_ENABLED"] = "false"  # optional dependency; keeps runs comparable
+
+
+# ---- input ----
+
+def load_frames(args) -> list[bytes]:
+    if args.frames_dir:
+        exts = {".jpg", ".jpeg", ".png", ".webp"}
+        files = sorted(p for p in Path(args.frames_dir).iterdir() if p.suffix.lower() in exts)
+        if not files:
+            sys.exit(f"no images in {args.frames_dir}")
+        return [p.read_bytes() for p in files]
+    return synthetic_clip(args.frames, *map(int, args.size.lower().split("x")))
+
+
+def synthetic_clip(n: int, w: int, h: int) -> list[bytes]:
+    """
+    WebP frames with scripted markers: phone (top-left bright) during 20-45% of
+    the clip, seatbelt off (bottom-right dark) during 55-80%. A bar moves across
+    the frame so consecutive frames differ.
+    """
+    import numpy as np
+    import cv2
+
+    rng = np.random.default_rng(0)
+    small = rng.integers(40, 200, (h // 16, w // 16, 3), dtype=np.uint8)
+    base = cv2.GaussianBlur(cv2.resize(small, (w, h), interpolation=cv2.INTER_CUBIC), (5, 5), 0)
+    out = []
+    for i in range(n):
+        img = base.copy()
+        x = (i * 23) % (w - 40)
+        img[:, x:x + 40] = 255 - img[:, x:x + 40]
+        phone = 0.2 <= i / n < 0.45
+        belt_off = 0.55 <= i / n < 0.8
+        img[:MARK, :MARK] = 255 if phone else 0
+        img[h - MARK:, w - MARK:] = 0 if belt_off else 255
+        out.append(cv2.imencode(".webp", img, [cv2.IMWRITE_WEBP_QUALITY, 80])[1].tobytes())
+    return out
+
+
+# ---- report helpers ----
+
+def histogram(ms: list[float]) -> dict:
+    if not ms:
+        return {"count": 0}
+    ms = sorted(ms)
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for v in ms:
+        counts[next((i for i, b in enumerate(BUCKETS_MS) if v <= b), len(BUCKETS_MS))] += 1
+
+    def pct(p):
+        return round(ms[min(len(ms) - 1, int(p * len(ms)))], 3)
+
+    return {"count": len(ms), "mean_ms": round(statistics.fmean(ms), 3),
+            "p50_ms": pct(0.50), "p90_ms": pct(0.90), "p99_ms": pct(0.99),
+            "max_ms": round(ms[-1], 3),
+            "buckets": {**{str(b): c for b, c in zip(BUCKETS_MS, counts)}, "+Inf": counts[-1]}}
+
+
+def stage_report(samples: dict) -> dict:
+    from app.services.stage_timer import STAGES
+    return {s: histogram(samples.get(s, [])) for s in STAGES}
+
+
+# ---- replay mode ----
+
+async def run_replay(frames: list[bytes]) -> dict:
+    from bson import ObjectId
+    import app.db.mongodb as mongodb
+    from app.core.config import settings
+    from app.routes.sessions_ws import b64webp_to_bgr
+    from app.services import stage_timer
+    from app.services.event_sink import EventSink
+    from app.services.inference.pipeline import DmsPipeline
+    from benchmarks.fake_mongo import FakeDatabase
+
+    mongodb.db = FakeDatabase(BENCH_DB_LATENCY_MS)
+    sid = ObjectId()
+    await mongodb.db.sessions.insert_one({"_id": sid, "metrics": {}})
+    sink = EventSink(settings.EVENT_FLUSH_MAX, settings.EVENT_FLUSH_MS, settings.EVENT_QUEUE_MAX)
+    sink.start()
+
+    pipeline = DmsPipeline()
+    state = pipeline.new_state(str(sid))
+    payloads = [base64.b64encode(f).decode() for f in frames]  # legacy JSON path input
+    base = time.time()
+    events: dict[str, int] = {}
+
+    stage_timer.snapshot(reset=True)
+    t0 = time.perf_counter()
+    for i, b64 in enumerate(payloads):
+        d0 = stage_timer.clock()
+        bgr = b64webp_to_bgr(b64, pipeline.det.imgsz)
+        stage_timer.record("decode", d0)
+        y = pipeline.det.run_batch([bgr])[0]
+        out = pipeline.evaluate(y, base + i / CLIP_FPS, state)  # records "debounce"
+        for e in out:
+            events[e["type"]] = events.get(e["type"], 0) + 1
+            sink.put(sid, e["type"], e["confidence"])
+        if i % 16 == 0:
+            await asyncio.sleep(0)  # let the sink's timer run, as the socket loop would
+    await sink.stop()
+    wall = time.perf_counter() - t0
+
+    return {"frames": len(frames), "wall_s": round(wall, 3), "fps": round(len(frames) / wall, 2),
+            "events": events, "stored": sink.stats()["written"],
+            "stages": stage_report(stage_timer.snapshot(reset=True))}
+
+
+# ---- websocket mode ----
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int):
+    """
+    The real app under uvicorn (own thread / loop), Mongo swapped for FakeDatabase.
+    """
+    import uvicorn
+    import app.db.mongodb as mongodb
+    import app.main as main
+    from benchmarks.fake_mongo import FakeDatabase
+
+    async def fake_connect():
+        mongodb.db = FakeDatabase(BENCH_DB_LATENCY_MS)
+
+    main.connect_to_mongo = fake_connect
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port,
+                                           log_level="warning", ws_max_size=16 * 1024 * 1024))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    # warmup runs in the background; a warming worker pool turns sockets away
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz"):
+                break
+        except urllib.error.HTTPError:
+            time.sleep(0.1)
+    return server
+
+
+async def ws_client(url: str, frames: list[bytes], send_fps: float, duration: float) -> dict:
+    import websockets
+    from app.services.frame_protocol import pack_frame
+
+    sent = alerts = processed = 0
+    async with websockets.connect(url, max_size=None) as ws:
+        async def receive():
+            nonlocal alerts, processed
+            async for msg in ws:
+                data = json.loads(msg)
+                if "alert" in data:
+                    alerts += 1
+                elif "stats" in data:
+                    processed = data["stats"]["processed"]
+
+        rx = asyncio.create_task(receive())
+        start = time.perf_counter()
+        while (elapsed := time.perf_counter() - start) < duration:
+            codec = "jpeg" if frames[sent % len(frames)][:2] == b"\xff\xd8" else "webp"
+            await ws.send(pack_frame(frames[sent % len(frames)], seq=sent, ts=time.time(), codec=codec))
+            sent += 1
+            await asyncio.sleep(max(0.0, sent / send_fps - elapsed))
+        await asyncio.sleep(0.5)  # let in-flight frames finish
+        rx.cancel()
+    return {"sent": sent, "alerts": alerts, "processed": processed}
+
+
+async def run_ws(frames: list[bytes], levels: list[int], duration: float, send_fps: float) -> list[dict]:
+    from bson import ObjectId
+    import app.db.mongodb as mongodb
+    from app.core.security import create_access_token
+    from app.models.session_model import session_doc
+    from app.services import stage_timer
+
+    port = free_port()
+    server = start_server(port)
+    owner = ObjectId()
+    token = create_access_token({"sub": str(owner)})
+
+    results = []
+    try:
+        for n in levels:
+            urls = []
+            for _ in range(n):
+                sess = {"_id": ObjectId(), **session_doc(owner, "bench")}
+                mongodb.db.sessions.docs.append(sess)
+                urls.append(f"ws://127.0.0.1:{port}/ws/sessions/{sess['_id']}?token={token}")
+
+            stage_timer.snapshot(reset=True)
+            t0 = time.perf_counter()
+            clients = await asyncio.gather(*(ws_client(u, frames, send_fps, duration) for u in urls))
+            wall = time.perf_counter() - t0
+            samples = stage_timer.snapshot(reset=True)
+
+            processed = len(samples.get("debounce", []))  # one debounce per processed frame
+            if not processed:  # INFERENCE_PROCESSES > 0: stages ran in the workers; ~1 s stale
+                processed = sum(c["processed"] for c in clients)
+            sent = sum(c["sent"] for c in clients)
+            results.append({"sessions": n, "wall_s": round(wall, 3), "sent": sent,
+                            "processed": processed, "dropped": sent - processed,
+                            "fps": round(processed / wall, 2),
+                            "fps_per_session": round(processed / wall / n, 2),
+                            "alerts": sum(c["alerts"] for c in clients),
+                            "stages": stage_report(samples)})
+    finally:
+        server.should_exit = True
+    return results
+
+
+# ---- regression check ----
+
+def compare(report: dict, baseline: dict, tol: float) -> list[str]:
+    """
+    Human-readable regressions: stage p50/p99 up by more than `tol`, fps down by more than `tol`.
+    """
+    problems = []
+
+    def stages(label, new, old):
+        for stage, h in new.items():
+            o = old.get(stage, {})
+            for k in ("p50_ms", "p99_ms"):
+                if h.get(k) is not None and o.get(k) and h[k] > o[k] * (1 + tol):
+                    problems.append(f"{label} {stage} {k}: {o[k]} -> {h[k]}")
+
+    def fps(label, new, old):
+        if old and new < old * (1 - tol):
+            problems.append(f"{label} fps: {old} -> {new}")
+
+    if "replay" in report and "replay" in baseline:
+        stages("replay", report["replay"]["stages"], baseline["replay"]["stages"])
+        fps("replay", report["replay"]["fps"], baseline["replay"]["fps"])
+    old_ws = {r["sessions"]: r for r in baseline.get("ws", [])}
+    for r in report.get("ws", []):
+        if r["sessions"] in old_ws:
+            label = f"ws[{r['sessions']}]"
+            stages(label, r["stages"], old_ws[r["sessions"]]["stages"])
+            fps(label, r["fps"], old_ws[r["sessions"]]["fps"])
+    return problems
+
+
+def main():
+    global BENCH_DB_LATENCY_MS
+    args = parse_args()
+    configure(args)
+    BENCH_DB_LATENCY_MS = args.db_latency_ms
+
+    from app.services import stage_timer
+    stage_timer.enable()
+
+    frames = load_frames(args)
+    report = {"config": {"detector": args.detector, "frames": len(frames),
+                         "source": args.frames_dir or f"synthetic {args.size}",
+                         "stub_infer_ms": args.stub_infer_ms, "db_latency_ms": args.db_latency_ms,
+                         "max_fps": args.max_fps, "send_fps": args.send_fps,
+                         "motion_gate": args.gate, "buckets_ms": list(BUCKETS_MS)}}
+    if args.mode in ("replay", "both"):
+        report["replay"] = asyncio.run(run_replay(frames))
+    if args.mode in ("ws", "both"):
+        levels = [int(x) for x in args.sessions.split(",") if x.strip()]
+        report["ws"] = asyncio.run(run_ws(frames, levels, args.duration, args.send_fps))
+
+    code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+        code = 1 if report["regressions"] else 0
+
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out)
+    sys.exit(code)
+
+
+BENCH_DB_LATENCY_MS = 1.0
+
+if __name__ == "__main__":
+    main()
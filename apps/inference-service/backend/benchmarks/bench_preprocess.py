@@ -0,0 +1,104 @@
+"""
+Per-stage timing of frame preprocessing: old path vs app/services/inference/preprocess.py.
+
+  python -m benchmarks.bench_preprocess [--frames 200] [--imgsz 480] [--json out.json]
+
+Synthetic frames (no weights / DB needed). Stages:
+  decode      cv2.imdecode full size      vs  probe + IMREAD_REDUCED_*
+  letterbox   np.full + cv2.resize + paste vs  warpAffine into a reused buffer
+  tensor      [..., ::-1] + transpose + /255 (new arrays) vs to_nchw into a reused tensor
+"""
+import argparse
+import json
+import statistics
+import time
+import numpy as np
+import cv2
+from app.services.inference.preprocess import decode, Letterboxer, to_nchw
+
+
+def synthetic_frame(w: int, h: int, seed: int) -> np.ndarray:
+    # smooth noise compresses like a real cabin image rather than pure noise
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (h // 16, w // 16, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(cv2.resize(small, (w, h), interpolation=cv2.INTER_CUBIC), (5, 5), 0)
+
+
+def old_letterbox(bgr: np.ndarray, size: int) -> np.ndarray:
+    h, w = bgr.shape[:2]
+    r = min(size / h, size / w)
+    nh, nw = int(round(h * r)), int(round(w * r))
+    out = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - nh) // 2, (size - nw) // 2
+    out[top:top + nh, left:left + nw] = cv2.resize(bgr, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return out
+
+
+def old_tensor(img: np.ndarray) -> np.ndarray:
+    rgb = img[:, :, ::-1]
+    return np.ascontiguousarray(rgb.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t) * 1000.0
+
+
+def summary(ms: list[float]) -> dict:
+    ms = sorted(ms)
+    return {"p50_ms": round(statistics.median(ms), 3),
+            "p95_ms": round(ms[int(0.95 * (len(ms) - 1))], 3),
+            "mean_ms": round(statistics.fmean(ms), 3)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--imgsz", type=int, default=480)
+    ap.add_argument("--json", help="also write the report to this file")
+    args = ap.parse_args()
+
+    lb = Letterboxer(args.imgsz)
+    tensor = np.empty((1, 3, args.imgsz, args.imgsz), dtype=np.float32)
+    report = {"imgsz": args.imgsz, "frames": args.frames, "cases": []}
+
+    for (w, h) in ((1280, 720), (1920, 1080)):
+        for codec, ext, params in (("jpeg", ".jpg", [cv2.IMWRITE_JPEG_QUALITY, 85]),
+                                   ("webp", ".webp", [cv2.IMWRITE_WEBP_QUALITY, 80])):
+            encoded = [cv2.imencode(ext, synthetic_frame(w, h, i), params)[1]
+                       for i in range(8)]
+            stages = {k: {"old": [], "new": []} for k in ("decode", "letterbox", "tensor")}
+            for i in range(args.frames):
+                buf = encoded[i % len(encoded)]
+
+                img, t = timed(cv2.imdecode, buf, cv2.IMREAD_COLOR)
+                stages["decode"]["old"].append(t)
+                boxed, t = timed(old_letterbox, img, args.imgsz)
+                stages["letterbox"]["old"].append(t)
+                _, t = timed(old_tensor, boxed)
+                stages["tensor"]["old"].append(t)
+
+                img, t = timed(decode, buf, args.imgsz)
+                stages["decode"]["new"].append(t)
+                (batch, _), t = timed(lb.batch, [img])
+                stages["letterbox"]["new"].append(t)
+                _, t = timed(to_nchw, batch, tensor)
+                stages["tensor"]["new"].append(t)
+
+            case = {"source": f"{w}x{h}", "codec": codec}
+            for name, runs in stages.items():
+                old, new = summary(runs["old"]), summary(runs["new"])
+                case[name] = {"old": old, "new": new,
+                              "speedup_p50": round(old["p50_ms"] / max(new["p50_ms"], 1e-6), 2)}
+            report["cases"].append(case)
+
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(out)
+
+
+if __name__ == "__main__":
+    main()
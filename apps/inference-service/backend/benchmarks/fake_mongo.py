@@ -0,0 +1,190 @@
+"""
+In-memory stand-in for the motor database, for benchmarks only.
+Covers what the DMS hot path and the event / rollup tools use: find_one /
+find (async cursor; nulls sort first) / insert_one / insert_many /
+update_one / delete_many / bulk_write (UpdateOne with $inc / $set / $push
+$each [$slice]) / create_index. Filters are top-level fields: equality
+(array fields match a member) or $in / $ne / $lte / $gte / $lt / $exists,
+plus a top-level $or; any other operator raises ValueError. Upserts seed
+the new document from the equality fields only.
+`latency_ms` adds an await per call so persist timings look like a (local)
+network round trip.
+"""
+import asyncio
+import operator
+from collections import defaultdict
+from bson import ObjectId
+from pymongo.results import DeleteResult, InsertOneResult
+
+
+_MISSING = object()
+
+
+def _eq(have, want) -> bool:
+    return have == want or (isinstance(have, list) and want in have)
+
+
+_RANGE = {"$lte": operator.le, "$gte": operator.ge, "$lt": operator.lt}
+
+
+def _cond(have, op: str, arg) -> bool:
+    if op == "$exists":
+        return (have is not _MISSING) == bool(arg)
+    if op == "$ne":
+        return have is _MISSING or not _eq(have, arg)
+    if op == "$in":
+        return have is not _MISSING and any(_eq(have, a) for a in arg)
+    if op in _RANGE:
+        return have is not _MISSING and have is not None and _RANGE[op](have, arg)  # null is never in a range
+    raise ValueError(f"fake_mongo: unsupported filter operator {op}")
+
+
+def _is_ops(v) -> bool:
+    return isinstance(v, dict) and v and all(k.startswith("$") for k in v)
+
+
+def _matches(doc: dict, flt: dict) -> bool:
+    for k, v in flt.items():
+        if k == "$or":
+            if not any(_matches(doc, f) for f in v):
+                return False
+            continue
+        if k.startswith("$"):
+            raise ValueError(f"fake_mongo: unsupported filter operator {k}")
+        have = doc.get(k, _MISSING)
+        if _is_ops(v):
+            if not all(_cond(have, op, arg) for op, arg in v.items()):
+                return False
+        elif v is None:  # matches null or missing, as in Mongo
+            if have is not None and have is not _MISSING:
+                return False
+        elif have is _MISSING or not _eq(have, v):
+            return False
+    return True
+
+
+def _apply(doc: dict, update: dict):
+    for path, n in update.get("$inc", {}).items():
+        *parents, leaf = path.split(".")
+        node = doc
+        for p in parents:
+            node = node.setdefault(p, {})
+        node[leaf] = node.get(leaf, 0) + n
+    for path, v in update.get("$set", {}).items():
+        *parents, leaf = path.split(".")
+        node = doc
+        for p in parents:
+            node = node.setdefault(p, {})
+        node[leaf] = v
+    for field, v in update.get("$push", {}).items():
+        arr = doc.setdefault(field, [])
+        if isinstance(v, dict) and "$each" in v:
+            arr.extend(v["$each"])
+            if "$slice" in v:
+                doc[field] = arr[v["$slice"]:] if v["$slice"] < 0 else arr[:v["$slice"]]
+        else:
+            arr.append(v)
+
+
+def _project(doc: dict, projection: dict | None) -> dict:
+    if not projection:
+        return dict(doc)
+    keep = {k for k, v in projection.items() if v and k != "_id"}
+    if keep:
+        out = {k: doc[k] for k in keep if k in doc}
+        if projection.get("_id", 1):
+            out["_id"] = doc["_id"]
+        return out
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+class FakeCursor:
+    def __init__(self, docs: list[dict]):
+        self._docs = docs
+
+    def sort(self, keys):
+        for k, direction in reversed(keys):
+            # null / missing sort before any value, as in Mongo
+            self._docs.sort(key=lambda d: (d.get(k) is not None, d.get(k)), reverse=direction < 0)
+        return self
+
+    def batch_size(self, n: int):
+        return self
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for d in self._docs:
+            yield d
+
+
+class FakeCollection:
+    def __init__(self, latency_ms: float):
+        self.docs: list[dict] = []
+        self.latency = latency_ms / 1000.0
+        self.calls = 0
+
+    async def _rtt(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)  # sleep(0) still yields, like a real driver
+
+    async def create_index(self, *args, **kwargs):
+        return "idx"
+
+    async def find_one(self, flt: dict, projection=None):
+        await self._rtt()
+        return next((d for d in self.docs if _matches(d, flt)), None)
+
+    def find(self, flt: dict | None = None, projection=None) -> FakeCursor:
+        self.calls += 1  # no await: motor's find() only builds the cursor
+        return FakeCursor([_project(d, projection) for d in self.docs if _matches(d, flt or {})])
+
+    async def insert_one(self, doc: dict):
+        await self._rtt()
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(doc)
+        return InsertOneResult(doc["_id"], True)
+
+    async def insert_many(self, docs: list[dict], ordered: bool = True):
+        await self._rtt()
+        for d in docs:
+            d.setdefault("_id", ObjectId())
+        self.docs.extend(docs)
+
+    async def update_one(self, flt: dict, update: dict, upsert: bool = False):
+        await self._rtt()
+        self._update(flt, update, upsert)
+
+    async def delete_many(self, flt: dict):
+        await self._rtt()
+        keep = [d for d in self.docs if not _matches(d, flt)]
+        n, self.docs[:] = len(self.docs) - len(keep), keep
+        return DeleteResult({"n": n}, True)
+
+    async def bulk_write(self, ops: list, ordered: bool = True):
+        await self._rtt()
+        for op in ops:  # pymongo UpdateOne
+            self._update(op._filter, op._doc, op._upsert)
+
+    def _update(self, flt: dict, update: dict, upsert: bool):
+        doc = next((d for d in self.docs if _matches(d, flt)), None)
+        if doc is None:
+            if not upsert:
+                return
+            doc = {"_id": ObjectId(), **{k: v for k, v in flt.items() if not k.startswith("$") and not _is_ops(v)}}
+            self.docs.append(doc)
+        _apply(doc, update)
+
+
+class FakeDatabase:
+    def __init__(self, latency_ms: float = 0.0):
+        self._cols = defaultdict(lambda: FakeCollection(latency_ms))
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._cols[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return self._cols[name]